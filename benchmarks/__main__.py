@@ -0,0 +1,105 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs benchmarks and compares them against a baseline saved on this machine.
+
+Timings depend on the machine, so no baseline is checked in. Save one from
+the revision to compare against, then run the benchmarks on the change.
+
+Usage:
+$ python -m benchmarks --save-baseline [--baseline FILE] [--filter NAME]
+$ python -m benchmarks [--output FILE] [--baseline FILE] [--filter NAME]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from typing import List, Optional
+
+# Imported for their side effect of registering benchmarks.
+from benchmarks import bench_analyze  # noqa: F401
+from benchmarks import bench_batch  # noqa: F401
+from benchmarks import bench_compile  # noqa: F401
+from benchmarks import bench_jobs  # noqa: F401
+from benchmarks import bench_registry  # noqa: F401
+from benchmarks import bench_submit  # noqa: F401
+from benchmarks import bench_upload  # noqa: F401
+from benchmarks import harness
+
+# Baselines are local to the checkout, and ignored by git.
+_DEFAULT_BASELINE = os.path.join(".benchmarks", "baseline.json")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Runs the benchmarks.
+
+    Args:
+        argv: Command line arguments.
+
+    Returns:
+        Exit code, non-zero if any benchmark regressed.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="File to write JSON results to.")
+    parser.add_argument(
+        "--baseline",
+        default=_DEFAULT_BASELINE,
+        help="JSON results to compare against. Pass an empty string to skip.",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save the results as the baseline instead of comparing them.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="Maximum allowed ratio of current to baseline time.",
+    )
+    parser.add_argument("--filter", help="Only run benchmarks containing this.")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed calls each.")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Keeps benchmark runs from reading or filling the user's caches.
+        os.environ["PIPELINES_CACHE_DIR"] = cache_dir
+        results = harness.run_all(args.filter, rounds=args.rounds)
+
+    if args.output:
+        harness.save_json(results, args.output)
+    if args.save_baseline:
+        harness.save_json(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}.")
+        return 0
+    if not args.baseline or not os.path.exists(args.baseline):
+        for result in results:
+            print(f"{result.name:<45} {result.min * 1e3:10.3f} ms")
+        if args.baseline:
+            print(f"No baseline at {args.baseline}, save one with --save-baseline.")
+        return 0
+    regressions = harness.compare(
+        results, harness.load_json(args.baseline), args.threshold
+    )
+    if regressions:
+        print(f"Regressed beyond x{args.threshold}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Benchmarks of analyzing the task graph of compiled pipelines."""
+
+import functools
+from typing import Any, Callable, Dict, Iterator
+
+from benchmarks import harness
+from pipelines import dag_analyzer
+
+# Shape of the synthetic task graph.
+_NUM_LAYERS = 50
+_LAYER_WIDTH = 100
+
+
+def _task_name(layer: int, i: int) -> str:
+    return f"task-{layer}-{i % _LAYER_WIDTH}"
+
+
+def _synthetic_template() -> Dict[str, Any]:
+    """Returns a pipeline of layers of tasks consuming the previous layer.
+
+    Each task also runs after a task two layers up, which is redundant.
+    """  # noqa: DAR201
+    tasks = {}
+    for layer in range(_NUM_LAYERS):
+        for i in range(_LAYER_WIDTH):
+            producers = [_task_name(layer - 1, i + j) for j in range(2) if layer]
+            tasks[_task_name(layer, i)] = {
+                "dependentTasks": [_task_name(layer - 2, i)] if layer > 1 else [],
+                "inputs": {
+                    "parameters": {
+                        f"x{j}": {
+                            "taskOutputParameter": {
+                                "producerTask": producer,
+                                "outputParameterKey": "Output",
+                            }
+                        }
+                        for j, producer in enumerate(producers)
+                    }
+                },
+            }
+    return {"pipelineSpec": {"root": {"dag": {"tasks": tasks}}}}
+
+
+@harness.benchmark(f"analyze/tasks={_NUM_LAYERS * _LAYER_WIDTH}")
+def analyze() -> Iterator[Callable[[], Any]]:
+    """Analyzes a synthetic pipeline of thousands of tasks."""
+    yield functools.partial(dag_analyzer.analyze, _synthetic_template())
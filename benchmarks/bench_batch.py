@@ -0,0 +1,51 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Benchmarks of building job requests for large parameter sweeps."""
+
+import json
+import os
+import tempfile
+from typing import Any, Callable, Iterator, List
+
+from benchmarks import harness
+from pipelines import job_requests
+from pipelines import pipeline_compiler
+
+# Number of parameter sets in the synthetic sweep.
+_NUM_JOBS = 10_000
+
+
+@harness.benchmark(f"batch/create-requests/jobs={_NUM_JOBS}")
+def create_requests() -> Iterator[Callable[[], Any]]:
+    """Parses the sample pipeline once and binds many parameter sets to it."""
+    with tempfile.TemporaryDirectory() as tempdir:
+        pipeline_path = os.path.join(tempdir, "pipeline.json")
+        pipeline_compiler.compile("sample_pipeline", "pipeline", pipeline_path)
+        with open(pipeline_path) as fp:
+            template = json.load(fp)
+    job_ids = [f"job-{i}" for i in range(_NUM_JOBS)]
+    param_sets = [
+        {"message": f"Hello {i}!", "gcs_filepath": f"gs://benchmark-bucket/out-{i}"}
+        for i in range(_NUM_JOBS)
+    ]
+
+    def create() -> List[job_requests.JobRequest]:
+        job_template = job_requests.JobTemplate(
+            template, "sample-pipeline", "gs://benchmark-bucket/root"
+        )
+        return job_template.create_requests(job_ids, param_sets)
+
+    yield create
@@ -0,0 +1,190 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of `pipeline_compiler.compile` on synthetic pipelines."""
+
+import contextlib
+import functools
+import itertools
+import os
+import pathlib
+import subprocess  # noqa: S404
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Iterator, Tuple
+from unittest import mock
+
+from benchmarks import harness
+import pipelines
+from pipelines import compile_server
+from pipelines import compile_watcher
+from pipelines import pipeline_compiler
+from pipelines import sources
+
+DAG_SIZES = (10, 50, 200)
+
+# Number of independent chains of tasks in a synthetic pipeline.
+_DAG_WIDTH = 4
+
+_MODULE_TEMPLATE = '''"""Synthetic Kubeflow pipeline with {num_tasks} tasks."""
+
+
+import kfp
+from kfp.v2 import dsl
+
+
+@dsl.component(base_image="python:3.10")
+def _step(message: str) -> str:
+    """Passes a message on to the next step."""
+    return message
+
+
+@kfp.dsl.pipeline(name="synthetic-pipeline-{num_tasks}")
+def pipeline(message: str) -> None:
+    """Synthetic Kubeflow pipeline definition."""
+{tasks}
+'''
+
+
+def synthetic_pipeline_source(num_tasks: int) -> str:
+    """Returns source of a pipeline module in the style of `sample_pipeline`.
+
+    The pipeline consists of `_DAG_WIDTH` parallel chains of tasks, each task
+    consuming the output of the previous task in its chain.
+
+    Args:
+        num_tasks: Number of tasks in the pipeline.
+
+    Returns:
+        Python module source.
+    """
+    tasks = []
+    for i in range(num_tasks):
+        upstream = "message" if i < _DAG_WIDTH else f"task_{i - _DAG_WIDTH}.output"
+        tasks.append(f"    task_{i} = _step({upstream})")
+    return _MODULE_TEMPLATE.format(num_tasks=num_tasks, tasks="\n".join(tasks))
+
+
+def write_synthetic_pipeline(directory: str, num_tasks: int) -> str:
+    """Writes a synthetic pipeline module and returns its module name."""
+    module_name = f"synthetic_pipeline_{num_tasks}"
+    with open(os.path.join(directory, f"{module_name}.py"), "w") as fp:
+        fp.write(synthetic_pipeline_source(num_tasks))
+    return module_name
+
+
+@contextlib.contextmanager
+def _synthetic_package(num_tasks: int) -> Iterator[Tuple[str, str]]:
+    """Yields the module name and directory of a synthetic pipeline module."""
+    with tempfile.TemporaryDirectory() as tempdir:
+        module_name = write_synthetic_pipeline(tempdir, num_tasks)
+        # Makes the synthetic module importable and hashable as part of the package.
+        with mock.patch.object(
+            pipelines, "__path__", [*pipelines.__path__, tempdir]
+        ), mock.patch.object(sources, "PACKAGE_DIR", pathlib.Path(tempdir)):
+            yield module_name, tempdir
+        sys.modules.pop(f"pipelines.{module_name}", None)
+
+
+def _compile_benchmark(num_tasks: int, use_cache: bool) -> Iterator[Callable[[], Any]]:
+    """Sets up compilation of a synthetic pipeline into a temporary package path."""
+    with _synthetic_package(num_tasks) as (module_name, tempdir):
+        output_path = os.path.join(tempdir, "pipeline.json")
+        yield lambda: pipeline_compiler.compile(
+            module_name, "pipeline", output_path, use_cache=use_cache
+        )
+
+
+def _watch_benchmark(num_tasks: int) -> Iterator[Callable[[], Any]]:
+    """Sets up recompilation of a synthetic pipeline after each edit."""
+    with _synthetic_package(num_tasks) as (module_name, tempdir):
+        task = pipeline_compiler.CompileTask(
+            module_name, "pipeline", os.path.join(tempdir, "pipeline.json")
+        )
+        watcher = compile_watcher.CompileWatcher([task])
+        watcher.compile_all()
+        edits = itertools.count()
+
+        def edit_and_recompile() -> None:
+            module_path = os.path.join(tempdir, f"{module_name}.py")
+            with open(module_path, "a") as fp:
+                fp.write(f"# Edit {next(edits)}\n")
+            (result,) = watcher.poll()
+            if not result.ok:
+                raise RuntimeError(result.error)
+
+        yield edit_and_recompile
+
+
+def _cli_benchmark(use_server: bool) -> Iterator[Callable[[], Any]]:
+    """Sets up compilation of the sample pipeline in a new CLI process.
+
+    Args:
+        use_server: If True, a compile server serves the CLI's requests.
+
+    Yields:
+        Function that runs the CLI once.
+
+    Raises:
+        RuntimeError: If the compile server exits before listening.
+    """
+    with tempfile.TemporaryDirectory() as tempdir:
+        output_path = os.path.join(tempdir, "pipeline.json")
+        socket_path = os.path.join(tempdir, "compile.sock")
+        env = dict(os.environ, PIPELINES_COMPILE_SOCKET=socket_path)
+        command = [sys.executable, "-m", "pipelines.console", "compile"]
+        command += ["--no-cache", "sample_pipeline", "pipeline", output_path]
+        server = None
+        if use_server:
+            server = subprocess.Popen(  # noqa: S603
+                [sys.executable, "-m", "pipelines.console", "compile-server"],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            while not compile_server._is_listening(socket_path):
+                if server.poll() is not None:
+                    raise RuntimeError("The compile server did not start.")
+                time.sleep(0.05)
+        try:
+            yield lambda: subprocess.run(  # noqa: S603
+                command, env=env, check=True, capture_output=True
+            )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+for _num_tasks in DAG_SIZES:
+    harness.benchmark(f"compile/cold/tasks={_num_tasks}")(
+        functools.partial(_compile_benchmark, _num_tasks, use_cache=False)
+    )
+
+harness.benchmark(f"compile/cached/tasks={DAG_SIZES[-1]}")(
+    functools.partial(_compile_benchmark, DAG_SIZES[-1], use_cache=True)
+)
+
+harness.benchmark(f"compile/watch-recompile/tasks={DAG_SIZES[0]}")(
+    functools.partial(_watch_benchmark, DAG_SIZES[0])
+)
+
+harness.benchmark("compile/cli-cold/sample_pipeline")(
+    functools.partial(_cli_benchmark, use_server=False)
+)
+
+harness.benchmark("compile/cli-server/sample_pipeline")(
+    functools.partial(_cli_benchmark, use_server=True)
+)
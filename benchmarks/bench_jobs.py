@@ -0,0 +1,71 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of querying the local index of submitted jobs."""
+
+import functools
+import pathlib
+import tempfile
+from typing import Any, Callable, Dict, Iterator
+
+from benchmarks import harness
+from pipelines import job_index
+
+# Number of jobs in the synthetic index.
+_NUM_JOBS = 50_000
+
+# Number of distinct pipelines and parameter sets among the jobs.
+_NUM_PIPELINES = 20
+_NUM_PARAM_SETS = 1000
+
+
+def _synthetic_records() -> Iterator[job_index.JobRecord]:
+    """Yields jobs submitted one minute apart."""
+    for i in range(_NUM_JOBS):
+        params = {"message": f"hello {i % _NUM_PARAM_SETS}", "count": i % 7}
+        yield job_index.JobRecord(
+            job_id=f"job-{i}",
+            pipeline_name=f"pipeline-{i % _NUM_PIPELINES}",
+            template_digest="0" * 64,
+            params_hash=job_index.get_params_hash(params),
+            params=params,
+            submit_time=60.0 * i,
+            location="us-central1",
+            project="some-project",
+            state="PIPELINE_STATE_SUCCEEDED",
+            duration=100.0,
+        )
+
+
+def _query_benchmark(query: Dict[str, Any]) -> Iterator[Callable[[], Any]]:
+    """Sets up a query of a synthetic index of many jobs."""
+    with tempfile.TemporaryDirectory() as tempdir:
+        index = job_index.JobIndex(pathlib.Path(tempdir, "jobs.sqlite3"))
+        index.add(_synthetic_records())
+        yield functools.partial(index.query, **query)
+        index.close()
+
+
+_QUERIES: Dict[str, Dict[str, Any]] = {
+    "pipeline": {"pipeline_name": "pipeline-3"},
+    "params-hash": {
+        "params_hash": job_index.get_params_hash({"message": "hello 3", "count": 3})
+    },
+    "time-range": {"since": 60.0 * 20_000, "until": 60.0 * 20_100, "limit": None},
+}
+
+for _name, _query in _QUERIES.items():
+    harness.benchmark(f"jobs/query-{_name}/jobs={_NUM_JOBS}")(
+        functools.partial(_query_benchmark, _query)
+    )
@@ -0,0 +1,51 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of listing the pipelines of a package without importing it."""
+
+import functools
+import pathlib
+import tempfile
+from typing import Any, Callable, Iterator
+from unittest import mock
+
+from benchmarks import bench_compile
+from benchmarks import harness
+from pipelines import pipeline_registry
+from pipelines import sources
+
+# Number of pipeline modules in the synthetic package.
+_NUM_MODULES = 100
+
+
+def _list_benchmark(use_cache: bool) -> Iterator[Callable[[], Any]]:
+    """Sets up listing the pipelines of a synthetic package."""
+    with tempfile.TemporaryDirectory() as tempdir:
+        for i in range(_NUM_MODULES):
+            module_path = pathlib.Path(tempdir, f"synthetic_pipeline_{i}.py")
+            module_path.write_text(bench_compile.synthetic_pipeline_source(10))
+        with mock.patch.object(sources, "PACKAGE_DIR", pathlib.Path(tempdir)):
+            pipeline_registry.list_pipelines()
+            yield functools.partial(
+                pipeline_registry.list_pipelines, use_cache=use_cache
+            )
+
+
+harness.benchmark(f"registry/scan/modules={_NUM_MODULES}")(
+    functools.partial(_list_benchmark, use_cache=False)
+)
+
+harness.benchmark(f"registry/cached/modules={_NUM_MODULES}")(
+    functools.partial(_list_benchmark, use_cache=True)
+)
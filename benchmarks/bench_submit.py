@@ -0,0 +1,93 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of pipeline job submission against a fake Vertex AI backend."""
+
+import asyncio
+import os
+import tempfile
+from typing import Any, Callable, Iterator
+
+from benchmarks import fake_vertex
+from benchmarks import harness
+from pipelines import pipeline_compiler
+from pipelines import pipeline_runner
+
+
+def _run_config(pipeline_path: str) -> pipeline_runner.PipelineRunConfig:
+    return pipeline_runner.PipelineRunConfig(
+        pipeline_name="sample-pipeline",
+        pipeline_path=pipeline_path,
+        gcs_root_path="gs://benchmark-bucket/root",
+        location="us-central1",
+    )
+
+
+def _sample_pipeline_path(directory: str) -> str:
+    """Compiles the sample pipeline into a directory and returns its path."""
+    pipeline_path = os.path.join(directory, "pipeline.json")
+    pipeline_compiler.compile("sample_pipeline", "pipeline", pipeline_path)
+    return pipeline_path
+
+
+_PARAMS = {"message": "Hello World!", "gcs_filepath": "gs://benchmark-bucket/out"}
+
+
+@harness.benchmark("submit/run")
+def _run() -> Iterator[Callable[[], Any]]:
+    with tempfile.TemporaryDirectory() as tempdir, fake_vertex.fake_vertex_backend():
+        run_config = _run_config(_sample_pipeline_path(tempdir))
+        yield lambda: pipeline_runner.run(run_config, _PARAMS)
+
+
+@harness.benchmark("submit/runner-reused")
+def _runner_reused() -> Iterator[Callable[[], Any]]:
+    with tempfile.TemporaryDirectory() as tempdir, fake_vertex.fake_vertex_backend():
+        runner = pipeline_runner.PipelineRunner(
+            _run_config(_sample_pipeline_path(tempdir))
+        )
+        yield lambda: runner.run(_PARAMS)
+
+
+@harness.benchmark("submit/run-many-100")
+def _run_many() -> Iterator[Callable[[], Any]]:
+    with tempfile.TemporaryDirectory() as tempdir, fake_vertex.fake_vertex_backend():
+        runner = pipeline_runner.PipelineRunner(
+            _run_config(_sample_pipeline_path(tempdir))
+        )
+        param_sets = [_PARAMS] * 100
+        yield lambda: runner.run_many(param_sets)
+
+
+@harness.benchmark("submit/run-batch-100")
+def _run_batch() -> Iterator[Callable[[], Any]]:
+    with tempfile.TemporaryDirectory() as tempdir, fake_vertex.fake_vertex_backend():
+        runner = pipeline_runner.PipelineRunner(
+            _run_config(_sample_pipeline_path(tempdir))
+        )
+        param_sets = [_PARAMS] * 100
+        yield lambda: runner.run_batch(param_sets)
+
+
+@harness.benchmark("submit/run-async-100")
+def _run_async() -> Iterator[Callable[[], Any]]:
+    with tempfile.TemporaryDirectory() as tempdir, fake_vertex.fake_vertex_backend():
+        runner = pipeline_runner.PipelineRunner(
+            _run_config(_sample_pipeline_path(tempdir))
+        )
+
+        async def run_all() -> None:
+            await asyncio.gather(*(runner.run_async(_PARAMS) for _ in range(100)))
+
+        yield lambda: asyncio.run(run_all())
@@ -0,0 +1,71 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of writing compiled specifications to local and cloud paths."""
+
+import itertools
+import json
+import pathlib
+import tempfile
+from typing import Any, Callable, cast, Iterator
+from unittest import mock
+
+import cloudpathlib as cpl
+from cloudpathlib import local as cpl_local
+
+from benchmarks import harness
+from pipelines import pipeline_compiler
+
+# Size of the synthetic specification, roughly that of a 200-task pipeline.
+_NUM_TASKS = 200
+
+
+def _synthetic_spec(version: int) -> str:
+    """Returns a JSON specification whose content depends on `version`."""
+    tasks = {
+        f"task-{i}": {"componentRef": {"name": "comp-step"}, "version": version}
+        for i in range(_NUM_TASKS)
+    }
+    return json.dumps({"pipelineSpec": {"root": {"dag": {"tasks": tasks}}}})
+
+
+@harness.benchmark("upload/local")
+def _local() -> Iterator[Callable[[], Any]]:
+    with tempfile.TemporaryDirectory() as tempdir:
+        # `AnyPath` creates either path type, but is not a base class of them.
+        package_path = cast(cpl.AnyPath, pathlib.Path(tempdir) / "pipeline.json")
+        spec = _synthetic_spec(0)
+        yield lambda: pipeline_compiler._write_pipeline_spec(spec, package_path)
+
+
+def _cloud_benchmark(changed: bool) -> Iterator[Callable[[], Any]]:
+    """Sets up writes to cloudpathlib's local stand-in for GCS."""
+    registry = {"gs": cpl_local.local_gs_implementation}
+    with mock.patch.dict(cpl.cloudpath.implementation_registry, registry):
+        package_path = cast(
+            cpl.AnyPath, cpl.CloudPath("gs://benchmark-bucket/pipeline.json")
+        )
+        specs = [_synthetic_spec(0), _synthetic_spec(1)]
+        spec_cycle = itertools.cycle(specs if changed else specs[:1])
+        yield lambda: pipeline_compiler._write_pipeline_spec(
+            next(spec_cycle), package_path
+        )
+
+
+harness.benchmark("upload/cloudpathlib-local/changed")(
+    lambda: _cloud_benchmark(changed=True)
+)
+harness.benchmark("upload/cloudpathlib-local/unchanged")(
+    lambda: _cloud_benchmark(changed=False)
+)
@@ -0,0 +1,117 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process stand-in for the Vertex AI Pipelines API."""
+
+import contextlib
+import threading
+from typing import Dict, Iterator, Optional
+from unittest import mock
+
+from google.auth import credentials as auth_credentials
+from google.cloud import aiplatform as vertex
+from google.cloud.aiplatform.utils import gcs_utils
+from google.cloud.aiplatform_v1.types import pipeline_job as gca_pipeline_job
+from google.cloud.aiplatform_v1.types import pipeline_service
+from google.cloud.aiplatform_v1.types import pipeline_state as gca_pipeline_state
+
+from pipelines import pipeline_runner
+
+PROJECT = "benchmark-project"
+
+
+class FakePipelineServiceClient:
+    """Stores created pipeline jobs in memory and completes them immediately."""
+
+    def __init__(self) -> None:
+        """Initializes the client with no jobs."""
+        self.jobs: Dict[str, gca_pipeline_job.PipelineJob] = {}
+        self._lock = threading.Lock()
+
+    def create_pipeline_job(
+        self,
+        parent: Optional[str] = None,
+        pipeline_job: Optional[gca_pipeline_job.PipelineJob] = None,
+        pipeline_job_id: Optional[str] = None,
+        request: Optional[pipeline_service.CreatePipelineJobRequest] = None,
+        **kwargs: object,
+    ) -> gca_pipeline_job.PipelineJob:
+        """Creates a job that has already succeeded."""
+        if request is not None:
+            parent = request.parent
+            pipeline_job = request.pipeline_job
+            pipeline_job_id = request.pipeline_job_id
+        job = gca_pipeline_job.PipelineJob(pipeline_job)
+        job.name = f"{parent}/pipelineJobs/{pipeline_job_id}"
+        job.state = gca_pipeline_state.PipelineState.PIPELINE_STATE_SUCCEEDED
+        with self._lock:
+            self.jobs[job.name] = job
+        return job
+
+    def get_pipeline_job(
+        self, name: str, **kwargs: object
+    ) -> gca_pipeline_job.PipelineJob:
+        """Returns a previously created job."""
+        with self._lock:
+            return self.jobs[name]
+
+
+class FakePipelineServiceAsyncClient:
+    """Asyncio counterpart of `FakePipelineServiceClient` sharing its jobs."""
+
+    def __init__(self, client: FakePipelineServiceClient) -> None:
+        """Initializes the client.
+
+        Args:
+            client: Synchronous fake whose jobs are created and returned.
+        """
+        self._client = client
+
+    async def create_pipeline_job(
+        self, **kwargs: object
+    ) -> gca_pipeline_job.PipelineJob:
+        """Creates a job that has already succeeded."""
+        return self._client.create_pipeline_job(**kwargs)  # type: ignore[arg-type]
+
+    async def get_pipeline_job(
+        self, name: str, **kwargs: object
+    ) -> gca_pipeline_job.PipelineJob:
+        """Returns a previously created job."""
+        return self._client.get_pipeline_job(name)
+
+
+@contextlib.contextmanager
+def fake_vertex_backend() -> Iterator[FakePipelineServiceClient]:
+    """Routes Vertex AI pipeline job requests to an in-process fake.
+
+    Yields:
+        The fake API client that receives all requests.
+    """
+    client = FakePipelineServiceClient()
+    credentials = auth_credentials.AnonymousCredentials()
+    # `vertex.PipelineJob.get` is still used to wait for jobs of sync runs.
+    with mock.patch.object(
+        vertex.PipelineJob, "_instantiate_client", return_value=client
+    ), mock.patch.object(
+        pipeline_runner.PipelineRunner, "_create_client", return_value=client
+    ), mock.patch(
+        "google.auth.default", return_value=(credentials, PROJECT)
+    ), mock.patch.object(
+        pipeline_runner.PipelineRunner,
+        "_create_async_client",
+        side_effect=lambda: FakePipelineServiceAsyncClient(client),
+    ), mock.patch.object(
+        gcs_utils, "create_gcs_bucket_for_pipeline_artifacts_if_it_does_not_exist"
+    ):
+        yield client
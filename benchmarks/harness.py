@@ -0,0 +1,179 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Minimal benchmark harness with machine-readable results."""
+
+import contextlib
+import dataclasses
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Rounds are repeated calls lasting at least this long.
+_MIN_ROUND_SECONDS = 0.05
+
+# Registered benchmarks, keyed by name.
+_BENCHMARKS: Dict[str, Callable[[], Iterator[Callable[[], Any]]]] = {}
+
+
+def benchmark(
+    name: str,
+) -> Callable[
+    [Callable[[], Iterator[Callable[[], Any]]]],
+    Callable[[], Iterator[Callable[[], Any]]],
+]:
+    """Registers a benchmark.
+
+    The decorated function is a generator that sets up its fixtures, yields
+    the callable to time once, and cleans up afterwards.
+
+    Args:
+        name: Unique benchmark name.
+
+    Returns:
+        Decorator that registers the benchmark setup function.
+    """
+
+    def decorator(
+        setup: Callable[[], Iterator[Callable[[], Any]]]
+    ) -> Callable[[], Iterator[Callable[[], Any]]]:
+        _BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+@dataclasses.dataclass
+class Result:
+    """Timings of a single benchmark.
+
+    Attributes:
+        name: Benchmark name.
+        rounds: Number of timed rounds.
+        min: Fastest round, in seconds per call.
+        mean: Mean seconds per call.
+        stdev: Standard deviation of call durations in seconds.
+    """
+
+    name: str
+    rounds: int
+    min: float
+    mean: float
+    stdev: float
+
+
+def run_benchmark(name: str, rounds: int = 5, warmup: int = 1) -> Result:
+    """Runs a registered benchmark and returns its timings.
+
+    Calls faster than `_MIN_ROUND_SECONDS` are repeated within each round,
+    so that timer resolution and noise do not dominate, and averaged.
+
+    Args:
+        name: Benchmark name.
+        rounds: Number of timed rounds.
+        warmup: Number of untimed calls made first.
+
+    Returns:
+        Benchmark timings per call.
+    """
+    durations = []
+    with contextlib.contextmanager(_BENCHMARKS[name])() as func:
+        start_time = time.perf_counter()
+        for _ in range(warmup):
+            func()
+        warmup_seconds = (time.perf_counter() - start_time) / max(warmup, 1)
+        number = max(1, int(_MIN_ROUND_SECONDS / max(warmup_seconds, 1e-9)))
+        for _ in range(rounds):
+            start_time = time.perf_counter()
+            for _ in range(number):
+                func()
+            durations.append((time.perf_counter() - start_time) / number)
+    return Result(
+        name=name,
+        rounds=rounds,
+        min=min(durations),
+        mean=statistics.mean(durations),
+        stdev=statistics.stdev(durations) if rounds > 1 else 0.0,
+    )
+
+
+def run_all(name_filter: Optional[str] = None, rounds: int = 5) -> List[Result]:
+    """Runs all registered benchmarks whose name contains `name_filter`."""
+    names = sorted(
+        name for name in _BENCHMARKS if not name_filter or name_filter in name
+    )
+    return [run_benchmark(name, rounds=rounds) for name in names]
+
+
+def to_json(results: List[Result]) -> Dict[str, Any]:
+    """Returns results with environment metadata as a JSON-serializable dict."""
+    return {
+        "metadata": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "benchmarks": {result.name: dataclasses.asdict(result) for result in results},
+    }
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Compares results against a baseline by their fastest call.
+
+    Args:
+        results: Current benchmark results.
+        baseline: Results previously written by `to_json`.
+        threshold: Maximum allowed ratio of current to baseline time.
+
+    Returns:
+        Names of benchmarks that regressed beyond `threshold`.
+    """
+    if baseline["metadata"] != to_json([])["metadata"]:
+        print(
+            "The baseline was recorded with a different Python or platform,"
+            " so timings may not be comparable."
+        )
+    regressions = []
+    for result in results:
+        baseline_result = baseline["benchmarks"].get(result.name)
+        if baseline_result is None:
+            print(f"{result.name:<45} {result.min * 1e3:10.3f} ms  (new)")
+            continue
+        ratio = result.min / baseline_result["min"]
+        status = "REGRESSED" if ratio > threshold else "ok"
+        print(
+            f"{result.name:<45} {result.min * 1e3:10.3f} ms"
+            f"  x{ratio:.2f} vs baseline  {status}"
+        )
+        if ratio > threshold:
+            regressions.append(result.name)
+    return regressions
+
+
+def save_json(results: List[Result], filepath: str) -> None:
+    """Writes results as returned by `to_json`, creating parent directories."""
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    with open(filepath, "w") as fp:
+        json.dump(to_json(results), fp, indent=2, sort_keys=True)
+
+
+def load_json(filepath: str) -> Dict[str, Any]:
+    """Reads results previously written by `to_json`."""
+    with open(filepath) as fp:
+        return json.load(fp)
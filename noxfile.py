@@ -25,7 +25,7 @@ from nox.sessions import Session
 nox.options.sessions = "lint", "tests", "mypy", "license_check"
 
 # Locations for linting
-locations = "src", "tests", "noxfile.py", "docs/conf.py"
+locations = "src", "tests", "benchmarks", "noxfile.py", "docs/conf.py"
 
 package = "pipelines"
 
@@ -152,6 +152,14 @@ def docs(session: Session) -> None:
     session.run("sphinx-build", "docs", "docs/_build")
 
 
+@nox.session(python=["3.10"])
+def benchmarks(session: Session) -> None:
+    """Runs benchmarks and fails on regressions against the saved baseline."""
+    session.run("poetry", "install", "--no-dev", external=True)
+    args = session.posargs or ["--output", "benchmark-results.json"]
+    session.run("python", "-m", "benchmarks", *args)
+
+
 @nox.session
 def license_check(session: Session) -> None:
     """Checks license headers in code/config files."""
@@ -0,0 +1,143 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local on-disk caches."""
+
+import dataclasses
+import os
+import pathlib
+import tempfile
+from typing import Optional, Union
+
+_CACHE_DIR_ENV_VAR = "PIPELINES_CACHE_DIR"
+
+DEFAULT_MAX_SIZE_BYTES = 256 * 1024 * 1024
+
+
+def get_cache_dir(name: str) -> pathlib.Path:
+    """Returns the local directory for a given cache.
+
+    Args:
+        name: Name of the cache, used as a subdirectory.
+
+    Returns:
+        `$PIPELINES_CACHE_DIR/<name>` if the environment variable is set,
+        otherwise `$XDG_CACHE_HOME/pipelines/<name>` (defaults to `~/.cache`).
+    """
+    root = os.environ.get(_CACHE_DIR_ENV_VAR)
+    if root is None:
+        xdg_cache_home = os.environ.get("XDG_CACHE_HOME", "~/.cache")
+        root = os.path.join(os.path.expanduser(xdg_cache_home), "pipelines")
+    return pathlib.Path(root) / name
+
+
+@dataclasses.dataclass
+class CacheStats:
+    """Cache usage counters.
+
+    Attributes:
+        hits: Number of lookups that found an entry.
+        misses: Number of lookups that did not find an entry.
+        evictions: Number of entries removed to stay within the size limit.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class DiskCache:
+    """Key-value store of bytes on local disk with size-based LRU eviction.
+
+    Entries are stored one file per key. Reads refresh an entry's modification
+    time, which is used as its last access time when evicting.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, pathlib.Path],
+        max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES,
+    ) -> None:
+        """Initializes the cache.
+
+        Args:
+            directory: Directory where cache entries are stored.
+            max_size_bytes: Maximum total size of cache entries.
+        """
+        self.directory = pathlib.Path(directory)
+        self.max_size_bytes = max_size_bytes
+        self.stats = CacheStats()
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self.directory / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the value stored under `key` or None if there is none."""
+        entry_path = self.get_path(key)
+        if entry_path is None:
+            return None
+        try:
+            return entry_path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def get_path(self, key: str) -> Optional[pathlib.Path]:
+        """Returns the file holding the value of `key` or None if there is none."""
+        entry_path = self._entry_path(key)
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return entry_path
+
+    def put(self, key: str, value: bytes) -> pathlib.Path:
+        """Stores `value` under `key`, evicting old entries if needed.
+
+        Args:
+            key: Cache key. Must be a valid file name.
+            value: Value to store.
+
+        Returns:
+            The file holding the value.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Writes to a temporary file first so readers never see partial entries.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(value)
+        entry_path = self._entry_path(key)
+        os.replace(temp_path, entry_path)
+        self._evict(keep=entry_path)
+        return entry_path
+
+    def _evict(self, keep: pathlib.Path) -> None:
+        """Removes least recently used entries other than `keep` until within limit."""
+        entries = []
+        for entry_path in self.directory.iterdir():
+            if entry_path.name.startswith(".") or entry_path == keep:
+                continue
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total_size = keep.stat().st_size + sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+            self.stats.evictions += 1
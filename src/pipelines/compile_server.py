@@ -0,0 +1,191 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long-lived server that compiles pipelines with KFP already imported.
+
+Importing KFP takes seconds, far longer than compiling a typical pipeline.
+The server imports it once and forks a worker process per request, so
+pipeline modules are imported afresh for each compilation and no module
+state is shared between requests.
+
+This module only imports the compiler in the server, so that clients start
+quickly.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+from typing import Any, Dict, Optional
+
+from pipelines import cache
+
+_SOCKET_ENV_VAR = "PIPELINES_COMPILE_SOCKET"
+
+
+class CompileServerError(RuntimeError):
+    """Raised when the server fails to compile a pipeline."""
+
+
+def get_socket_path() -> str:
+    """Returns the path of the compile server's Unix socket.
+
+    Returns:
+        `$PIPELINES_COMPILE_SOCKET` if the environment variable is set,
+        otherwise `compile.sock` in the `compile-server` cache directory.
+    """
+    socket_path = os.environ.get(_SOCKET_ENV_VAR)
+    if socket_path is None:
+        socket_path = str(cache.get_cache_dir("compile-server") / "compile.sock")
+    return socket_path
+
+
+def _handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Compiles a pipeline as requested, in a forked worker process."""
+    from pipelines import pipeline_compiler
+
+    os.chdir(request["cwd"])
+    try:
+        pipeline_compiler.compile(
+            request["module_name"],
+            request["function_name"],
+            request["package_path"],
+            use_cache=request["use_cache"],
+            image_registry=request.get("image_registry"),
+        )
+    except Exception as e:
+        logging.exception("Failed to compile %s.", request["module_name"])
+        return {"error": f"{type(e).__name__}: {e}"}
+    stats = pipeline_compiler.get_compile_cache().stats
+    return {"cache_hits": stats.hits, "cache_misses": stats.misses}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles a single compile request of one JSON line."""
+
+    def handle(self) -> None:
+        """Reads a request and writes the response."""
+        request = json.loads(self.rfile.readline())
+        response = _handle_request(request)
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class _ForkingUnixStreamServer(
+    socketserver.ForkingMixIn, socketserver.UnixStreamServer
+):
+    """Unix socket server that handles each request in a forked process."""
+
+
+def _is_listening(socket_path: str) -> bool:
+    """Returns True if a server accepts connections on the socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(socket_path: Optional[str] = None) -> None:
+    """Serves compile requests until interrupted.
+
+    SIGTERM is handled like Ctrl+C, so the socket is removed either way.
+
+    Args:
+        socket_path: Path of the Unix socket to listen on. Defaults to
+            `get_socket_path()`.
+
+    Raises:
+        RuntimeError: If another server is already listening on the socket.
+    """
+    socket_path = socket_path or get_socket_path()
+    # Imported before forking so that workers start with KFP loaded.
+    from pipelines import pipeline_compiler  # noqa: F401
+
+    if _is_listening(socket_path):
+        raise RuntimeError(f"A compile server is already listening on {socket_path}.")
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    with _ForkingUnixStreamServer(socket_path, _RequestHandler) as server:
+        os.chmod(socket_path, 0o600)
+        logging.info("Compile server listening on %s.", socket_path)
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def request_compile(
+    module_name: str,
+    function_name: str,
+    package_path: str,
+    use_cache: bool = True,
+    image_registry: Optional[str] = None,
+    socket_path: Optional[str] = None,
+    timeout: float = 600.0,
+) -> Optional[Dict[str, int]]:
+    """Compiles a pipeline in a running compile server.
+
+    The semantics are those of `pipeline_compiler.compile`. Relative paths
+    are resolved against the current directory of the caller.
+
+    Args:
+        module_name: Name of module in the `pipelines` package containing the
+            pipeline function.
+        function_name: Name of pipeline function.
+        package_path: Local or GCS output path of the JSON specification.
+        use_cache: If True, reuse a previously compiled specification.
+        image_registry: If set, use images with component packages
+            preinstalled from this registry.
+        socket_path: Path of the server's Unix socket. Defaults to
+            `get_socket_path()`.
+        timeout: Seconds to wait for the compilation.
+
+    Returns:
+        Compile cache hit and miss counts of the request, keyed by
+        `cache_hits` and `cache_misses`, or None if no server is running.
+
+    Raises:
+        CompileServerError: If the server failed to compile the pipeline.
+    """
+    request = {
+        "module_name": module_name,
+        "function_name": function_name,
+        "package_path": package_path,
+        "use_cache": use_cache,
+        "image_registry": image_registry,
+        "cwd": os.getcwd(),
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        try:
+            client.connect(socket_path or get_socket_path())
+        except OSError as e:
+            # Includes missing or stale sockets, timeouts, permission errors
+            # and paths too long for a Unix socket.
+            logging.debug("Compile server is not available: %s", e)
+            return None
+        client.sendall(json.dumps(request).encode() + b"\n")
+        with client.makefile("rb") as fp:
+            line = fp.readline()
+    if not line:
+        raise CompileServerError("The compile server closed the connection.")
+    response = json.loads(line)
+    if "error" in response:
+        raise CompileServerError(response["error"])
+    return response
@@ -0,0 +1,177 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Recompiles pipelines whenever their source files change."""
+
+import importlib
+import logging
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from pipelines import pipeline_compiler
+from pipelines import sources
+
+# Modification time and size of a module's source file, or None if missing.
+_FileState = Optional[Tuple[int, int]]
+
+
+def _get_file_state(module_name: str) -> _FileState:
+    """Returns the modification time and size of a module's source file."""
+    module_path = sources.get_module_path(module_name)
+    if module_path is None:
+        return None
+    try:
+        stat = module_path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CompileWatcher:
+    """Keeps compiled pipelines up to date with their sources.
+
+    Compilation happens in the current process, so KFP and unchanged modules
+    stay imported between compilations. When source files change, only the
+    pipelines that depend on them are recompiled, after reloading the changed
+    modules and the modules that import them.
+    """
+
+    def __init__(
+        self,
+        tasks: Sequence[pipeline_compiler.CompileTask],
+        use_cache: bool = True,
+        interval: float = 0.5,
+    ) -> None:
+        """Initializes the watcher.
+
+        Args:
+            tasks: Pipelines to keep compiled.
+            use_cache: If True, reuse previously compiled specifications.
+            interval: Seconds between checks for changed files.
+        """
+        self.tasks = list(tasks)
+        self.use_cache = use_cache
+        self.interval = interval
+        self._dependencies: Dict[str, List[str]] = {}
+        self._file_states: Dict[str, _FileState] = {}
+
+    def _update_dependencies(self) -> None:
+        """Finds the modules that each pipeline module depends on."""
+        # Every module a pipeline depends on is tracked with its own dependencies,
+        # so that modules importing a changed module can be reloaded too.
+        previous = self._dependencies
+        self._dependencies = {}
+        pending = [task.module_name for task in self.tasks]
+        while pending:
+            module_name = pending.pop()
+            if module_name in self._dependencies:
+                continue
+            try:
+                dependencies = sources.get_local_dependencies(module_name)
+            except (ModuleNotFoundError, SyntaxError):
+                # Keeps tracking the last known dependencies until fixed.
+                dependencies = previous.get(module_name, [module_name])
+            self._dependencies[module_name] = dependencies
+            pending.extend(dependencies)
+        self._file_states = {
+            module_name: _get_file_state(module_name)
+            for module_name in self._dependencies
+        }
+
+    def _get_changed_modules(self) -> Set[str]:
+        """Returns tracked modules whose source files changed since the last check."""
+        return {
+            module_name
+            for module_name, state in self._file_states.items()
+            if _get_file_state(module_name) != state
+        }
+
+    def _reload(self, changed: Set[str]) -> Set[str]:
+        """Reloads changed modules and the modules depending on them.
+
+        Args:
+            changed: Names of modules whose source changed.
+
+        Returns:
+            Names of all modules affected by the change.
+        """
+        affected = {
+            module_name
+            for module_name, dependencies in self._dependencies.items()
+            if changed.intersection(dependencies)
+        }
+        # Dependencies have fewer transitive dependencies than their dependents,
+        # so they are reloaded first.
+        for module_name in sorted(
+            affected, key=lambda name: len(self._dependencies[name])
+        ):
+            module = sys.modules.get(f"{sources.PACKAGE_NAME}.{module_name}")
+            if module is None:
+                continue
+            try:
+                importlib.reload(module)
+            except Exception:
+                # Removes the broken module, so that compiling it reports the error.
+                logging.exception("Failed to reload %s.", module_name)
+                del sys.modules[module.__name__]
+        return affected
+
+    def _compile(
+        self, tasks: Sequence[pipeline_compiler.CompileTask]
+    ) -> List[pipeline_compiler.CompileResult]:
+        return [
+            pipeline_compiler.compile_task(task, use_cache=self.use_cache)
+            for task in tasks
+        ]
+
+    def compile_all(self) -> List[pipeline_compiler.CompileResult]:
+        """Compiles all pipelines and starts tracking their source files.
+
+        Returns:
+            One result per pipeline.
+        """
+        self._update_dependencies()
+        return self._compile(self.tasks)
+
+    def poll(self) -> List[pipeline_compiler.CompileResult]:
+        """Recompiles the pipelines affected by source changes since the last check.
+
+        Returns:
+            One result per recompiled pipeline, or an empty list if no tracked
+            source file changed.
+        """
+        changed = self._get_changed_modules()
+        if not changed:
+            return []
+        logging.info("Changed modules: %s.", ", ".join(sorted(changed)))
+        # Imports may have changed, so dependencies are found again.
+        self._update_dependencies()
+        affected = self._reload(changed)
+        return self._compile(
+            [task for task in self.tasks if task.module_name in affected]
+        )
+
+    def watch(self) -> Iterator[List[pipeline_compiler.CompileResult]]:
+        """Compiles all pipelines, then recompiles them as their sources change.
+
+        Yields:
+            Results of the initial compilation, then of each recompilation.
+        """
+        yield self.compile_all()
+        while True:
+            time.sleep(self.interval)
+            results = self.poll()
+            if results:
+                yield results
@@ -0,0 +1,188 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Bakes the packages of lightweight Python components into their images.
+
+KFP runs `pip install` for a component's `packages_to_install` every time the
+component runs. This module finds the executors of a compiled pipeline that do
+so, generates one Dockerfile per distinct base image and package set, and
+rewrites the executors to use the prebuilt images without installing anything.
+"""
+
+import dataclasses
+import hashlib
+import json
+import pathlib
+import re
+import shlex
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pipelines import pipeline_spec
+
+# Matches the `pip install` of the command prefix KFP adds to components with
+# `packages_to_install`. The prefix then runs the original command as `"$0" "$@"`.
+_PIP_INSTALL_PATTERN = re.compile(
+    r'python3 -m pip install --quiet\s+--no-warn-script-location (.+?) && "\$0" "\$@"'
+)
+
+# Number of leading command arguments of the prefix: `sh`, `-c` and the script.
+_PREFIX_LENGTH = 3
+
+# Name of the image repository of baked images within a registry.
+_REPOSITORY = "components"
+
+
+@dataclasses.dataclass(frozen=True)
+class ComponentImage:
+    """An image with the packages of components preinstalled.
+
+    Attributes:
+        base_image: Image the components were defined with.
+        packages: Sorted pip requirement specifiers to install.
+    """
+
+    base_image: str
+    packages: Tuple[str, ...]
+
+    @property
+    def digest(self) -> str:
+        """Returns a short digest of the base image and packages."""
+        data = json.dumps([self.base_image, list(self.packages)]).encode()
+        return hashlib.sha256(data).hexdigest()[:16]
+
+    def get_tag(self, registry: str) -> str:
+        """Returns the tag of the image in a registry, e.g. `gcr.io/<project>`."""
+        return f"{registry.rstrip('/')}/{_REPOSITORY}:{self.digest}"
+
+    def get_dockerfile(self) -> str:
+        """Returns a Dockerfile that builds the image."""
+        packages = " ".join(shlex.quote(package) for package in self.packages)
+        return (
+            f"FROM {self.base_image}\n"
+            "RUN PIP_DISABLE_PIP_VERSION_CHECK=1 python3 -m pip install --quiet"
+            f" --no-cache-dir --no-warn-script-location {packages}\n"
+        )
+
+
+def _parse_container(container: Dict[str, Any]) -> Optional[ComponentImage]:
+    """Returns the image to bake for an executor container, if it installs any."""
+    command = container.get("command", [])
+    if len(command) <= _PREFIX_LENGTH or command[:2] != ["sh", "-c"]:
+        return None
+    match = _PIP_INSTALL_PATTERN.search(command[2])
+    if match is None:
+        return None
+    packages = shlex.split(match.group(1))
+    # Options such as extra index URLs are not baked.
+    if any(package.startswith("-") for package in packages):
+        return None
+    return ComponentImage(container["image"], tuple(sorted(packages)))
+
+
+def _iter_containers(template: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Returns the executor containers of a compiled pipeline, keyed by executor."""
+    executors = (
+        pipeline_spec.get_pipeline_spec(template)
+        .get("deploymentSpec", {})
+        .get("executors", {})
+    )
+    return [
+        (name, executor["container"])
+        for name, executor in sorted(executors.items())
+        if "container" in executor
+    ]
+
+
+def find_images(template: Dict[str, Any]) -> Dict[ComponentImage, List[str]]:
+    """Groups the executors of a compiled pipeline by the image to bake.
+
+    Args:
+        template: Parsed JSON file written by `pipeline_compiler.compile`.
+
+    Returns:
+        Names of the executors that install packages at run time, keyed by
+        the image that has their packages preinstalled.
+    """
+    images: Dict[ComponentImage, List[str]] = {}
+    for name, container in _iter_containers(template):
+        image = _parse_container(container)
+        if image is not None:
+            images.setdefault(image, []).append(name)
+    return images
+
+
+def write_dockerfiles(
+    template: Dict[str, Any],
+    output_dir: Union[str, pathlib.Path],
+    registry: str,
+) -> Dict[str, pathlib.Path]:
+    """Writes a Dockerfile for each image to bake for a compiled pipeline.
+
+    Args:
+        template: Parsed JSON file written by `pipeline_compiler.compile`.
+        output_dir: Directory in which a build context directory named after
+            the digest of each image is created.
+        registry: Registry to push the images to, e.g. `gcr.io/<project>`.
+
+    Returns:
+        Build context directories, keyed by image tag.
+    """
+    contexts = {}
+    for image in find_images(template):
+        context_dir = pathlib.Path(output_dir, image.digest)
+        context_dir.mkdir(parents=True, exist_ok=True)
+        (context_dir / "Dockerfile").write_text(image.get_dockerfile())
+        contexts[image.get_tag(registry)] = context_dir
+    return contexts
+
+
+def bake(template: Dict[str, Any], registry: str) -> int:
+    """Rewrites a compiled pipeline to use images with packages preinstalled.
+
+    The images must have been built from `write_dockerfiles` and pushed to
+    `registry` before the pipeline runs.
+
+    Args:
+        template: Parsed JSON file written by `pipeline_compiler.compile`.
+            It is modified in place.
+        registry: Registry the images were pushed to, e.g. `gcr.io/<project>`.
+
+    Returns:
+        Number of rewritten executors.
+    """
+    count = 0
+    for _, container in _iter_containers(template):
+        image = _parse_container(container)
+        if image is None:
+            continue
+        container["image"] = image.get_tag(registry)
+        container["command"] = container["command"][_PREFIX_LENGTH:]
+        count += 1
+    return count
+
+
+def bake_spec(spec: str, registry: str) -> str:
+    """Returns a JSON pipeline specification rewritten by `bake`.
+
+    Args:
+        spec: JSON pipeline specification.
+        registry: Registry the images were pushed to, e.g. `gcr.io/<project>`.
+
+    Returns:
+        The rewritten JSON pipeline specification.
+    """
+    template = json.loads(spec)
+    bake(template, registry)
+    return json.dumps(template, indent=2, sort_keys=True)
@@ -14,13 +14,21 @@
 
 """Command line interface."""
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Sequence, Tuple, TYPE_CHECKING
 
 import click
 
 from pipelines import __version__
-from pipelines import pipeline_compiler
-from pipelines import pipeline_runner
+from pipelines import profiling
+
+if TYPE_CHECKING:
+    from pipelines import job_index
+    from pipelines import pipeline_compiler
+    from pipelines import pipeline_registry
+
+# `pipeline_compiler` and `pipeline_runner` pull in KFP, the Vertex AI SDK and
+# cloudpathlib, which take seconds to import. They are imported inside the
+# commands that need them to keep `--help` and `--version` fast.
 
 
 def _parse_pipeline_args(pipeline_args: Dict[str, Any]) -> Dict[str, Any]:
@@ -30,25 +38,455 @@ def _parse_pipeline_args(pipeline_args: Dict[str, Any]) -> Dict[str, Any]:
     return params
 
 
+def _report_profile(profiler: profiling.Profiler, output_path: Optional[str]) -> None:
+    """Prints the time spent in each phase and writes requested profile files."""
+    profiling.disable()
+    click.echo(profiler.format_breakdown(), err=True)
+    if output_path is None:
+        return
+    if output_path.endswith(".json"):
+        profiler.write_chrome_trace(output_path)
+    else:
+        profiler.write_pstats(output_path)
+    click.echo(f"Profile written to {output_path}.", err=True)
+
+
+def _echo_compile_result(result: "pipeline_compiler.CompileResult") -> None:
+    """Prints the outcome of compiling a pipeline."""
+    task = result.task
+    name = f"{task.module_name}.{task.function_name}"
+    if result.ok:
+        cached = ", cached" if result.cached else ""
+        click.echo(
+            f"OK      {name} -> {task.package_path}" f" ({result.seconds:.2f}s{cached})"
+        )
+    else:
+        click.echo(f"FAILED  {name} ({result.seconds:.2f}s): {result.error}")
+
+
+def _echo_analysis(template: Dict[str, Any]) -> None:
+    """Prints the analysis of the task graph of a compiled pipeline."""
+    from pipelines import dag_analyzer
+
+    with profiling.span("compile.analyze"):
+        analysis = dag_analyzer.analyze(template)
+    click.echo(analysis.format_summary())
+
+
+def _watch_and_compile(
+    tasks: Sequence["pipeline_compiler.CompileTask"], use_cache: bool
+) -> None:
+    """Compiles pipelines, then recompiles them on changes until interrupted."""
+    from pipelines import compile_watcher
+
+    watcher = compile_watcher.CompileWatcher(tasks, use_cache=use_cache)
+    try:
+        for results in watcher.watch():
+            for result in results:
+                _echo_compile_result(result)
+            click.echo("Watching for changes. Press Ctrl+C to stop.")
+    except KeyboardInterrupt:
+        pass
+
+
 @click.version_option(version=__version__)
 @click.group()
-def cli() -> None:  # noqa: D103
-    pass
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print the time spent in each phase of the command.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False),
+    help=(
+        "Also write a profile to this file: a Chrome trace if it ends with"
+        " .json, otherwise cProfile statistics. Implies --profile."
+    ),
+)
+@click.pass_context
+def cli(ctx: click.Context, profile: bool, profile_output: Optional[str]) -> None:
+    """Compiles and runs Kubeflow pipelines in Vertex AI Pipelines."""
+    if profile or profile_output:
+        is_trace = profile_output is None or profile_output.endswith(".json")
+        profiler = profiling.enable(use_cprofile=not is_trace)
+        ctx.call_on_close(lambda: _report_profile(profiler, profile_output))
+
+
+def _compile_with_server(
+    module_name: str,
+    function_name: str,
+    output_path: str,
+    use_cache: bool,
+    image_registry: Optional[str],
+) -> bool:
+    """Compiles a pipeline in a compile server, returning False if none runs.
+
+    Args:
+        module_name: Path to Python module containing pipeline function.
+        function_name: Name of pipeline function.
+        output_path: Output file path.
+        use_cache: If True, use the compile cache.
+        image_registry: Registry of images with component packages preinstalled.
+
+    Returns:
+        True if a compile server compiled the pipeline.
+
+    Raises:
+        ClickException: If the compile server failed to compile the pipeline.
+    """
+    from pipelines import compile_server
+
+    with profiling.span("compile.server_request"):
+        try:
+            server_stats = compile_server.request_compile(
+                module_name,
+                function_name,
+                output_path,
+                use_cache=use_cache,
+                image_registry=image_registry,
+            )
+        except compile_server.CompileServerError as e:
+            raise click.ClickException(str(e)) from e
+    if server_stats is None:
+        return False
+    if use_cache:
+        click.echo(
+            f"Compile cache: {server_stats['cache_hits']} hit(s),"
+            f" {server_stats['cache_misses']} miss(es)."
+        )
+    return True
 
 
 @cli.command()
 @click.argument("module_name")
 @click.argument("function_name")
 @click.argument("output_path")
-def compile(module_name: str, function_name: str, output_path: str) -> None:
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always recompile instead of reusing a cached pipeline specification.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and recompile whenever the pipeline's sources change.",
+)
+@click.option(
+    "--analyze",
+    is_flag=True,
+    help="Print how parallel the compiled pipeline can run.",
+)
+@click.option(
+    "--image-registry",
+    default=None,
+    help=(
+        "Use images with component packages preinstalled from this registry,"
+        " as built from `build-images`."
+    ),
+)
+def compile(
+    module_name: str,
+    function_name: str,
+    output_path: str,
+    no_cache: bool,
+    watch: bool,
+    analyze: bool,
+    image_registry: Optional[str],
+) -> None:
     """Compiles a pipeline function into a pipeline specification.
 
     Args:
         module_name: Path to Python module containing pipeline function.
         function_name: Name of pipeline function.
         output_path: Output file path.
+        no_cache: If True, do not use the compile cache.
+        watch: If True, recompile on changes until interrupted.
+        analyze: If True, print an analysis of the compiled task graph.
+        image_registry: Registry of images with component packages preinstalled.
+
+    Raises:
+        UsageError: If both `watch` and `analyze` are True.
     """
-    pipeline_compiler.compile(module_name, function_name, output_path)
+    if watch and analyze:
+        raise click.UsageError("--analyze cannot be used with --watch.")
+    # A running compile server saves importing KFP in this process.
+    if not watch and _compile_with_server(
+        module_name, function_name, output_path, not no_cache, image_registry
+    ):
+        if analyze:
+            from pipelines import template_cache
+
+            _echo_analysis(template_cache.get_template_cache().load(output_path))
+        return
+
+    with profiling.span("cli.import"):
+        from pipelines import pipeline_compiler
+
+    if watch:
+        task = pipeline_compiler.CompileTask(
+            module_name, function_name, output_path, image_registry
+        )
+        _watch_and_compile([task], use_cache=not no_cache)
+        return
+    spec = pipeline_compiler.compile(
+        module_name,
+        function_name,
+        output_path,
+        use_cache=not no_cache,
+        image_registry=image_registry,
+    )
+    if not no_cache:
+        stats = pipeline_compiler.get_compile_cache().stats
+        click.echo(f"Compile cache: {stats.hits} hit(s), {stats.misses} miss(es).")
+    if analyze:
+        import json
+
+        _echo_analysis(json.loads(spec))
+
+
+@cli.command(name="compile-server")
+@click.option(
+    "--socket",
+    "socket_path",
+    default=None,
+    help=(
+        "Unix socket to listen on. Defaults to $PIPELINES_COMPILE_SOCKET or"
+        " `compile.sock` in the pipelines cache directory."
+    ),
+)
+def serve_compile(socket_path: Optional[str]) -> None:
+    """Serves `compile` requests with KFP kept loaded.
+
+    While the server is running, `compile` commands using the same socket send
+    their requests to it instead of importing KFP themselves. Each request is
+    compiled in a forked process, so changes to pipeline modules are picked
+    up. Restart the server after upgrading packages.
+    """  # noqa: DAR101,DAR401
+    from pipelines import compile_server
+
+    socket_path = socket_path or compile_server.get_socket_path()
+    click.echo(f"Serving compile requests on {socket_path}. Press Ctrl+C to stop.")
+    try:
+        compile_server.serve(socket_path)
+    except RuntimeError as e:
+        raise click.ClickException(str(e)) from e
+    except KeyboardInterrupt:
+        pass
+
+
+def _format_parameters(pipeline: "pipeline_registry.PipelineInfo") -> str:
+    """Returns the parameter list of a pipeline as in its signature."""
+    parameters = []
+    for parameter in pipeline.parameters:
+        text = parameter.name
+        if parameter.annotation is not None:
+            text += f": {parameter.annotation}"
+        if parameter.default is not None:
+            text += (
+                f" = {parameter.default}"
+                if parameter.annotation
+                else f"={parameter.default}"
+            )
+        parameters.append(text)
+    return ", ".join(parameters)
+
+
+@cli.command(name="list-pipelines")
+@click.option("--json", "as_json", is_flag=True, help="Print the pipelines as JSON.")
+@click.option("--no-cache", is_flag=True, help="Scan all modules, even if unchanged.")
+def list_pipelines(as_json: bool, no_cache: bool) -> None:
+    """Lists the pipelines in the `pipelines` package.
+
+    Modules are scanned for `kfp.dsl.pipeline` functions without being
+    imported. Each pipeline is printed with the module and function names to
+    pass to `compile`, its parameters and its source location.
+    """  # noqa: DAR101
+    import dataclasses
+    import json
+
+    from pipelines import pipeline_registry
+
+    pipelines = pipeline_registry.list_pipelines(use_cache=not no_cache)
+    if as_json:
+        click.echo(json.dumps([dataclasses.asdict(p) for p in pipelines], indent=2))
+        return
+    for pipeline in pipelines:
+        click.echo(
+            f"{pipeline.module_name} {pipeline.function_name}"
+            f"({_format_parameters(pipeline)})  {pipeline.path}:{pipeline.lineno}"
+        )
+        if pipeline.description:
+            click.echo(f"    {pipeline.description}")
+
+
+@cli.command()
+@click.argument("manifest_file")
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of worker processes. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always recompile instead of reusing cached pipeline specifications.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and recompile pipelines whenever their sources change.",
+)
+def compile_many(
+    manifest_file: str, workers: Optional[int], no_cache: bool, watch: bool
+) -> None:
+    """Compiles many pipelines in parallel.
+
+    MANIFEST_FILE is a YAML or JSON list of entries with `module-name`,
+    `function-name` and `output-path` keys, and optionally `image-registry`.
+    """  # noqa: DAR101,DAR401
+    with profiling.span("cli.import"):
+        from pipelines import pipeline_compiler
+
+    tasks = pipeline_compiler.load_manifest(manifest_file)
+    if watch:
+        _watch_and_compile(tasks, use_cache=not no_cache)
+        return
+    results = pipeline_compiler.compile_many(
+        tasks, max_workers=workers, use_cache=not no_cache
+    )
+    for result in results:
+        _echo_compile_result(result)
+    num_failed = sum(not result.ok for result in results)
+    click.echo(f"Compiled {len(results) - num_failed}/{len(results)} pipelines.")
+    if num_failed:
+        raise click.exceptions.Exit(1)
+
+
+def _parse_alias_option(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[str]:
+    """Validates an `--alias` option before anything is compiled."""
+    if value is None:
+        return None
+    from pipelines import spec_store
+
+    try:
+        return spec_store.check_alias(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e), ctx=ctx, param=param) from e
+
+
+@cli.command()
+@click.argument("module_name")
+@click.argument("function_name")
+@click.argument("root")
+@click.option(
+    "--alias",
+    default=None,
+    callback=_parse_alias_option,
+    help="Also point this alias to the specification.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always recompile instead of reusing a cached pipeline specification.",
+)
+@click.option(
+    "--image-registry",
+    default=None,
+    help="Use images with component packages preinstalled from this registry.",
+)
+def publish(
+    module_name: str,
+    function_name: str,
+    root: str,
+    alias: Optional[str],
+    no_cache: bool,
+    image_registry: Optional[str],
+) -> None:
+    """Compiles a pipeline into content-addressed storage under ROOT.
+
+    The specification is stored as ROOT/specs/<sha256>.json, and is not
+    uploaded again if an identical one is already stored. Set `pipeline-path`
+    of a run config whose `gcs-root-path` is ROOT to the printed
+    `sha256:<digest>`, or to `alias:<name>` with `--alias`.
+
+    Args:
+        module_name: Path to Python module containing pipeline function.
+        function_name: Name of pipeline function.
+        root: Local directory or GCS URI to store the specification under.
+        alias: Alias to point to the specification.
+        no_cache: If True, do not use the compile cache.
+        image_registry: Registry of images with component packages preinstalled.
+    """
+    with profiling.span("cli.import"):
+        from pipelines import pipeline_compiler
+
+    digest = pipeline_compiler.publish(
+        module_name,
+        function_name,
+        root,
+        alias=alias,
+        use_cache=not no_cache,
+        image_registry=image_registry,
+    )
+    click.echo(f"sha256:{digest}")
+
+
+@cli.command(name="build-images")
+@click.argument("module_name")
+@click.argument("function_name")
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option(
+    "--image-registry",
+    required=True,
+    help="Registry to push the images to, e.g. gcr.io/<project>.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Always recompile instead of reusing a cached pipeline specification.",
+)
+def build_images(
+    module_name: str,
+    function_name: str,
+    output_dir: str,
+    image_registry: str,
+    no_cache: bool,
+) -> None:
+    """Writes Dockerfiles of images with a pipeline's component packages.
+
+    One image is generated for each distinct base image and set of
+    `packages_to_install` of the pipeline's components, in a subdirectory of
+    OUTPUT_DIR. Build and push the images with the printed commands, then
+    compile the pipeline with the same `--image-registry` to use them.
+
+    Args:
+        module_name: Path to Python module containing pipeline function.
+        function_name: Name of pipeline function.
+        output_dir: Directory to write the Docker build contexts to.
+        image_registry: Registry to push the images to.
+        no_cache: If True, do not use the compile cache.
+    """
+    import json
+
+    with profiling.span("cli.import"):
+        from pipelines import component_images
+        from pipelines import pipeline_compiler
+
+    spec = pipeline_compiler.compile_spec(
+        module_name, function_name, use_cache=not no_cache
+    )
+    contexts = component_images.write_dockerfiles(
+        json.loads(spec), output_dir, image_registry
+    )
+    if not contexts:
+        click.echo("No components install packages at run time.")
+    for tag, context_dir in contexts.items():
+        click.echo(f"docker build -t {tag} {context_dir} && docker push {tag}")
 
 
 @cli.command()
@@ -62,14 +500,498 @@ def compile(module_name: str, function_name: str, output_path: str) -> None:
         " Example: `-p 'message=hello world'`"
     ),
 )
-def run(run_config_file: str, **pipeline_args: int) -> None:
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Submit the job even if an identical job would be reused.",
+)
+def run(run_config_file: str, force: bool, **pipeline_args: int) -> None:
     """Runs a Kubeflow pipeline in Vertex AI Pipelines.
 
+    RUN_CONFIG_FILE is used to specify the Pipelines job params. If it sets
+    `dedupe-window`, an identical job submitted within the window that is still
+    running or succeeded is reused instead of submitting a new one.
+    """  # noqa: DAR101
+    with profiling.span("cli.import"):
+        from pipelines import pipeline_runner
+
+    pipeline_params = _parse_pipeline_args(pipeline_args)
+    with profiling.span("cli.load_config"):
+        run_config = pipeline_runner.PipelineRunConfig.from_file(run_config_file)
+    pipeline_runner.run(run_config, pipeline_params, force=force)
+
+
+@cli.command()
+@click.argument("run_config_file")
+@click.argument("params_file")
+@click.option(
+    "-p",
+    "--param",
+    multiple=True,
+    help="Pipeline params shared by all jobs in key=value format.",
+)
+@click.option(
+    "--max-in-flight",
+    type=int,
+    default=8,
+    show_default=True,
+    help="Maximum number of concurrent job submissions.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Submit every job even if identical jobs would be reused.",
+)
+def run_sweep(
+    run_config_file: str,
+    params_file: str,
+    max_in_flight: int,
+    force: bool,
+    **pipeline_args: Tuple[str, ...],
+) -> None:
+    """Runs a Kubeflow pipeline once per parameter set.
+
     RUN_CONFIG_FILE is used to specify the Pipelines job params.
+    PARAMS_FILE is a YAML or JSON file with either a list of parameter sets or
+    a `grid` mapping parameter names to lists of values. All parameter sets
+    are checked against the pipeline's inputs before any job is submitted.
+    Submissions are rate limited, retried and deduplicated as configured in
+    RUN_CONFIG_FILE.
+    """  # noqa: DAR101,DAR401
+    with profiling.span("cli.import"):
+        from pipelines import pipeline_runner
+
+    shared_params = _parse_pipeline_args(pipeline_args)
+    param_sets = [
+        {**shared_params, **params}
+        for params in pipeline_runner.load_param_sets(params_file)
+    ]
+    with profiling.span("cli.load_config"):
+        run_config = pipeline_runner.PipelineRunConfig.from_file(run_config_file)
+    runner = pipeline_runner.PipelineRunner(run_config)
+    try:
+        requests = runner.create_job_requests(param_sets)
+    except (ValueError, TypeError) as e:
+        raise click.ClickException(str(e)) from e
+    results = runner.submit_job_requests(
+        requests, max_in_flight=max_in_flight, force=force
+    )
+    for result in results:
+        if result.ok:
+            click.echo(
+                f"{result.job_id}  (reused)" if result.deduplicated else result.job_id
+            )
+        else:
+            click.echo(f"FAILED  {result.job_id}: {result.error}")
+    num_failed = sum(not result.ok for result in results)
+    click.echo(f"Submitted {len(results) - num_failed}/{len(results)} jobs.")
+    latencies = pipeline_runner.summarize_latencies(results)
+    if latencies:
+        summary = " ".join(f"{name}={value:.2f}s" for name, value in latencies.items())
+        click.echo(f"Submission latency: {summary}")
+    stats = runner.stats
+    if stats.throttled or stats.retried:
+        click.echo(
+            f"Throttled {stats.throttled} and retried {stats.retried} submission(s)."
+        )
+    if stats.deduplicated:
+        click.echo(f"Reused {stats.deduplicated} identical job(s).")
+    if num_failed:
+        raise click.exceptions.Exit(1)
+
+
+@cli.command()
+@click.argument("job_ids", nargs=-1, required=True)
+@click.option("-l", "--location", required=True, help="GCP location of the jobs.")
+@click.option("--project", default=None, help="GCP project of the jobs.")
+@click.option(
+    "--fail-fast/--no-fail-fast",
+    default=True,
+    show_default=True,
+    help="Whether to stop as soon as any job fails.",
+)
+def watch(
+    job_ids: Tuple[str, ...], location: str, project: Optional[str], fail_fast: bool
+) -> None:
+    """Waits for Vertex AI Pipelines jobs to finish.
+
+    JOB_IDS are the IDs of the jobs to watch, e.g. as printed by `run-sweep`.
+
+    Args:
+        job_ids: IDs of the jobs to watch.
+        location: GCP location of the jobs.
+        project: GCP project of the jobs.
+        fail_fast: Whether to stop as soon as any job fails.
+
+    Raises:
+        ClickException: If a job is not found, or fails and `fail_fast` is
+            True.
+        Exit: If any job failed.
+    """
+    with profiling.span("cli.import"):
+        from pipelines import job_watcher
+
+    provider = job_watcher.VertexJobStateProvider(location, project=project)
+    try:
+        states = job_watcher.watch(job_ids, provider, fail_fast=fail_fast)
+    except (job_watcher.JobFailedError, job_watcher.JobNotFoundError) as e:
+        raise click.ClickException(str(e)) from e
+    for job_id in job_ids:
+        click.echo(f"{job_id}  {states[job_id]}")
+    if any(state in job_watcher.FAILED_STATES for state in states.values()):
+        raise click.exceptions.Exit(1)
+
+
+def _parse_time_option(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[float]:
+    """Converts a `--since` or `--until` option to seconds since the epoch."""
+    if value is None:
+        return None
+    from pipelines import job_index
+
+    try:
+        return job_index.parse_time(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e), ctx=ctx, param=param) from e
+
+
+def _format_job(record: "job_index.JobRecord") -> str:
+    """Returns a one-line summary of an indexed job."""
+    import datetime
+
+    submit_time = datetime.datetime.fromtimestamp(record.submit_time)
+    duration = "-" if record.duration is None else f"{record.duration:.0f}s"
+    state = (record.state or "UNKNOWN").replace("PIPELINE_STATE_", "")
+    return (
+        f"{record.job_id}  {submit_time:%Y-%m-%d %H:%M:%S}  {state:<10}"
+        f" {duration:>7}  {record.params_hash[:12]}"
+    )
+
+
+@cli.group()
+def jobs() -> None:
+    """Queries the local index of submitted pipeline jobs.
+
+    Every job submitted with `run`, `run-sweep` or the `pipeline_runner`
+    module is recorded locally, so these commands work offline.
+    """
+
+
+@jobs.command("list")
+@click.option("--pipeline", default=None, help="Display name of the pipeline.")
+@click.option(
+    "--params-hash",
+    default=None,
+    help="Hash of the pipeline parameters, or a prefix of at least 4 characters.",
+)
+@click.option(
+    "--since",
+    default=None,
+    callback=_parse_time_option,
+    help="Only jobs submitted since an ISO date or time, or e.g. 12h or 7d ago.",
+)
+@click.option(
+    "--until",
+    default=None,
+    callback=_parse_time_option,
+    help="Only jobs submitted before an ISO date or time, or e.g. 12h or 7d ago.",
+)
+@click.option(
+    "-n",
+    "--limit",
+    type=int,
+    default=50,
+    show_default=True,
+    help="Maximum number of jobs to list.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the jobs as JSON.")
+def list_jobs(
+    pipeline: Optional[str],
+    params_hash: Optional[str],
+    since: Optional[float],
+    until: Optional[float],
+    limit: int,
+    as_json: bool,
+) -> None:
+    """Lists submitted jobs, latest first.
+
+    Each job is printed with its submission time, last known state, duration
+    and parameter hash. Jobs submitted with the same parameters share a hash.
+
+    Args:
+        pipeline: Display name of the pipeline.
+        params_hash: Hash of the pipeline parameters, or a prefix of it.
+        since: Earliest submission time in seconds since the epoch.
+        until: Latest submission time in seconds since the epoch.
+        limit: Maximum number of jobs to list.
+        as_json: Whether to print the jobs as JSON.
+    """
+    import dataclasses
+    import json
+
+    from pipelines import job_index
+
+    records = job_index.get_job_index().query(
+        pipeline_name=pipeline,
+        params_hash=params_hash,
+        since=since,
+        until=until,
+        limit=limit,
+    )
+    if as_json:
+        click.echo(json.dumps([dataclasses.asdict(r) for r in records], indent=2))
+        return
+    for record in records:
+        click.echo(_format_job(record))
+
+
+@jobs.command("show")
+@click.argument("job_id")
+def show_job(job_id: str) -> None:
+    """Prints everything recorded about a submitted job as JSON."""  # noqa: DAR101
+    import dataclasses
+    import json
+
+    from pipelines import job_index
+
+    record = job_index.get_job_index().get(job_id)
+    if record is None:
+        raise click.ClickException(f"Job {job_id} is not in the job index.")
+    click.echo(json.dumps(dataclasses.asdict(record), indent=2))
+
+
+@jobs.command("refresh")
+@click.option("--pipeline", default=None, help="Display name of the pipeline.")
+@click.option(
+    "--since",
+    default=None,
+    callback=_parse_time_option,
+    help="Only jobs submitted since an ISO date or time, or e.g. 12h or 7d ago.",
+)
+@click.option(
+    "-l",
+    "--location",
+    default=None,
+    help="GCP location of jobs recorded without one.",
+)
+def refresh_jobs(
+    pipeline: Optional[str], since: Optional[float], location: Optional[str]
+) -> None:
+    """Fetches the current state of jobs that have not ended yet.
+
+    This is the only `jobs` command that calls the Vertex AI API. Jobs are
+    fetched in batches per project and location. Jobs recorded without a
+    location are skipped unless `--location` is given.
     """  # noqa: DAR101
+    with profiling.span("cli.import"):
+        import collections
+
+        from pipelines import job_index
+        from pipelines import job_watcher
+
+    index = job_index.get_job_index()
+    records = index.query(
+        pipeline_name=pipeline,
+        since=since,
+        exclude_states=job_watcher.TERMINAL_STATES,
+        limit=None,
+    )
+    groups = collections.defaultdict(list)
+    num_skipped = 0
+    for record in records:
+        job_location = record.location or location
+        if job_location is None:
+            num_skipped += 1
+            continue
+        groups[record.project, job_location].append(record.job_id)
+    if num_skipped:
+        click.echo(
+            f"Skipped {num_skipped} jobs recorded without a location;"
+            " pass --location to refresh them.",
+            err=True,
+        )
+    num_ended = 0
+    for (project, job_location), job_ids in groups.items():
+        provider = job_watcher.VertexJobStateProvider(job_location, project=project)
+        for job_id, job in provider.get_jobs(job_ids).items():
+            index.update_state(job_id, job.state.name, job_watcher.get_duration(job))
+            num_ended += job.state.name in job_watcher.TERMINAL_STATES
+    num_refreshed = len(records) - num_skipped
+    click.echo(f"Refreshed {num_refreshed} jobs, {num_ended} of which have ended.")
+
+
+def _get_job_details(
+    job_id: Optional[str],
+    location: Optional[str],
+    project: Optional[str],
+    job_details_path: Optional[str],
+) -> Dict[str, Any]:
+    """Returns the details of the job to report on, fetched or loaded."""
+    from pipelines import job_index
+    from pipelines import run_report
+
+    if job_id is None:
+        if job_details_path is None:
+            raise click.UsageError("Pass either JOB_ID or --job-details.")
+        return run_report.load_job_details(job_details_path)
+    if job_details_path is not None:
+        raise click.UsageError("Pass either JOB_ID or --job-details, not both.")
+    record = job_index.get_job_index().get(job_id)
+    if record is not None:
+        location = location or record.location
+        project = project or record.project
+    if location is None:
+        raise click.UsageError(f"Job {job_id} is not indexed, pass --location.")
+    return run_report.get_job_details(job_id, location, project=project)
+
+
+@cli.command()
+@click.argument("job_id", required=False)
+@click.option(
+    "-l",
+    "--location",
+    default=None,
+    help="GCP location of the job. Defaults to its location in the job index.",
+)
+@click.option("--project", default=None, help="GCP project of the job.")
+@click.option(
+    "--job-details",
+    "job_details_path",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Report on job details saved as JSON instead of fetching JOB_ID.",
+)
+@click.option(
+    "--pipeline-path",
+    default=None,
+    help="Compiled pipeline defining the task graph, if not the job's own.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON.")
+@click.option(
+    "--chrome-trace",
+    default=None,
+    help="Also write the task timings as a Chrome trace to this file.",
+)
+def report(
+    job_id: Optional[str],
+    location: Optional[str],
+    project: Optional[str],
+    job_details_path: Optional[str],
+    pipeline_path: Optional[str],
+    as_json: bool,
+    chrome_trace: Optional[str],
+) -> None:
+    """Reports where the time of a finished pipeline run went.
+
+    Prints the queueing and execution time of each task of JOB_ID, the
+    critical path through the task graph and the parallelism achieved.
+
+    Args:
+        job_id: ID of the job, which must have ended.
+        location: GCP location of the job.
+        project: GCP project of the job.
+        job_details_path: JSON file with the details of the job.
+        pipeline_path: Compiled pipeline defining the task graph.
+        as_json: Whether to print the report as JSON.
+        chrome_trace: Path of a Chrome trace to write.
+
+    Raises:
+        ClickException: If the job has no task details.
+    """
+    with profiling.span("cli.import"):
+        import json
+
+        from pipelines import run_report
+        from pipelines import template_cache
+
+    job_details = _get_job_details(job_id, location, project, job_details_path)
+    spec = None
+    if pipeline_path is not None:
+        local_path = template_cache.get_template_cache().get_local_path(pipeline_path)
+        with open(local_path) as fp:
+            spec = json.load(fp)
+    try:
+        run = run_report.create_report(job_details, spec)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    if as_json:
+        click.echo(json.dumps(run.to_dict(), indent=2))
+    else:
+        click.echo(run.format_breakdown())
+    if chrome_trace is not None:
+        run.write_chrome_trace(chrome_trace)
+
+
+@cli.command()
+@click.argument("run_config_file")
+@click.option(
+    "-p",
+    "--param",
+    multiple=True,
+    help="Pipeline-specific params in key=value format.",
+)
+@click.option(
+    "--pipeline-root",
+    default=None,
+    help=(
+        "Local directory under which task outputs are written."
+        " Defaults to `local-runs` in the pipelines cache directory."
+    ),
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=None,
+    help="Maximum number of tasks run in parallel. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Run all tasks, even if `enable-caching` is set in the run config.",
+)
+def run_local(
+    run_config_file: str,
+    pipeline_root: Optional[str],
+    workers: Optional[int],
+    no_cache: bool,
+    **pipeline_args: Tuple[str, ...],
+) -> None:
+    """Runs a compiled pipeline on this machine instead of Vertex AI.
+
+    RUN_CONFIG_FILE is the same file as for `run`. Its `pipeline-path` must
+    point to a compiled pipeline, and with `enable-caching` the outputs of
+    tasks whose component and inputs are unchanged since a previous local run
+    are reused. Only lightweight Python function components are supported,
+    and they run in the current Python environment.
+    """  # noqa: DAR101,DAR401
+    with profiling.span("cli.import"):
+        from pipelines import cache
+        from pipelines import local_runner
+        from pipelines import pipeline_runner
+
     pipeline_params = _parse_pipeline_args(pipeline_args)
-    run_config = pipeline_runner.PipelineRunConfig.from_file(run_config_file)
-    pipeline_runner.run(run_config, pipeline_params)
+    with profiling.span("cli.load_config"):
+        run_config = pipeline_runner.PipelineRunConfig.from_file(run_config_file)
+    result = local_runner.run_local(
+        run_config.get_template_uri(),
+        pipeline_params,
+        pipeline_root or str(cache.get_cache_dir("local-runs")),
+        max_workers=workers,
+        enable_caching=run_config.enable_caching and not no_cache,
+    )
+    for task in result.tasks:
+        line = f"{task.state:<10} {task.name}"
+        if task.state != local_runner.SKIPPED:
+            cached = ", cached" if task.cached else ""
+            line += f" ({task.seconds:.2f}s{cached})"
+        if task.error:
+            line += f": {task.error}"
+        click.echo(line)
+    click.echo(f"Outputs written to {result.run_dir}.")
+    if not result.ok:
+        raise click.exceptions.Exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Analyzes how parallel a compiled pipeline can run, without running it.
+
+Only the top-level DAG of the pipeline is analyzed. Conditions and loops
+count as the single task that runs their nested DAG.
+"""
+
+import dataclasses
+from typing import Any, Dict, List, Set, Tuple
+
+from pipelines import pipeline_spec
+
+
+@dataclasses.dataclass
+class DagAnalysis:
+    """Parallelism of the task graph of a pipeline.
+
+    Attributes:
+        task_count: Number of tasks.
+        depth: Number of tasks on the longest chain of dependent tasks.
+        max_width: Maximum number of tasks at the same depth, all of which may
+            run at once.
+        levels: Names of the tasks at each depth, starting with the tasks
+            without dependencies. Each task is at the earliest possible depth.
+        bottlenecks: Tasks that every other task either precedes or follows,
+            so that no task can run in parallel with them.
+        ordering_only_dependencies: `(upstream, downstream)` task names of
+            explicit dependencies, e.g. from `after`, through which no outputs
+            are passed and without which the two tasks could run in parallel.
+        redundant_dependencies: `(upstream, downstream)` task names of
+            dependencies already implied by other dependencies.
+    """
+
+    task_count: int
+    depth: int
+    max_width: int
+    levels: List[List[str]]
+    bottlenecks: List[str]
+    ordering_only_dependencies: List[Tuple[str, str]]
+    redundant_dependencies: List[Tuple[str, str]]
+
+    def format_summary(self) -> str:
+        """Returns a human-readable summary of the analysis."""
+        lines = [
+            f"Tasks: {self.task_count}, depth: {self.depth},"
+            f" max width: {self.max_width}"
+        ]
+        if self.bottlenecks:
+            lines.append(f"Serial bottlenecks: {', '.join(self.bottlenecks)}")
+        if self.ordering_only_dependencies:
+            lines.append("Dependencies without data flow that serialize tasks:")
+            lines += [f"  {u} -> {d}" for u, d in self.ordering_only_dependencies]
+        if self.redundant_dependencies:
+            lines.append("Redundant dependencies:")
+            lines += [f"  {u} -> {d}" for u, d in self.redundant_dependencies]
+        return "\n".join(lines)
+
+
+def _get_masks(
+    order: List[str], dependencies: Dict[str, Set[str]]
+) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]:
+    """Returns bitmasks of each task, of its ancestors and of its descendants."""
+    bits = {name: 1 << i for i, name in enumerate(order)}
+    ancestors: Dict[str, int] = {}
+    for name in order:
+        mask = 0
+        for upstream_name in dependencies[name]:
+            mask |= ancestors[upstream_name] | bits[upstream_name]
+        ancestors[name] = mask
+    descendants = dict.fromkeys(order, 0)
+    for name in reversed(order):
+        for upstream_name in dependencies[name]:
+            descendants[upstream_name] |= descendants[name] | bits[name]
+    return bits, ancestors, descendants
+
+
+def analyze(template: Dict[str, Any]) -> DagAnalysis:
+    """Analyzes the task graph of a compiled pipeline.
+
+    Sets of tasks are represented as integer bitmasks, so that the analysis
+    takes milliseconds even for thousands of tasks. A ValueError is raised,
+    as by `pipeline_spec.get_levels`, if the dependencies contain a cycle or
+    an unknown task.
+
+    Args:
+        template: Parsed JSON file written by `pipeline_compiler.compile`.
+
+    Returns:
+        The analysis.
+    """
+    dag = pipeline_spec.get_pipeline_spec(template).get("root", {}).get("dag", {})
+    dependencies = pipeline_spec.get_task_dependencies(dag)
+    data_dependencies = pipeline_spec.get_task_dependencies(dag, explicit=False)
+    levels = pipeline_spec.get_levels(dependencies)
+    order = [name for level in levels for name in level]
+    bits, ancestors, descendants = _get_masks(order, dependencies)
+
+    all_tasks = (1 << len(order)) - 1
+    bottlenecks = [
+        name
+        for name in order
+        if len(order) > 1
+        and ancestors[name] | descendants[name] | bits[name] == all_tasks
+    ]
+    ordering_only = []
+    redundant = []
+    for name in order:
+        implied = 0
+        for upstream_name in dependencies[name]:
+            implied |= ancestors[upstream_name]
+        for upstream_name in sorted(dependencies[name]):
+            if implied & bits[upstream_name]:
+                redundant.append((upstream_name, name))
+            elif upstream_name not in data_dependencies[name]:
+                ordering_only.append((upstream_name, name))
+    return DagAnalysis(
+        task_count=len(order),
+        depth=len(levels),
+        max_width=max(map(len, levels), default=0),
+        levels=levels,
+        bottlenecks=bottlenecks,
+        ordering_only_dependencies=ordering_only,
+        redundant_dependencies=redundant,
+    )
@@ -0,0 +1,318 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local index of submitted pipeline jobs.
+
+Every job submitted by `pipeline_runner` is recorded in a SQLite database in
+the pipelines cache directory, so past jobs can be queried offline by
+pipeline, parameters and submission time without listing them from Vertex.
+"""
+
+import dataclasses
+import datetime
+import hashlib
+import json
+import pathlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from pipelines import cache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    pipeline_name TEXT NOT NULL,
+    template_digest TEXT,
+    params_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    submit_time REAL NOT NULL,
+    location TEXT,
+    project TEXT,
+    state TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_pipeline ON jobs (pipeline_name, submit_time);
+CREATE INDEX IF NOT EXISTS jobs_by_params ON jobs (params_hash, submit_time);
+CREATE INDEX IF NOT EXISTS jobs_by_time ON jobs (submit_time);
+"""
+
+_COLUMNS = (
+    "job_id",
+    "pipeline_name",
+    "template_digest",
+    "params_hash",
+    "params",
+    "submit_time",
+    "location",
+    "project",
+    "state",
+    "duration",
+)
+
+_TIME_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)([smhdw]?)")
+
+_job_index: Optional["JobIndex"] = None
+
+
+@dataclasses.dataclass
+class JobRecord:
+    """A submitted pipeline job.
+
+    Attributes:
+        job_id: Vertex Pipelines job ID.
+        pipeline_name: Display name of the pipeline job.
+        template_digest: SHA-256 digest of the pipeline template, if known.
+        params_hash: Hash of the pipeline parameters, see `get_params_hash`.
+        params: Pipeline parameters.
+        submit_time: Submission time in seconds since the epoch.
+        location: GCP location of the job.
+        project: GCP project of the job.
+        state: Last known state of the job, e.g. `PIPELINE_STATE_SUCCEEDED`.
+        duration: Run time of the job in seconds, once it has ended.
+    """
+
+    job_id: str
+    pipeline_name: str
+    template_digest: Optional[str]
+    params_hash: str
+    params: Dict[str, Any]
+    submit_time: float
+    location: Optional[str] = None
+    project: Optional[str] = None
+    state: Optional[str] = None
+    duration: Optional[float] = None
+
+
+def parse_duration(value: Union[str, float]) -> float:
+    """Parses a duration such as `90s`, `30m`, `12h`, `7d` or `2w`.
+
+    Args:
+        value: Duration with a unit suffix, or a number of seconds.
+
+    Returns:
+        The duration in seconds.
+
+    Raises:
+        ValueError: If `value` is not a valid duration.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _DURATION_PATTERN.fullmatch(value.strip())
+    if match is None:
+        raise ValueError(f"Invalid duration {value!r}, expected e.g. 12h or 7d.")
+    return float(match.group(1)) * _TIME_UNITS[match.group(2) or "s"]
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """Parses an absolute or relative point in time.
+
+    Args:
+        value: An ISO 8601 date or date and time, e.g. `2022-06-30T12:00`, in
+            local time unless it has an offset, or a time before `now` such as
+            `90s`, `30m`, `12h`, `7d` or `2w`.
+        now: Current time in seconds since the epoch. Defaults to `time.time()`.
+
+    Returns:
+        The point in time in seconds since the epoch.
+
+    Raises:
+        ValueError: If `value` is not a valid time.
+    """
+    match = _DURATION_PATTERN.fullmatch(value.strip())
+    if match and match.group(2):
+        return (time.time() if now is None else now) - parse_duration(value)
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(
+            f"Invalid time {value!r}, expected an ISO date or e.g. 12h or 7d."
+        ) from None
+
+
+def get_params_hash(params: Dict[str, Any]) -> str:
+    """Returns a hash of pipeline parameters that ignores their order."""
+    encoded = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def get_file_digest(path: Union[str, pathlib.Path]) -> str:
+    """Returns the SHA-256 digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobIndex:
+    """SQLite database of submitted pipeline jobs.
+
+    The index may be used from several threads and processes at once. Lookups
+    by pipeline, parameter hash and submission time are served by indexes.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path]) -> None:
+        """Opens the index, creating it if needed.
+
+        Args:
+            path: Path of the database file.
+        """
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, timeout=30.0, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def add(self, records: Iterable[JobRecord]) -> None:
+        """Stores jobs, replacing any stored jobs with the same IDs."""
+        rows = [
+            tuple(
+                json.dumps(value, sort_keys=True, default=str)
+                if name == "params"
+                else value
+                for name, value in dataclasses.asdict(record).items()
+            )
+            for record in records
+        ]
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(_COLUMNS)})"  # noqa: S608
+                f" VALUES ({placeholders})",
+                rows,
+            )
+
+    def update_state(
+        self, job_id: str, state: str, duration: Optional[float] = None
+    ) -> None:
+        """Records the current state of a job and, once it ended, its duration.
+
+        Args:
+            job_id: Vertex Pipelines job ID.
+            state: State name, e.g. `PIPELINE_STATE_SUCCEEDED`.
+            duration: Run time of the job in seconds, if it has ended.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET state = ?, duration = COALESCE(?, duration)"
+                " WHERE job_id = ?",
+                (state, duration, job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """Returns the job with the given ID, or None if it is not indexed."""
+        records = self._select("job_id = ?", [job_id], limit=1)
+        return records[0] if records else None
+
+    def query(
+        self,
+        pipeline_name: Optional[str] = None,
+        params_hash: Optional[str] = None,
+        template_digest: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        exclude_states: Optional[Iterable[str]] = None,
+        include_states: Optional[Iterable[str]] = None,
+        limit: Optional[int] = 100,
+    ) -> List[JobRecord]:
+        """Returns indexed jobs matching all given criteria, latest first.
+
+        Args:
+            pipeline_name: Display name of the pipeline jobs.
+            params_hash: Parameter hash, or a prefix of at least 4 characters.
+            template_digest: Digest of the pipeline template.
+            since: Earliest submission time in seconds since the epoch.
+            until: Latest submission time in seconds since the epoch.
+            exclude_states: Skip jobs in any of these states. Jobs whose state
+                is not known are always returned.
+            include_states: Only return jobs in any of these states. Jobs whose
+                state is not known are always returned.
+            limit: Maximum number of jobs to return, or None for all.
+
+        Returns:
+            Matching jobs, ordered by descending submission time.
+        """
+        conditions = []
+        args: List[Any] = []
+        if pipeline_name is not None:
+            conditions.append("pipeline_name = ?")
+            args.append(pipeline_name)
+        if params_hash is not None:
+            # A range rather than LIKE, so that the index is used.
+            conditions.append("params_hash >= ? AND params_hash < ?")
+            args += [params_hash, params_hash + "g"]
+        if template_digest is not None:
+            conditions.append("template_digest = ?")
+            args.append(template_digest)
+        if since is not None:
+            conditions.append("submit_time >= ?")
+            args.append(since)
+        if until is not None:
+            conditions.append("submit_time < ?")
+            args.append(until)
+        if exclude_states is not None:
+            exclude_states = list(exclude_states)
+            placeholders = ", ".join("?" for _ in exclude_states)
+            conditions.append(f"(state IS NULL OR state NOT IN ({placeholders}))")
+            args += exclude_states
+        if include_states is not None:
+            include_states = list(include_states)
+            placeholders = ", ".join("?" for _ in include_states)
+            conditions.append(f"(state IS NULL OR state IN ({placeholders}))")
+            args += include_states
+        return self._select(" AND ".join(conditions) or "1", args, limit=limit)
+
+    def _select(
+        self, condition: str, args: List[Any], limit: Optional[int]
+    ) -> List[JobRecord]:
+        """Returns jobs matching an SQL condition, latest first."""
+        sql = (
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE {condition}"  # noqa: S608
+            " ORDER BY submit_time DESC"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            args = args + [limit]
+        with self._lock:
+            rows = self._connection.execute(sql, args).fetchall()
+        records = []
+        for row in rows:
+            values = dict(zip(_COLUMNS, row, strict=True))
+            values["params"] = json.loads(values["params"])
+            records.append(JobRecord(**values))
+        return records
+
+
+def get_job_index() -> JobIndex:
+    """Returns the index of jobs in the pipelines cache directory."""
+    global _job_index
+    path = cache.get_cache_dir("jobs") / "jobs.sqlite3"
+    if _job_index is None or _job_index.path != path:
+        _job_index = JobIndex(path)
+    return _job_index
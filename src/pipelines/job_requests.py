@@ -0,0 +1,285 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Builds many pipeline job requests from a template parsed once.
+
+`vertex.PipelineJob` reads, parses and validates the whole template for every
+job, and converts the pipeline spec into a protobuf message each time. A
+`JobTemplate` does this once. The `JobRequest` of each parameter set only
+holds its bound parameter values and refers to the shared template, which is
+copied into an API request message when the job is submitted.
+"""
+
+import copy
+import dataclasses
+import json
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from google.cloud.aiplatform import utils as aiplatform_utils
+from google.cloud.aiplatform_v1.types import pipeline_job as gca_pipeline_job
+from google.cloud.aiplatform_v1.types import pipeline_service
+from google.protobuf import json_format
+from google.protobuf import message
+
+from pipelines import pipeline_spec
+
+# Fields of `Value` messages of the deprecated `parameters` runtime config,
+# keyed by parameter type, with the Python types each accepts.
+_LEGACY_VALUE_FIELDS: Dict[str, Tuple[str, Tuple[type, ...]]] = {
+    "INT": ("int_value", (int,)),
+    "DOUBLE": ("double_value", (int, float)),
+    "STRING": ("string_value", (str,)),
+}
+
+# Python types accepted for each parameter type of newer pipeline specs.
+_VALUE_TYPES: Dict[str, Tuple[type, ...]] = {
+    "NUMBER_INTEGER": (int,),
+    "NUMBER_DOUBLE": (int, float),
+    "STRING": (str,),
+    "BOOLEAN": (bool,),
+    "LIST": (list,),
+    "STRUCT": (dict,),
+}
+
+# Conversions of string values, e.g. from the command line, to each parameter
+# type, as done by `vertex.PipelineJob`.
+_STRING_COERCIONS: Dict[str, Callable[[str], Any]] = {
+    "INT": int,
+    "DOUBLE": float,
+    "NUMBER_INTEGER": int,
+    "NUMBER_DOUBLE": float,
+    "BOOLEAN": json.loads,
+    "LIST": json.loads,
+    "STRUCT": json.loads,
+}
+
+
+def _parse_version(version: str) -> Tuple[int, ...]:
+    """Returns the numeric parts of a schema version, e.g. `(2, 1, 0)`."""
+    return tuple(int(part) for part in version.split("."))
+
+
+def _set_enable_caching(spec: Dict[str, Any], enable_caching: bool) -> None:
+    """Enables or disables caching of all tasks of a pipeline spec in place."""
+    components = [spec["root"], *spec.get("components", {}).values()]
+    for component in components:
+        for task in component.get("dag", {}).get("tasks", {}).values():
+            task["cachingOptions"] = {"enableCache": enable_caching}
+
+
+def _coerce(value: object, parameter_type: str) -> object:
+    """Returns a string value converted to the parameter type if possible."""
+    coerce = _STRING_COERCIONS.get(parameter_type)
+    if coerce is None or not isinstance(value, str):
+        return value
+    try:
+        return coerce(value)
+    except ValueError:
+        # Left as is, so that the type check reports the value.
+        return value
+
+
+def _check_type(name: str, value: object, expected: Tuple[type, ...]) -> None:
+    """Raises TypeError unless a parameter value has one of the expected types."""
+    # `bool` is a subclass of `int`, but not a valid number parameter.
+    if not isinstance(value, expected) or (
+        isinstance(value, bool) and bool not in expected
+    ):
+        raise TypeError(
+            f"Pipeline parameter {name} should be of type"
+            f" {' or '.join(t.__name__ for t in expected)}, got {value!r}."
+        )
+
+
+@dataclasses.dataclass
+class JobRequest:
+    """A pipeline job to submit, bound to a shared template.
+
+    Attributes:
+        job_id: Vertex Pipelines job ID.
+        pipeline_params: Kubeflow pipeline parameters of the job.
+        template: The template the job runs.
+        values: Parameter values bound to the template's input definitions.
+    """
+
+    job_id: str
+    pipeline_params: Dict[str, Any]
+    template: "JobTemplate"
+    values: Dict[str, Any]
+
+    def to_request(self, parent: str) -> pipeline_service.CreatePipelineJobRequest:
+        """Returns the API request that creates the job.
+
+        Args:
+            parent: Resource name of the location of the job, e.g.
+                `projects/<project>/locations/<location>`.
+
+        Returns:
+            Request with its own copy of the template's pipeline job.
+        """
+        request = pipeline_service.CreatePipelineJobRequest.pb()(
+            parent=parent, pipeline_job_id=self.job_id
+        )
+        request.pipeline_job.CopyFrom(self.template.resource)
+        self.template.set_values(request.pipeline_job.runtime_config, self.values)
+        return pipeline_service.CreatePipelineJobRequest.wrap(request)
+
+
+class JobTemplate:
+    """A pipeline template parsed and validated once for many jobs.
+
+    Attributes:
+        legacy: Whether the spec uses the deprecated `parameters` runtime
+            config, whose values are typed `Value` messages.
+        parameter_types: Type of each pipeline parameter, keyed by name.
+        required_parameters: Sorted names of parameters without defaults.
+        resource: Protobuf message of the pipeline job shared by all jobs,
+            without their parameter values. It must not be modified.
+    """
+
+    def __init__(
+        self,
+        template: Dict[str, Any],
+        display_name: str,
+        pipeline_root: str,
+        enable_caching: Optional[bool] = None,
+        service_account: Optional[str] = None,
+        encryption_spec_key_name: Optional[str] = None,
+    ) -> None:
+        """Initializes the template.
+
+        Args:
+            template: Parsed JSON file written by `pipeline_compiler.compile`.
+                It is not modified.
+            display_name: Display name of the jobs.
+            pipeline_root: GCS path to store data generated by the jobs.
+            enable_caching: If set, enable or disable caching of all tasks.
+            service_account: Service account to run the jobs as.
+            encryption_spec_key_name: Cloud KMS key to protect the jobs with.
+
+        Raises:
+            ValueError: If the template is not a valid pipeline template.
+        """
+        spec = pipeline_spec.get_pipeline_spec(template)
+        for key in ("schemaVersion", "pipelineInfo", "root"):
+            if key not in spec:
+                raise ValueError(f"Pipeline spec has no {key!r}.")
+        aiplatform_utils.validate_display_name(display_name)
+        self.legacy = _parse_version(spec["schemaVersion"]) <= (2, 0, 0)
+        definitions = spec["root"].get("inputDefinitions", {}).get("parameters", {})
+        # `type` is deprecated and replaced by `parameterType`.
+        self.parameter_types: Dict[str, str] = {
+            name: definition.get("parameterType") or definition.get("type")
+            for name, definition in definitions.items()
+        }
+        runtime_config = (
+            template.get("runtimeConfig", {}) if spec is not template else {}
+        )
+        defaults = runtime_config.get("parameterValues") or runtime_config.get(
+            "parameters", {}
+        )
+        self.required_parameters = sorted(
+            name
+            for name, definition in definitions.items()
+            if name not in defaults
+            and not definition.get("isOptional")
+            and "defaultValue" not in definition
+        )
+        if enable_caching is not None:
+            spec = copy.deepcopy(spec)
+            _set_enable_caching(spec, enable_caching)
+        # The spec is converted into a protobuf message only once.
+        resource = gca_pipeline_job.PipelineJob.pb()(display_name=display_name)
+        json_format.ParseDict(spec, resource.pipeline_spec)
+        json_format.ParseDict(runtime_config, resource.runtime_config)
+        resource.runtime_config.gcs_output_directory = pipeline_root
+        if service_account:
+            resource.service_account = service_account
+        if encryption_spec_key_name:
+            resource.encryption_spec.kms_key_name = encryption_spec_key_name
+        self.resource = resource
+
+    def bind(self, pipeline_params: Mapping[str, Any]) -> Dict[str, Any]:
+        """Checks parameter values against the template's input definitions.
+
+        Args:
+            pipeline_params: Kubeflow pipeline parameters. None values are
+                left out, so that the template's defaults apply.
+
+        Returns:
+            Values to set in the runtime config of a job.
+
+        Raises:
+            ValueError: If a parameter is unknown or a required one is missing.
+        """
+        values = {}
+        for name, value in pipeline_params.items():
+            if value is None:
+                continue
+            parameter_type = self.parameter_types.get(name)
+            if parameter_type is None:
+                raise ValueError(
+                    f"Pipeline parameter {name} is not found in the pipeline"
+                    " job input definitions."
+                )
+            value = _coerce(value, parameter_type)
+            if self.legacy:
+                # Values of other types are passed as JSON strings.
+                if isinstance(value, (dict, list, bool)):
+                    value = json.dumps(value)
+                expected = _LEGACY_VALUE_FIELDS[parameter_type][1]
+            else:
+                expected = _VALUE_TYPES.get(parameter_type, (object,))
+            _check_type(name, value, expected)
+            values[name] = value
+        missing = [name for name in self.required_parameters if name not in values]
+        if missing:
+            raise ValueError(f"Missing required pipeline parameters {missing}.")
+        return values
+
+    def set_values(
+        self,
+        runtime_config: message.Message,
+        values: Mapping[str, Any],
+    ) -> None:
+        """Sets bound parameter values in the runtime config message of a job.
+
+        Args:
+            runtime_config: Protobuf message of the runtime config, as in
+                `JobTemplate.resource.runtime_config`.
+            values: Values returned by `bind`.
+        """
+        for name, value in values.items():
+            if self.legacy:
+                field = _LEGACY_VALUE_FIELDS[self.parameter_types[name]][0]
+                setattr(runtime_config.parameters[name], field, value)
+            else:
+                json_format.ParseDict(value, runtime_config.parameter_values[name])
+
+    def create_requests(
+        self, job_ids: List[str], param_sets: List[Dict[str, Any]]
+    ) -> List[JobRequest]:
+        """Binds many parameter sets to the template.
+
+        Args:
+            job_ids: Vertex Pipelines job ID of each job.
+            param_sets: Kubeflow pipeline parameters of each job.
+
+        Returns:
+            One request per parameter set, sharing this template.
+        """
+        return [
+            JobRequest(job_id, params, self, self.bind(params))
+            for job_id, params in zip(job_ids, param_sets, strict=True)
+        ]
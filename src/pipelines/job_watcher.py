@@ -0,0 +1,230 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Monitors many Vertex Pipelines jobs from a single event loop."""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Protocol, Sequence
+
+from google.cloud import aiplatform as vertex
+from google.cloud.aiplatform_v1.types import pipeline_job as gca_pipeline_job
+
+ACTIVE_STATES = frozenset(
+    {
+        "PIPELINE_STATE_QUEUED",
+        "PIPELINE_STATE_PENDING",
+        "PIPELINE_STATE_RUNNING",
+        "PIPELINE_STATE_PAUSED",
+    }
+)
+
+SUCCEEDED_STATES = frozenset({"PIPELINE_STATE_SUCCEEDED"})
+
+FAILED_STATES = frozenset({"PIPELINE_STATE_FAILED", "PIPELINE_STATE_CANCELLED"})
+
+TERMINAL_STATES = SUCCEEDED_STATES | FAILED_STATES
+
+
+def get_duration(job: gca_pipeline_job.PipelineJob) -> Optional[float]:
+    """Returns the run time of a job in seconds, or None if it has not ended."""
+    if not job.start_time or not job.end_time:
+        return None
+    return (job.end_time - job.start_time).total_seconds()
+
+
+class JobFailedError(RuntimeError):
+    """Raised when a watched job ends in a failed state."""
+
+    def __init__(self, job_id: str, state: str) -> None:
+        """Initializes the error.
+
+        Args:
+            job_id: Vertex Pipelines job ID.
+            state: Final state of the job.
+        """
+        super().__init__(job_id, state)
+        self.job_id = job_id
+        self.state = state
+
+    def __str__(self) -> str:
+        """Returns the error message."""
+        return f"Job {self.job_id} ended with state {self.state}."
+
+
+class JobNotFoundError(LookupError):
+    """Raised when watched jobs cannot be found."""
+
+    def __init__(self, job_ids: Sequence[str]) -> None:
+        """Initializes the error.
+
+        Args:
+            job_ids: Vertex Pipelines job IDs that were not found.
+        """
+        super().__init__(job_ids)
+        self.job_ids = list(job_ids)
+
+    def __str__(self) -> str:
+        """Returns the error message."""
+        return f"Jobs not found: {', '.join(self.job_ids)}."
+
+
+class JobStateProvider(Protocol):
+    """Fetches the current state of pipeline jobs."""
+
+    def get_states(self, job_ids: Sequence[str]) -> Dict[str, str]:
+        """Returns the state names of the given jobs, keyed by job ID.
+
+        Jobs that cannot be found may be omitted from the result.
+        """  # noqa: DAR101,DAR201
+
+
+class VertexJobStateProvider:
+    """Fetches job states from Vertex AI Pipelines in batched list requests."""
+
+    def __init__(
+        self, location: str, project: Optional[str] = None, batch_size: int = 50
+    ) -> None:
+        """Initializes the provider.
+
+        Args:
+            location: GCP location of the jobs, e.g. us-central1.
+            project: GCP project of the jobs. Defaults to the environment's.
+            batch_size: Maximum number of jobs to fetch per list request.
+        """
+        self.location = location
+        self.project = project
+        self.batch_size = batch_size
+
+    def get_states(self, job_ids: Sequence[str]) -> Dict[str, str]:
+        """Returns the state names of the given jobs, keyed by job ID."""
+        return {
+            job_id: job.state.name for job_id, job in self.get_jobs(job_ids).items()
+        }
+
+    def get_jobs(
+        self, job_ids: Sequence[str]
+    ) -> Dict[str, gca_pipeline_job.PipelineJob]:
+        """Returns the API resources of the given jobs, keyed by job ID."""
+        jobs = {}
+        for start in range(0, len(job_ids), self.batch_size):
+            batch = job_ids[start : start + self.batch_size]
+            job_filter = " OR ".join(
+                f"pipeline_job_user_id={job_id!r}" for job_id in batch
+            )
+            for job in vertex.PipelineJob.list(
+                filter=job_filter, project=self.project, location=self.location
+            ):
+                jobs[job.name] = job.gca_resource
+        return jobs
+
+
+async def watch_async(
+    job_ids: Iterable[str],
+    provider: JobStateProvider,
+    fail_fast: bool = True,
+    initial_interval: float = 5.0,
+    max_interval: float = 60.0,
+    multiplier: float = 2.0,
+    max_missing_polls: int = 3,
+) -> Dict[str, str]:
+    """Polls the states of many jobs until all of them are terminal.
+
+    All jobs still running are fetched together in each poll. The polling
+    interval grows by `multiplier` while no job changes state, and is reset
+    to `initial_interval` whenever one does. Newly created jobs may be
+    missing from the first polls, so a job only counts as not found once it
+    is missing from `max_missing_polls` consecutive polls.
+
+    Args:
+        job_ids: Vertex Pipelines job IDs.
+        provider: Source of job states.
+        fail_fast: If True, stop as soon as any job fails.
+        initial_interval: Initial seconds between polls.
+        max_interval: Maximum seconds between polls.
+        multiplier: Factor by which the interval grows while nothing changes.
+        max_missing_polls: Number of consecutive polls a job may be missing
+            from before it counts as not found.
+
+    Returns:
+        Final state name of each job, keyed by job ID.
+
+    Raises:
+        JobFailedError: If `fail_fast` is True and a job fails.
+        JobNotFoundError: If any job is not found.
+    """
+    loop = asyncio.get_running_loop()
+    pending = set(job_ids)
+    states: Dict[str, str] = {}
+    missing_polls = dict.fromkeys(pending, 0)
+    interval = initial_interval
+    while pending:
+        fetched = await loop.run_in_executor(None, provider.get_states, sorted(pending))
+        for job_id in pending:
+            missing_polls[job_id] = (
+                0 if job_id in fetched else missing_polls[job_id] + 1
+            )
+        not_found = sorted(
+            job_id for job_id in pending if missing_polls[job_id] >= max_missing_polls
+        )
+        if not_found:
+            raise JobNotFoundError(not_found)
+        changed = False
+        for job_id, state in fetched.items():
+            if states.get(job_id) != state:
+                logging.info("Job %s is %s.", job_id, state)
+                changed = True
+            states[job_id] = state
+            if state in TERMINAL_STATES:
+                pending.discard(job_id)
+            if fail_fast and state in FAILED_STATES:
+                raise JobFailedError(job_id, state)
+        if not pending:
+            break
+        interval = (
+            initial_interval if changed else min(interval * multiplier, max_interval)
+        )
+        await asyncio.sleep(interval)
+    return states
+
+
+def watch(
+    job_ids: Iterable[str],
+    provider: JobStateProvider,
+    fail_fast: bool = True,
+    max_missing_polls: int = 3,
+    **kwargs: float,
+) -> Dict[str, str]:
+    """Blocks until all jobs are terminal.
+
+    Args:
+        job_ids: Vertex Pipelines job IDs.
+        provider: Source of job states.
+        fail_fast: If True, stop as soon as any job fails.
+        max_missing_polls: Number of consecutive polls a job may be missing
+            from before it counts as not found.
+        **kwargs: Polling interval options passed to `watch_async`.
+
+    Returns:
+        Final state name of each job, keyed by job ID.
+    """
+    return asyncio.run(
+        watch_async(
+            job_ids,
+            provider,
+            fail_fast=fail_fast,
+            max_missing_polls=max_missing_polls,
+            **kwargs,
+        )
+    )
@@ -0,0 +1,609 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs compiled pipelines on the local machine instead of Vertex AI Pipelines.
+
+Only lightweight Python function components, i.e. those created with
+`@dsl.component`, are supported. Their source is taken from the compiled
+specification and executed in a pool of worker processes, using the
+Python environment of this process rather than the component's image.
+Packages listed in `packages_to_install` are not installed.
+"""
+
+from concurrent import futures
+import contextlib
+import dataclasses
+from importlib import metadata
+from importlib import util as importlib_util
+import json
+import logging
+import os
+import pathlib
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from kfp.v2.components import executor as kfp_executor
+from kfp.v2.components.types import artifact_types
+
+from pipelines import pipeline_spec
+from pipelines import profiling
+from pipelines import step_cache
+from pipelines import template_cache
+from pipelines import utils
+
+SUCCEEDED = "SUCCEEDED"
+
+FAILED = "FAILED"
+
+SKIPPED = "SKIPPED"
+
+# Marks the executor command of lightweight Python function components.
+_EXECUTOR_MAIN_MODULE = "kfp.v2.components.executor_main"
+
+# Schema of the pipeline specs compiled by KFP 1.8, whose executor takes
+# parameters typed by `type`. Newer specs use `parameterType` instead.
+_SCHEMA_VERSION = "2.0.0"
+
+# KFP release pinned in pyproject.toml. KFP has no public way to give
+# artifacts local paths, so `_init_worker` patches how this release resolves
+# them.
+_KFP_VERSION = "1.8.13"
+
+
+@dataclasses.dataclass
+class TaskResult:
+    """Outcome of a single task of a local pipeline run.
+
+    Attributes:
+        name: Task name.
+        state: One of `SUCCEEDED`, `FAILED` or `SKIPPED`.
+        seconds: Time spent executing the task.
+        parameters: Output parameter values, keyed by output name.
+        artifacts: Output artifact URIs, keyed by output name.
+        error: Error message if the task failed, otherwise None.
+        cached: True if the outputs were reused from a previous run.
+    """
+
+    name: str
+    state: str
+    seconds: float = 0.0
+    parameters: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    artifacts: Dict[str, str] = dataclasses.field(default_factory=dict)
+    error: Optional[str] = None
+    cached: bool = False
+
+
+@dataclasses.dataclass
+class LocalRunResult:
+    """Outcome of a local pipeline run.
+
+    Attributes:
+        run_id: Unique ID of the run.
+        run_dir: Directory holding the outputs of all tasks.
+        tasks: Result of each task, in dependency order.
+    """
+
+    run_id: str
+    run_dir: str
+    tasks: List[TaskResult]
+
+    @property
+    def ok(self) -> bool:
+        """True if all tasks succeeded."""
+        return all(task.state == SUCCEEDED for task in self.tasks)
+
+
+@dataclasses.dataclass
+class _Task:
+    """A task of the pipeline DAG with the component it runs."""
+
+    name: str
+    spec: Dict[str, Any]
+    component: Dict[str, Any]
+    container: Dict[str, Any]
+    source: str
+    function_name: str
+
+
+def _get_function_source(name: str, container: Dict[str, Any]) -> Tuple[str, str]:
+    """Returns the source and function name of a lightweight component."""
+    command = container.get("command", [])
+    args = container.get("args", [])
+    main_index = next(
+        (i for i, arg in enumerate(command) if _EXECUTOR_MAIN_MODULE in arg), None
+    )
+    if main_index is None or main_index + 1 >= len(command):
+        raise ValueError(
+            f"Task {name} is not a lightweight Python component and cannot be"
+            " run locally."
+        )
+    function_name = args[args.index("--function_to_execute") + 1]
+    return command[main_index + 1], function_name
+
+
+def _get_tasks(spec: Dict[str, Any]) -> Dict[str, _Task]:
+    """Returns the tasks of the pipeline root DAG, checking they can run locally."""
+    executors = spec.get("deploymentSpec", {}).get("executors", {})
+    tasks = {}
+    for name, task_spec in spec["root"]["dag"].get("tasks", {}).items():
+        if "triggerPolicy" in task_spec or "iterator" in task_spec:
+            raise ValueError(
+                f"Task {name} is conditional or a loop, which cannot be run locally."
+            )
+        component = spec["components"][task_spec["componentRef"]["name"]]
+        if "dag" in component:
+            raise ValueError(
+                f"Task {name} is a nested pipeline, which cannot be run locally."
+            )
+        executor = executors.get(component.get("executorLabel"), {})
+        if "container" not in executor:
+            raise ValueError(f"Task {name} has no container and cannot be run locally.")
+        source, function_name = _get_function_source(name, executor["container"])
+        tasks[name] = _Task(
+            name, task_spec, component, executor["container"], source, function_name
+        )
+    return tasks
+
+
+def _to_value(
+    value: Union[str, int, float, bool, list, dict], parameter_type: str
+) -> Dict[str, Any]:
+    """Returns a parameter value in the form expected by the KFP executor."""
+    if isinstance(value, (list, dict)):
+        return {"stringValue": json.dumps(value)}
+    if parameter_type == "INT":
+        return {"intValue": int(value)}
+    if parameter_type == "DOUBLE":
+        return {"doubleValue": float(value)}
+    if not isinstance(value, str):
+        value = json.dumps(value)
+    return {"stringValue": value}
+
+
+def _from_value(value: Dict[str, Any]) -> Union[str, int, float, None]:
+    """Returns the Python value of a parameter value in executor form."""
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    return value.get("stringValue")
+
+
+def _get_pipeline_inputs(
+    template: Dict[str, Any], pipeline_params: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """Returns pipeline parameter values in executor form, including defaults."""
+    spec = pipeline_spec.get_pipeline_spec(template)
+    definitions = spec["root"].get("inputDefinitions", {}).get("parameters", {})
+    defaults = template.get("runtimeConfig", {}).get("parameters", {})
+    unknown = pipeline_params.keys() - definitions.keys()
+    if unknown:
+        raise ValueError(f"Unknown pipeline parameters {sorted(unknown)}.")
+    values = {}
+    for name, definition in definitions.items():
+        if name in pipeline_params:
+            values[name] = _to_value(pipeline_params[name], definition["type"])
+        elif name in defaults:
+            values[name] = defaults[name]
+        else:
+            raise ValueError(f"Missing value for pipeline parameter {name}.")
+    return values
+
+
+def _check_support(spec: Dict[str, Any]) -> None:
+    """Raises an error unless a pipeline spec and the installed KFP are supported."""
+    kfp_version = metadata.version("kfp")
+    if kfp_version != _KFP_VERSION or not hasattr(artifact_types.Artifact, "_get_path"):
+        raise RuntimeError(
+            f"Local runs need kfp {_KFP_VERSION}, but {kfp_version} is installed."
+        )
+    schema_version = spec.get("schemaVersion")
+    if schema_version != _SCHEMA_VERSION:
+        raise ValueError(
+            f"Pipeline spec schema version {schema_version} cannot be run locally."
+            f" Only {_SCHEMA_VERSION} specs, as compiled by kfp {_KFP_VERSION},"
+            " are supported."
+        )
+
+
+def _get_local_artifact_path(artifact: artifact_types.Artifact) -> Optional[str]:
+    """Returns local artifact URIs as their path, unlike KFP which needs a mount."""
+    if os.path.isabs(artifact.uri):
+        return artifact.uri
+    return _kfp_get_artifact_path(artifact)
+
+
+_kfp_get_artifact_path = artifact_types.Artifact._get_path
+
+
+def _init_worker() -> None:
+    """Lets components in this worker process read and write local artifacts.
+
+    Only called once `_check_support` passed for the installed KFP.
+    """
+    artifact_types.Artifact._get_path = _get_local_artifact_path
+
+
+def _execute_task(
+    task_dir: str,
+    source: str,
+    function_name: str,
+    executor_input: Dict[str, Any],
+    cache_key: Optional[str],
+) -> float:
+    """Executes a component function in a worker process.
+
+    Output of the component is written to `stdout.log` in `task_dir`.
+
+    Args:
+        task_dir: Directory of the task outputs.
+        source: Source code of the component module.
+        function_name: Name of the component function.
+        executor_input: KFP executor input of the task.
+        cache_key: Step cache key to store the task outputs under, or None to
+            not cache them.
+
+    Returns:
+        Seconds spent executing the component.
+
+    Raises:
+        Exception: Any error raised by the component, after its traceback is
+            written to the log.
+    """
+    start_time = time.perf_counter()
+    module_path = os.path.join(task_dir, "component.py")
+    with open(module_path, "w") as fp:
+        fp.write(source)
+    with open(
+        os.path.join(task_dir, "stdout.log"), "w"
+    ) as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            module_spec = importlib_util.spec_from_file_location(
+                f"component_{os.path.basename(task_dir)}", module_path
+            )
+            module = importlib_util.module_from_spec(module_spec)  # type: ignore[arg-type]
+            module_spec.loader.exec_module(module)  # type: ignore[union-attr]
+            kfp_executor.Executor(
+                executor_input=executor_input,
+                function_to_execute=getattr(module, function_name),
+            ).execute()
+        except Exception:
+            traceback.print_exc()
+            raise
+    if cache_key is not None:
+        step_cache.get_step_cache().put(cache_key, step_cache.pack(task_dir))
+    return time.perf_counter() - start_time
+
+
+class LocalRunner:
+    """Runs the tasks of a compiled pipeline in local worker processes."""
+
+    def __init__(
+        self,
+        pipeline_path: str,
+        pipeline_root: str,
+        max_workers: Optional[int] = None,
+        enable_caching: Optional[bool] = None,
+    ) -> None:
+        """Initializes the runner.
+
+        A ValueError is raised if the pipeline cannot be run locally, and a
+        RuntimeError if the installed KFP release is not supported.
+
+        Args:
+            pipeline_path: Local or GCS path of the compiled pipeline.
+            pipeline_root: Local directory under which each run writes its
+                outputs.
+            max_workers: Maximum number of tasks run in parallel. Defaults to
+                the number of CPUs.
+            enable_caching: If True, reuse the outputs of all tasks whose
+                component and inputs are unchanged since a previous run. If
+                False, run all tasks. Defaults to the caching option each task
+                was compiled with, as in Vertex AI Pipelines.
+        """
+        self.template = template_cache.get_template_cache().load(pipeline_path)
+        self.spec = pipeline_spec.get_pipeline_spec(self.template)
+        _check_support(self.spec)
+        self.pipeline_root = os.path.abspath(pipeline_root)
+        self.max_workers = max_workers
+        self.enable_caching = enable_caching
+        self._tasks = _get_tasks(self.spec)
+        self._dependencies = pipeline_spec.get_task_dependencies(
+            self.spec["root"]["dag"]
+        )
+        self._order = pipeline_spec.topological_sort(self._dependencies)
+
+    def _get_executor_input(
+        self,
+        task: _Task,
+        task_dir: str,
+        pipeline_inputs: Dict[str, Dict[str, Any]],
+        outputs: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Returns the KFP executor input of a task whose upstream tasks are done."""
+        parameters = {}
+        for name, parameter in (
+            task.spec.get("inputs", {}).get("parameters", {}).items()
+        ):
+            if "componentInputParameter" in parameter:
+                parameters[name] = pipeline_inputs[parameter["componentInputParameter"]]
+            elif "taskOutputParameter" in parameter:
+                producer = parameter["taskOutputParameter"]
+                parameters[name] = outputs[producer["producerTask"]]["parameters"][
+                    producer["outputParameterKey"]
+                ]
+            else:
+                parameters[name] = parameter["runtimeValue"]["constantValue"]
+        artifacts = {}
+        for name, artifact in task.spec.get("inputs", {}).get("artifacts", {}).items():
+            producer = artifact["taskOutputArtifact"]
+            artifacts[name] = {
+                "artifacts": [
+                    outputs[producer["producerTask"]]["artifacts"][
+                        producer["outputArtifactKey"]
+                    ]
+                ]
+            }
+        output_definitions = task.component.get("outputDefinitions", {})
+        output_parameters = {
+            name: {"outputFile": os.path.join(task_dir, "parameters", name)}
+            for name in output_definitions.get("parameters", {})
+        }
+        output_artifacts = {
+            name: {
+                "artifacts": [
+                    {
+                        "name": name,
+                        "uri": os.path.join(task_dir, name),
+                        "type": definition["artifactType"],
+                        "metadata": {},
+                    }
+                ]
+            }
+            for name, definition in output_definitions.get("artifacts", {}).items()
+        }
+        return {
+            "inputs": {"parameters": parameters, "artifacts": artifacts},
+            "outputs": {
+                "parameters": output_parameters,
+                "artifacts": output_artifacts,
+                "outputFile": os.path.join(task_dir, "executor_output.json"),
+            },
+        }
+
+    def _read_outputs(
+        self, task: _Task, executor_input: Dict[str, Any]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Returns output parameter values and artifacts of a finished task."""
+        outputs = executor_input["outputs"]
+        with open(outputs["outputFile"]) as fp:
+            executor_output = json.load(fp)
+        definitions = task.component.get("outputDefinitions", {}).get("parameters", {})
+        parameters = executor_output.get("parameters", {})
+        for name, definition in definitions.items():
+            output_file = pathlib.Path(outputs["parameters"][name]["outputFile"])
+            if name not in parameters and output_file.exists():
+                parameters[name] = _to_value(
+                    output_file.read_text(), definition["type"]
+                )
+        artifacts = {}
+        for name, artifact in outputs["artifacts"].items():
+            artifacts[name] = dict(artifact["artifacts"][0])
+            written = executor_output.get("artifacts", {}).get(name)
+            if written:
+                artifacts[name]["metadata"] = written["artifacts"][0]["metadata"]
+        return {"parameters": parameters, "artifacts": artifacts}
+
+    def _is_cache_enabled(self, task: _Task) -> bool:
+        """Returns True if the outputs of a task may be reused."""
+        if self.enable_caching is not None:
+            return self.enable_caching
+        return task.spec.get("cachingOptions", {}).get("enableCache", False)
+
+    def _get_cache_key(
+        self,
+        task: _Task,
+        executor_input: Dict[str, Any],
+        artifact_digests: Dict[str, str],
+    ) -> str:
+        """Returns the step cache key of a task, given digests of artifacts by URI."""
+        input_digests = {}
+        for name, artifact in executor_input["inputs"]["artifacts"].items():
+            uri = artifact["artifacts"][0]["uri"]
+            if uri not in artifact_digests:
+                artifact_digests[uri] = step_cache.get_path_digest(uri)
+            input_digests[name] = artifact_digests[uri]
+        return step_cache.get_cache_key(
+            task.component,
+            task.container,
+            executor_input["inputs"]["parameters"],
+            input_digests,
+        )
+
+    def run(
+        self, pipeline_params: Dict[str, Any], run_id: Optional[str] = None
+    ) -> LocalRunResult:
+        """Runs the pipeline, starting each task as soon as its upstream tasks succeed.
+
+        After a task fails, no further tasks are started and the remaining
+        tasks are skipped.
+
+        Args:
+            pipeline_params: Kubeflow pipeline parameters.
+            run_id: Unique ID of the run. Defaults to a generated job ID.
+
+        Returns:
+            Result of the run.
+        """
+        pipeline_inputs = _get_pipeline_inputs(self.template, pipeline_params)
+        pipeline_name = self.spec.get("pipelineInfo", {}).get("name", "pipeline")
+        run_id = run_id or utils.get_job_id(pipeline_name)
+        run_dir = os.path.join(self.pipeline_root, run_id)
+        outputs: Dict[str, Dict[str, Any]] = {}
+        results: Dict[str, TaskResult] = {}
+        artifact_digests: Dict[str, str] = {}
+        pending = {name: set(upstream) for name, upstream in self._dependencies.items()}
+        with profiling.span("run_local"), futures.ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_worker
+        ) as executor:
+            running: Dict[futures.Future, Any] = {}
+            while pending or running:
+                # Tasks reused from the cache may make further tasks ready.
+                ready = self._get_ready(pending, outputs, results)
+                while ready:
+                    for name in ready:
+                        del pending[name]
+                        task = self._tasks[name]
+                        task_dir = os.path.join(run_dir, name)
+                        os.makedirs(task_dir, exist_ok=True)
+                        executor_input = self._get_executor_input(
+                            task, task_dir, pipeline_inputs, outputs
+                        )
+                        cache_key = None
+                        if self._is_cache_enabled(task):
+                            cache_key = self._get_cache_key(
+                                task, executor_input, artifact_digests
+                            )
+                            result = self._load_cached(
+                                task, executor_input, cache_key, outputs
+                            )
+                            if result is not None:
+                                results[name] = result
+                                continue
+                        future = executor.submit(
+                            _execute_task,
+                            task_dir,
+                            task.source,
+                            task.function_name,
+                            executor_input,
+                            cache_key,
+                        )
+                        running[future] = (task, executor_input)
+                    ready = self._get_ready(pending, outputs, results)
+                if not running:
+                    break
+                done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    task, executor_input = running.pop(future)
+                    results[task.name] = self._get_result(
+                        task, executor_input, future.result, outputs
+                    )
+        for name in pending:
+            results[name] = TaskResult(name=name, state=SKIPPED)
+        return LocalRunResult(
+            run_id=run_id,
+            run_dir=run_dir,
+            tasks=[results[name] for name in self._order],
+        )
+
+    def _get_ready(
+        self,
+        pending: Dict[str, Set[str]],
+        outputs: Dict[str, Dict[str, Any]],
+        results: Dict[str, TaskResult],
+    ) -> List[str]:
+        """Returns tasks whose upstream tasks succeeded, or none after a failure."""
+        if any(result.state == FAILED for result in results.values()):
+            return []
+        return [
+            name
+            for name in self._order
+            if name in pending and pending[name] <= outputs.keys()
+        ]
+
+    def _load_cached(
+        self,
+        task: _Task,
+        executor_input: Dict[str, Any],
+        cache_key: str,
+        outputs: Dict[str, Dict[str, Any]],
+    ) -> Optional[TaskResult]:
+        """Restores the outputs of a task from the step cache, if they are there."""
+        start_time = time.perf_counter()
+        data = step_cache.get_step_cache().get(cache_key)
+        if data is None:
+            return None
+        task_dir = os.path.dirname(executor_input["outputs"]["outputFile"])
+        step_cache.unpack(data, task_dir)
+        logging.info("Reusing cached outputs of task %s.", task.name)
+        seconds = time.perf_counter() - start_time
+        return self._get_result(
+            task, executor_input, lambda: seconds, outputs, cached=True
+        )
+
+    def _get_result(
+        self,
+        task: _Task,
+        executor_input: Dict[str, Any],
+        get_seconds: Callable[[], float],
+        outputs: Dict[str, Dict[str, Any]],
+        cached: bool = False,
+    ) -> TaskResult:
+        """Returns the result of a finished task, recording its outputs if any."""
+        try:
+            seconds = get_seconds()
+            task_outputs = self._read_outputs(task, executor_input)
+        except Exception as e:
+            logging.error("Task %s failed: %s", task.name, e)
+            return TaskResult(
+                name=task.name, state=FAILED, error=f"{type(e).__name__}: {e}"
+            )
+        outputs[task.name] = task_outputs
+        logging.info("Task %s succeeded in %.2fs.", task.name, seconds)
+        return TaskResult(
+            name=task.name,
+            state=SUCCEEDED,
+            seconds=seconds,
+            parameters={
+                name: _from_value(value)
+                for name, value in task_outputs["parameters"].items()
+            },
+            artifacts={
+                name: artifact["uri"]
+                for name, artifact in task_outputs["artifacts"].items()
+            },
+            cached=cached,
+        )
+
+
+def run_local(
+    pipeline_path: str,
+    pipeline_params: Dict[str, Any],
+    pipeline_root: str,
+    max_workers: Optional[int] = None,
+    enable_caching: Optional[bool] = None,
+) -> LocalRunResult:
+    """Runs a compiled pipeline on the local machine.
+
+    See `LocalRunner.run`.
+
+    Args:
+        pipeline_path: Local or GCS path of the compiled pipeline.
+        pipeline_params: Kubeflow pipeline parameters.
+        pipeline_root: Local directory under which the run writes its outputs.
+        max_workers: Maximum number of tasks run in parallel.
+        enable_caching: Whether to reuse outputs of unchanged tasks. Defaults
+            to the caching option each task was compiled with.
+
+    Returns:
+        Result of the run.
+    """
+    runner = LocalRunner(
+        pipeline_path,
+        pipeline_root,
+        max_workers=max_workers,
+        enable_caching=enable_caching,
+    )
+    return runner.run(pipeline_params)
@@ -14,14 +14,83 @@
 
 """Compiles a Kubeflow pipeline."""
 
+import base64
+from concurrent import futures
+import dataclasses
+import hashlib
 import importlib
+from importlib import metadata
 import logging
+import os
 import pathlib
 import tempfile
-from typing import Callable, Union
+import time
+from typing import Callable, List, Optional, Sequence, Union
 
 import cloudpathlib as cpl
+from google.api_core import exceptions as api_exceptions
 from kfp.v2 import compiler
+import yaml
+
+from pipelines import cache
+from pipelines import component_images
+from pipelines import profiling
+from pipelines import sources
+from pipelines import spec_store
+
+# Bump to invalidate existing compile cache entries after format changes.
+_CACHE_KEY_VERSION = "1"
+
+_compile_cache: Optional[cache.DiskCache] = None
+
+
+@dataclasses.dataclass
+class CompileTask:
+    """A pipeline to compile.
+
+    Attributes:
+        module_name: Name of module in the `pipelines` package containing the
+            pipeline function.
+        function_name: Name of pipeline function.
+        package_path: Local or GCS output path of the JSON specification.
+        image_registry: If set, use images with component packages
+            preinstalled from this registry. See `component_images`.
+    """
+
+    module_name: str
+    function_name: str
+    package_path: str
+    image_registry: Optional[str] = None
+
+
+@dataclasses.dataclass
+class CompileResult:
+    """Outcome of compiling a single pipeline.
+
+    Attributes:
+        task: The compiled pipeline.
+        seconds: Wall time spent compiling and writing the specification.
+        cached: Whether the specification was served from the compile cache.
+        error: Error message if compilation failed, otherwise None.
+    """
+
+    task: CompileTask
+    seconds: float
+    cached: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if the pipeline compiled successfully."""
+        return self.error is None
+
+
+def get_compile_cache() -> cache.DiskCache:
+    """Returns the on-disk cache of compiled pipeline specifications."""
+    global _compile_cache
+    if _compile_cache is None:
+        _compile_cache = cache.DiskCache(cache.get_cache_dir("compile"))
+    return _compile_cache
 
 
 def _get_function_obj(module_name: str, function_name: str) -> Callable:
@@ -30,6 +99,23 @@ def _get_function_obj(module_name: str, function_name: str) -> Callable:
     return getattr(module, function_name)
 
 
+def _get_cache_key(module_name: str, function_name: str) -> str:
+    """Returns a digest of all inputs that determine the compiled output."""
+    # Inputs are the source of the pipeline module and of the local modules it
+    # transitively imports, the function name and the installed KFP version.
+    digest = hashlib.sha256()
+    for part in (_CACHE_KEY_VERSION, metadata.version("kfp"), function_name):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    for dependency in sources.get_local_dependencies(module_name):
+        source_path = sources.get_module_path(dependency)
+        digest.update(dependency.encode())
+        digest.update(b"\0")
+        digest.update(source_path.read_bytes())  # type: ignore[union-attr]
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
 def _is_local_path(path: Union[cpl.AnyPath, cpl.CloudPath, pathlib.Path]) -> bool:
     """Returns True if given path is a local path."""
     return isinstance(path, pathlib.Path)
@@ -42,20 +128,258 @@ def _kfp_compile_wrapper(pipeline_func: Callable, package_path: str) -> None:
     )
 
 
-def _compile_pipeline_func(pipeline_func: Callable, package_path_: cpl.AnyPath) -> None:
+def _compile_pipeline_func(pipeline_func: Callable) -> str:
     """Compiles pipeline function into JSON specification."""
+    with tempfile.TemporaryDirectory() as tempdir:
+        package_path = os.path.join(tempdir, "pipeline.json")
+        _kfp_compile_wrapper(pipeline_func, package_path)
+        with open(package_path) as fp:
+            return fp.read()
+
+
+def _get_md5(data: bytes) -> str:
+    """Returns the base64-encoded MD5 digest of data, as reported by GCS."""
+    digest = hashlib.md5(data, usedforsecurity=False).digest()
+    return base64.b64encode(digest).decode()
+
+
+def _upload_to_gcs_if_changed(data: bytes, package_path_: cpl.GSPath) -> bool:
+    """Uploads data to a GCS object unless the object already has that content."""
+    bucket = package_path_.client.client.bucket(package_path_.bucket)
+    blob = bucket.get_blob(package_path_.blob)
+    if blob is not None:
+        if blob.md5_hash == _get_md5(data):
+            logging.info("Pipeline specification is unchanged. Skipping upload.")
+            return False
+        logging.warning("Output path already exists. Overwriting...")
+    # Makes the upload conditional on the object generation that was compared,
+    # so that a concurrent writer is never silently overwritten.
+    generation = blob.generation if blob is not None else 0
+    try:
+        bucket.blob(package_path_.blob).upload_from_string(
+            data, content_type="application/json", if_generation_match=generation
+        )
+    except api_exceptions.PreconditionFailed as e:
+        raise RuntimeError(
+            f"{package_path_} was modified by another writer during compilation."
+        ) from e
+    return True
+
+
+def _upload_if_changed(data: bytes, package_path_: cpl.CloudPath) -> bool:
+    """Uploads data to a cloud path unless the path already has that content."""
+    if package_path_.exists():
+        if _get_md5(package_path_.read_bytes()) == _get_md5(data):
+            logging.info("Pipeline specification is unchanged. Skipping upload.")
+            return False
+        logging.warning("Output path already exists. Overwriting...")
+    package_path_.write_bytes(data)
+    return True
+
+
+def _write_pipeline_spec(pipeline_spec: str, package_path_: cpl.AnyPath) -> bool:
+    """Writes JSON specification to a path, returning False if unchanged."""
     if _is_local_path(package_path_):
-        _kfp_compile_wrapper(pipeline_func, str(package_path_))
-    else:
-        with tempfile.NamedTemporaryFile(suffix=".json") as tempf:
-            _kfp_compile_wrapper(pipeline_func, tempf.name)
-            package_path_.upload_from(tempf.name)  # type: ignore[abstract,attr-defined]
+        if package_path_.exists():  # type: ignore[attr-defined]
+            logging.warning("Output path already exists. Overwriting...")
+        package_path_.write_text(pipeline_spec)  # type: ignore[attr-defined]
+        return True
+    data = pipeline_spec.encode()
+    if isinstance(package_path_.client, cpl.GSClient):  # type: ignore[attr-defined]
+        return _upload_to_gcs_if_changed(data, package_path_)  # type: ignore[arg-type]
+    return _upload_if_changed(data, package_path_)  # type: ignore[arg-type]
+
+
+def _compile(module_name: str, function_name: str) -> str:
+    """Imports and compiles pipeline function into JSON specification."""
+    with profiling.span("compile.import_pipeline"):
+        pipeline_func = _get_function_obj(module_name, function_name)
+    with profiling.span("compile.kfp_compile"):
+        return _compile_pipeline_func(pipeline_func)
+
 
+def _compile_with_cache(module_name: str, function_name: str) -> str:
+    """Compiles pipeline function, reusing a cached specification if possible."""
+    compile_cache = get_compile_cache()
+    with profiling.span("compile.cache_lookup"):
+        cache_key = _get_cache_key(module_name, function_name)
+        cached_spec = compile_cache.get(cache_key)
+    if cached_spec is not None:
+        logging.info("Using cached pipeline specification.")
+        return cached_spec.decode()
+    pipeline_spec = _compile(module_name, function_name)
+    with profiling.span("compile.cache_store"):
+        compile_cache.put(cache_key, pipeline_spec.encode())
+    return pipeline_spec
 
-def compile(module_name: str, function_name: str, package_path: str) -> None:
-    """Compiles pipeline function as string into JSON specification."""
+
+def compile_spec(module_name: str, function_name: str, use_cache: bool = True) -> str:
+    """Compiles pipeline function into JSON specification without writing it.
+
+    Args:
+        module_name: Name of module in the `pipelines` package containing the
+            pipeline function.
+        function_name: Name of pipeline function.
+        use_cache: If True, reuse a previously compiled specification when the
+            pipeline sources and KFP version are unchanged.
+
+    Returns:
+        JSON pipeline specification.
+    """
+    if use_cache:
+        return _compile_with_cache(module_name, function_name)
+    return _compile(module_name, function_name)
+
+
+def compile(
+    module_name: str,
+    function_name: str,
+    package_path: str,
+    use_cache: bool = True,
+    image_registry: Optional[str] = None,
+) -> str:
+    """Compiles pipeline function as string into JSON specification.
+
+    Args:
+        module_name: Name of module in the `pipelines` package containing the
+            pipeline function.
+        function_name: Name of pipeline function.
+        package_path: Local or GCS output path of the JSON specification.
+        use_cache: If True, reuse a previously compiled specification when the
+            pipeline sources and KFP version are unchanged.
+        image_registry: If set, rewrite components that install packages at
+            run time to use images with the packages preinstalled, pushed to
+            this registry. See `component_images`.
+
+    Returns:
+        JSON pipeline specification.
+
+    Raises:
+        ValueError: If `package_path` is not a JSON file path.
+    """
+    if not package_path.endswith(".json"):
+        raise ValueError(f'The output path {package_path} should end with ".json".')
     package_path_ = cpl.AnyPath(package_path)
-    if package_path_.exists():  # type: ignore[attr-defined]
-        logging.warning("Output path already exists. Overwriting...")
-    pipeline_func = _get_function_obj(module_name, function_name)
-    _compile_pipeline_func(pipeline_func, package_path_)
+    pipeline_spec = compile_spec(module_name, function_name, use_cache=use_cache)
+    if image_registry is not None:
+        with profiling.span("compile.bake_images"):
+            pipeline_spec = component_images.bake_spec(pipeline_spec, image_registry)
+    with profiling.span("compile.write_spec"):
+        _write_pipeline_spec(pipeline_spec, package_path_)
+    return pipeline_spec
+
+
+def publish(
+    module_name: str,
+    function_name: str,
+    root: str,
+    alias: Optional[str] = None,
+    use_cache: bool = True,
+    image_registry: Optional[str] = None,
+) -> str:
+    """Compiles a pipeline into the content-addressed specification store.
+
+    Unlike `compile`, which overwrites its output path, each distinct
+    specification is stored once under its digest, so runs can pin it.
+
+    Args:
+        module_name: Name of module in the `pipelines` package containing the
+            pipeline function.
+        function_name: Name of pipeline function.
+        root: Local directory or GCS URI under which specifications are
+            stored, e.g. the `gcs-root-path` of a run config.
+        alias: If set, also point this alias to the specification.
+        use_cache: If True, reuse a previously compiled specification when the
+            pipeline sources and KFP version are unchanged.
+        image_registry: If set, use images with component packages
+            preinstalled from this registry. See `component_images`.
+
+    Returns:
+        SHA-256 digest of the stored specification.
+    """
+    pipeline_spec = compile_spec(module_name, function_name, use_cache=use_cache)
+    if image_registry is not None:
+        with profiling.span("compile.bake_images"):
+            pipeline_spec = component_images.bake_spec(pipeline_spec, image_registry)
+    with profiling.span("compile.store_spec"):
+        return spec_store.put(pipeline_spec, root, alias=alias)
+
+
+def load_manifest(filepath: str) -> List[CompileTask]:
+    """Reads a list of pipelines to compile from a YAML or JSON file.
+
+    The file should contain a list of entries with `module-name`,
+    `function-name` and `output-path` keys, and optionally `image-registry`.
+
+    Args:
+        filepath: Path to the manifest file.
+
+    Returns:
+        Pipelines to compile, in manifest order.
+    """
+    with open(filepath) as fp:
+        data = yaml.safe_load(fp)
+    return [
+        CompileTask(
+            module_name=entry["module-name"],
+            function_name=entry["function-name"],
+            package_path=entry["output-path"],
+            image_registry=entry.get("image-registry"),
+        )
+        for entry in data
+    ]
+
+
+def compile_task(task: CompileTask, use_cache: bool = True) -> CompileResult:
+    """Compiles a single pipeline, capturing any error.
+
+    Args:
+        task: Pipeline to compile.
+        use_cache: If True, reuse a previously compiled specification.
+
+    Returns:
+        Result of compiling the pipeline.
+    """
+    hits_before = get_compile_cache().stats.hits
+    start_time = time.perf_counter()
+    try:
+        compile(
+            task.module_name,
+            task.function_name,
+            task.package_path,
+            use_cache=use_cache,
+            image_registry=task.image_registry,
+        )
+    except Exception as e:
+        logging.exception("Failed to compile %s.", task.module_name)
+        error: Optional[str] = f"{type(e).__name__}: {e}"
+    else:
+        error = None
+    return CompileResult(
+        task=task,
+        seconds=time.perf_counter() - start_time,
+        cached=get_compile_cache().stats.hits > hits_before,
+        error=error,
+    )
+
+
+def compile_many(
+    tasks: Sequence[CompileTask],
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> List[CompileResult]:
+    """Compiles many pipelines in parallel across a pool of processes.
+
+    A failure to compile one pipeline does not affect the others.
+
+    Args:
+        tasks: Pipelines to compile.
+        max_workers: Maximum number of worker processes. Defaults to the
+            number of CPUs.
+        use_cache: If True, reuse previously compiled specifications.
+
+    Returns:
+        One result per pipeline, in the same order as `tasks`.
+    """
+    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(compile_task, tasks, [use_cache] * len(tasks)))
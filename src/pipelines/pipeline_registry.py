@@ -0,0 +1,292 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Finds the pipelines of the `pipelines` package without importing them.
+
+Modules are scanned statically for functions decorated with
+`kfp.dsl.pipeline`. Results are cached on disk per module source file and
+reused while the file's modification time and size are unchanged, so
+listing the pipelines of an unchanged package reads a single cache entry.
+"""
+
+import ast
+import dataclasses
+import hashlib
+import json
+import logging
+import pathlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pipelines import cache
+from pipelines import sources
+
+# Bumped whenever the format of cached scan results changes.
+_INDEX_VERSION = "1"
+
+_PIPELINE_DECORATORS = frozenset({"kfp.dsl.pipeline", "kfp.v2.dsl.pipeline"})
+
+_registry_cache: Optional[cache.DiskCache] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class PipelineParameter:
+    """A parameter of a pipeline function.
+
+    Attributes:
+        name: Parameter name.
+        annotation: Source of the type annotation, if any.
+        default: Source of the default value, if any.
+    """
+
+    name: str
+    annotation: Optional[str] = None
+    default: Optional[str] = None
+
+
+@dataclasses.dataclass(frozen=True)
+class PipelineInfo:
+    """A pipeline function found in the `pipelines` package.
+
+    Attributes:
+        module_name: Name of module in the `pipelines` package containing the
+            pipeline function, as passed to `compile`.
+        function_name: Name of pipeline function.
+        pipeline_name: Name given to the `pipeline` decorator, if any.
+        description: Description given to the `pipeline` decorator, or else
+            the first line of the function's docstring, if any.
+        parameters: Parameters of the pipeline function.
+        path: Source file of the module.
+        lineno: Line of the function definition in `path`.
+    """
+
+    module_name: str
+    function_name: str
+    pipeline_name: Optional[str]
+    description: Optional[str]
+    parameters: Tuple[PipelineParameter, ...]
+    path: str
+    lineno: int
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PipelineInfo":  # noqa: ANN102
+        """Returns the info stored by `dataclasses.asdict`."""
+        parameters = tuple(PipelineParameter(**p) for p in data["parameters"])
+        return cls(**{**data, "parameters": parameters})
+
+
+def get_registry_cache() -> cache.DiskCache:
+    """Returns the on-disk cache of scanned pipeline modules."""
+    global _registry_cache
+    if _registry_cache is None:
+        _registry_cache = cache.DiskCache(cache.get_cache_dir("registry"))
+    return _registry_cache
+
+
+def _get_imported_names(tree: ast.Module) -> Dict[str, str]:
+    """Returns the fully qualified names bound by a module's imports."""
+    names = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    names[alias.asname] = alias.name
+                else:
+                    top_level = alias.name.split(".")[0]
+                    names[top_level] = top_level
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                names[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+    return names
+
+
+def _get_dotted_name(node: ast.expr) -> Optional[str]:
+    """Returns the dotted name of an expression such as `kfp.dsl.pipeline`."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _is_pipeline_decorator(decorator: ast.expr, imported: Dict[str, str]) -> bool:
+    """Returns True if a decorator is `kfp.dsl.pipeline` under any import alias."""
+    if isinstance(decorator, ast.Call):
+        decorator = decorator.func
+    dotted_name = _get_dotted_name(decorator)
+    if dotted_name is None:
+        return False
+    first, _, rest = dotted_name.partition(".")
+    qualified_name = imported.get(first, first)
+    if rest:
+        qualified_name = f"{qualified_name}.{rest}"
+    return qualified_name in _PIPELINE_DECORATORS
+
+
+def _get_decorator_arg(decorator: ast.expr, name: str, position: int) -> Optional[str]:
+    """Returns a string literal argument of a decorator call, if given."""
+    if not isinstance(decorator, ast.Call):
+        return None
+    values = [kw.value for kw in decorator.keywords if kw.arg == name]
+    if not values and len(decorator.args) > position:
+        values = [decorator.args[position]]
+    if values and isinstance(values[0], ast.Constant):
+        if isinstance(values[0].value, str):
+            return values[0].value
+    return None
+
+
+def _unparse(node: Optional[ast.expr]) -> Optional[str]:
+    """Returns the source of an optional expression."""
+    return None if node is None else ast.unparse(node)
+
+
+def _get_parameters(args: ast.arguments) -> Tuple[PipelineParameter, ...]:
+    """Returns the parameters of a function definition."""
+    positional = args.posonlyargs + args.args
+    defaults: List[Optional[ast.expr]] = [None] * (len(positional) - len(args.defaults))
+    defaults += args.defaults
+    pairs = list(zip(positional, defaults, strict=True)) + list(
+        zip(args.kwonlyargs, args.kw_defaults, strict=True)
+    )
+    return tuple(
+        PipelineParameter(arg.arg, _unparse(arg.annotation), _unparse(default))
+        for arg, default in pairs
+    )
+
+
+def scan_module(module_name: str, path: pathlib.Path) -> List[PipelineInfo]:
+    """Returns the pipeline functions defined at the top level of a module.
+
+    Args:
+        module_name: Module name relative to the package, e.g. `sample_pipeline`.
+        path: Source file of the module.
+
+    Returns:
+        Pipelines in the order they are defined.
+    """
+    tree = ast.parse(path.read_bytes(), filename=str(path))
+    imported = _get_imported_names(tree)
+    pipelines = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if not _is_pipeline_decorator(decorator, imported):
+                continue
+            description = _get_decorator_arg(decorator, "description", 1)
+            docstring = ast.get_docstring(node)
+            if description is None and docstring:
+                description = docstring.splitlines()[0]
+            pipelines.append(
+                PipelineInfo(
+                    module_name=module_name,
+                    function_name=node.name,
+                    pipeline_name=_get_decorator_arg(decorator, "name", 0),
+                    description=description,
+                    parameters=_get_parameters(node.args),
+                    path=str(path),
+                    lineno=node.lineno,
+                )
+            )
+            break
+    return pipelines
+
+
+def _iter_modules() -> Iterator[Tuple[str, pathlib.Path]]:
+    """Yields the name and source file of every module in the package."""
+    for path in sorted(sources.PACKAGE_DIR.rglob("*.py")):
+        parts = path.relative_to(sources.PACKAGE_DIR).with_suffix("").parts
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        if parts and all(part.isidentifier() for part in parts):
+            yield ".".join(parts), path
+
+
+def _get_index_key() -> str:
+    """Returns the cache key of scan results for the current package directory."""
+    package_dir = str(sources.PACKAGE_DIR).encode()
+    return f"index-{_INDEX_VERSION}-{hashlib.sha256(package_dir).hexdigest()}"
+
+
+def list_pipelines(use_cache: bool = True) -> List[PipelineInfo]:
+    """Returns all pipeline functions in the `pipelines` package.
+
+    Modules are parsed, never imported, so neither KFP nor the modules
+    themselves are loaded. Modules that fail to parse are skipped with a
+    warning.
+
+    Args:
+        use_cache: If True, reuse the scan results of modules that did not
+            change since they were last scanned.
+
+    Returns:
+        Pipelines sorted by module name, in definition order within a module.
+    """
+    registry_cache = get_registry_cache()
+    index_key = _get_index_key()
+    index: Dict[str, Dict] = {}
+    if use_cache:
+        cached_index = registry_cache.get(index_key)
+        if cached_index is not None:
+            index = json.loads(cached_index)
+    new_index = {}
+    pipelines: List[PipelineInfo] = []
+    for module_name, path in _iter_modules():
+        stat = path.stat()
+        version = [stat.st_mtime_ns, stat.st_size]
+        entry = index.get(module_name)
+        if entry is None or entry["version"] != version:
+            try:
+                module_pipelines = scan_module(module_name, path)
+            except (SyntaxError, ValueError) as e:
+                logging.warning("Skipping %s, which failed to parse: %s", path, e)
+                continue
+            entry = {
+                "version": version,
+                "pipelines": [dataclasses.asdict(p) for p in module_pipelines],
+            }
+        new_index[module_name] = entry
+        pipelines.extend(PipelineInfo.from_dict(p) for p in entry["pipelines"])
+    if use_cache and new_index != index:
+        registry_cache.put(index_key, json.dumps(new_index).encode())
+    return pipelines
+
+
+def get_pipeline(
+    module_name: str, function_name: str, use_cache: bool = True
+) -> PipelineInfo:
+    """Returns a pipeline function of the `pipelines` package.
+
+    Args:
+        module_name: Name of module in the `pipelines` package containing the
+            pipeline function.
+        function_name: Name of pipeline function.
+        use_cache: If True, reuse the scan results of unchanged modules.
+
+    Returns:
+        The pipeline function's info.
+
+    Raises:
+        LookupError: If there is no such pipeline function.
+    """
+    for pipeline in list_pipelines(use_cache=use_cache):
+        if (pipeline.module_name, pipeline.function_name) == (
+            module_name,
+            function_name,
+        ):
+            return pipeline
+    raise LookupError(f"No pipeline {function_name} in module {module_name}.")
@@ -16,14 +16,55 @@
 
 from __future__ import annotations
 
+import asyncio
+import collections
+from concurrent import futures
 import dataclasses
-from typing import Any, Dict, Optional
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+)
+import weakref
 
+from google.api_core import exceptions
+import google.auth
+from google.auth import credentials as auth_credentials
 from google.cloud import aiplatform as vertex
+from google.cloud.aiplatform import initializer
+from google.cloud.aiplatform.utils import gcs_utils
+from google.cloud.aiplatform_v1.services import pipeline_service
+from google.cloud.aiplatform_v1.types import pipeline_job as gca_pipeline_job
 import yaml
 
+from pipelines import job_index
+from pipelines import job_requests
+from pipelines import job_watcher
+from pipelines import profiling
+from pipelines import rate_limit
+from pipelines import spec_store
+from pipelines import template_cache
 from pipelines import utils
 
+_CLOUD_PLATFORM_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+# States of jobs that identical submissions may reuse. Jobs in any other
+# state, e.g. being cancelled or of an unknown state, are never reused.
+_REUSABLE_STATES = job_watcher.ACTIVE_STATES | job_watcher.SUCCEEDED_STATES
+
+# Maximum number of parsed job templates kept by a runner.
+_MAX_JOB_TEMPLATES = 8
+
 
 @dataclasses.dataclass
 class PipelineRunConfig:
@@ -31,14 +72,23 @@ class PipelineRunConfig:
 
     Attributes:
         pipeline_name: Display name of the pipeline job in Vertex AI Pipelines.
-        pipeline_path: Location of the pipeline specification file.
+        pipeline_path: Location of the pipeline specification file, or
+            `sha256:<digest>` or `alias:<name>` of a specification stored
+            under `gcs_root_path` by `pipeline_compiler.publish`.
         gcs_root_path: GCS path to store data generated during pipeline execution.
         location: GCP location to use for running the pipeline, e.g. us-central1.
         enable_caching: If True, enable caching of pipeline runs.
         service_account: Service account to use.
-        sync: Whether to execute this method synchronously.
-            If False, this method will unblock and it will be executed in a concurrent
-            Future.
+        sync: Whether to wait for the pipeline job to complete.
+        max_submissions_per_second: Maximum rate at which jobs are submitted by
+            a runner. Unlimited if None.
+        submission_burst: Maximum number of jobs submitted at once before the
+            rate limit applies. Defaults to `max_submissions_per_second`.
+        max_submission_retries: Maximum number of times a submission that
+            failed with a retryable error, such as a quota error, is retried.
+        dedupe_window: Seconds within which a job with the same template and
+            parameters that is still running or succeeded is reused instead of
+            submitting a new one. Disabled if None.
     """
 
     pipeline_name: str
@@ -48,6 +98,10 @@ class PipelineRunConfig:
     enable_caching: bool = True
     service_account: Optional[str] = None
     sync: bool = True
+    max_submissions_per_second: Optional[float] = None
+    submission_burst: Optional[int] = None
+    max_submission_retries: int = 5
+    dedupe_window: Optional[float] = None
 
     @classmethod
     def from_file(cls, filepath: str) -> PipelineRunConfig:  # noqa: ANN102
@@ -60,37 +114,948 @@ class PipelineRunConfig:
             gcs_root_path=data["gcs-root-path"],
             location=data["location"],
         )
-        for attr_name in ("enable-caching", "service-account", "sync"):
+        for attr_name in (
+            "enable-caching",
+            "service-account",
+            "sync",
+            "max-submissions-per-second",
+            "submission-burst",
+            "max-submission-retries",
+        ):
             if attr_name in data:
                 attr_name_underscore = attr_name.replace("-", "_")
                 setattr(run_config, attr_name_underscore, data[attr_name])
+        if data.get("dedupe-window") is not None:
+            run_config.dedupe_window = job_index.parse_duration(data["dedupe-window"])
         return run_config
 
+    def get_template_uri(self) -> str:
+        """Returns the location of the pipeline specification file.
+
+        References to stored specifications are resolved, which reads the
+        alias object for `alias:<name>`.
+
+        Returns:
+            Location of the pipeline specification file.
+        """
+        return spec_store.resolve(self.pipeline_path, self.gcs_root_path)
+
+
+@dataclasses.dataclass
+class SubmissionResult:
+    """Outcome of submitting a single pipeline job.
+
+    Attributes:
+        pipeline_params: Kubeflow pipeline parameters of the job.
+        job_id: Vertex Pipelines job ID.
+        seconds: Wall time spent creating and submitting the job.
+        error: Error message if submission failed, otherwise None.
+        deduplicated: True if an identical job was reused instead of
+            submitting a new one.
+    """
+
+    pipeline_params: Dict[str, Any]
+    job_id: str
+    seconds: float
+    error: Optional[str] = None
+    deduplicated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if the job was submitted successfully."""
+        return self.error is None
+
+
+@dataclasses.dataclass
+class SubmissionStats:
+    """Submission counters of a `PipelineRunner`.
+
+    Attributes:
+        submitted: Number of jobs submitted successfully.
+        throttled: Number of submissions delayed by the client-side rate limit.
+        retried: Number of retries after retryable errors.
+        failed: Number of jobs that could not be submitted.
+        deduplicated: Number of jobs not submitted because an identical job
+            was reused.
+    """
+
+    submitted: int = 0
+    throttled: int = 0
+    retried: int = 0
+    failed: int = 0
+    deduplicated: int = 0
+
+
+def load_param_sets(filepath: str) -> List[Dict[str, Any]]:
+    """Reads pipeline parameter sets from a YAML or JSON file.
+
+    The file should contain either a list of parameter mappings, or a mapping
+    with a `grid` key whose value maps each parameter name to a list of values.
+    A grid expands to the cartesian product of its values.
+
+    Args:
+        filepath: Path to the parameter file.
+
+    Returns:
+        List of pipeline parameter sets.
+    """
+    with open(filepath) as fp:
+        data = yaml.safe_load(fp)
+    if isinstance(data, list):
+        return data
+    grid = data["grid"]
+    names = list(grid)
+    return [
+        dict(zip(names, values, strict=True))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def summarize_latencies(results: Sequence[SubmissionResult]) -> Dict[str, float]:
+    """Returns percentiles of the submission latency of successful jobs."""
+    seconds = [result.seconds for result in results if result.ok]
+    if not seconds:
+        return {}
+    return {
+        "p50": utils.percentile(seconds, 50),
+        "p90": utils.percentile(seconds, 90),
+        "p99": utils.percentile(seconds, 99),
+        "max": max(seconds),
+    }
+
+
+class PipelineRunner:
+    """Submits pipeline jobs that share credentials and API connections.
+
+    Credentials, the project and the Vertex AI API client, along with its
+    underlying gRPC channel, are set up once when the runner is created and
+    reused by all jobs. The `*_async` methods use an asyncio API client
+    instead, created once per event loop, so that any number of concurrent
+    submissions share one channel without a thread per request.
+
+    Submissions are rate limited according to the run configuration and
+    retried with jittered exponential backoff after quota and transient
+    errors. Every attempt uses the same job ID, so retries never create a job
+    twice. Counts of submissions are kept in `stats`, and submitted jobs are
+    recorded in the local job index.
+
+    With `run_config.dedupe_window` set, a job whose template and parameters
+    are identical to a job submitted within the window is not submitted if
+    that job is still active or succeeded, and the ID of the earlier job is
+    returned instead. Candidates are looked up in the local job index, and
+    any whose recorded state is not final are checked with a single API
+    request.
+    """
+
+    def __init__(
+        self,
+        run_config: PipelineRunConfig,
+        credentials: Optional[auth_credentials.Credentials] = None,
+        project: Optional[str] = None,
+    ) -> None:
+        """Initializes the runner.
+
+        Args:
+            run_config: Vertex Pipelines pipeline run configuration.
+            credentials: Credentials to submit jobs with. Defaults to the
+                application default credentials.
+            project: GCP project to run jobs in. Defaults to the project of
+                the application default credentials.
+        """
+        if credentials is None:
+            with profiling.span("run.load_credentials"):
+                credentials, default_project = google.auth.default(
+                    scopes=_CLOUD_PLATFORM_SCOPES
+                )
+            project = project or default_project
+        self.run_config = run_config
+        self.credentials = credentials
+        self.project = project
+        self.stats = SubmissionStats()
+        self._stats_lock = threading.Lock()
+        self._rate_limiter = None
+        if run_config.max_submissions_per_second:
+            self._rate_limiter = rate_limit.TokenBucket(
+                run_config.max_submissions_per_second, run_config.submission_burst
+            )
+        self._api_client = self._create_client()
+        # gRPC asyncio channels can only be used from the loop they were
+        # created in, so there is one client per event loop.
+        self._async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, pipeline_service.PipelineServiceAsyncClient
+        ] = weakref.WeakKeyDictionary()
+        self._async_preparations: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Future
+        ] = weakref.WeakKeyDictionary()
+        self._bucket_created = False
+        self._template_digests: Dict[str, Optional[str]] = {}
+        # An alias is resolved once per runner, so all jobs use one template.
+        self._template_uri: Optional[str] = None
+        # Least recently used templates are dropped, e.g. when a long-lived
+        # runner sees many versions of a remote template.
+        self._job_templates: collections.OrderedDict[
+            str, job_requests.JobTemplate
+        ] = collections.OrderedDict()
+        self._job_templates_lock = threading.Lock()
+
+    def _get_template_path(self) -> str:
+        """Returns a local path to the pipeline template if it is remote."""
+        with profiling.span("run.fetch_template"):
+            if self._template_uri is None:
+                self._template_uri = self.run_config.get_template_uri()
+            return template_cache.get_template_cache().get_local_path(
+                self._template_uri,
+                immutable=spec_store.is_content_addressed(self._template_uri),
+            )
+
+    def _get_template_digest(self, template_path: str) -> Optional[str]:
+        """Returns the digest of a local template, computed once per path."""
+        if template_path not in self._template_digests:
+            try:
+                digest: Optional[str] = job_index.get_file_digest(template_path)
+            except OSError:
+                digest = None
+            self._template_digests[template_path] = digest
+        return self._template_digests[template_path]
+
+    def _create_job_record(
+        self, pipeline_params: Dict[str, Any], job_id: str, template_path: str
+    ) -> job_index.JobRecord:
+        """Returns the job index record of a job submitted now."""
+        return job_index.JobRecord(
+            job_id=job_id,
+            pipeline_name=self.run_config.pipeline_name,
+            template_digest=self._get_template_digest(template_path),
+            params_hash=job_index.get_params_hash(pipeline_params),
+            params=pipeline_params,
+            submit_time=time.time(),
+            location=self.run_config.location,
+            project=self.project,
+        )
+
+    def _record_jobs(self, records: Iterable[job_index.JobRecord]) -> None:
+        """Adds jobs to the job index, logging rather than raising errors."""
+        try:
+            job_index.get_job_index().add(records)
+        except (OSError, sqlite3.Error) as e:
+            logging.warning("Failed to record jobs in the job index: %s", e)
+
+    def _record_job_state(
+        self, job_id: str, resource: gca_pipeline_job.PipelineJob
+    ) -> None:
+        """Updates the job index with the state and duration of a job resource."""
+        try:
+            job_index.get_job_index().update_state(
+                job_id, resource.state.name, job_watcher.get_duration(resource)
+            )
+        except (OSError, sqlite3.Error) as e:
+            logging.warning("Failed to update job %s in the job index: %s", job_id, e)
+
+    def _is_reusable(self, record: job_index.JobRecord) -> bool:
+        """Returns True if an indexed job is running or succeeded."""
+        if record.state in job_watcher.SUCCEEDED_STATES:
+            return True
+        # The recorded state may be outdated unless it is final.
+        try:
+            resource = self._api_client.get_pipeline_job(
+                name=self._get_job_name(record.job_id)
+            )
+        except exceptions.GoogleAPICallError as e:
+            logging.warning("Failed to get the state of job %s: %s", record.job_id, e)
+            return False
+        self._record_job_state(record.job_id, resource)
+        return resource.state.name in _REUSABLE_STATES
+
+    def _find_duplicate(self, record: job_index.JobRecord) -> Optional[str]:
+        """Returns the ID of a reusable job identical to a new one, if any."""
+        if not self.run_config.dedupe_window or record.template_digest is None:
+            return None
+        try:
+            candidates = job_index.get_job_index().query(
+                params_hash=record.params_hash,
+                template_digest=record.template_digest,
+                since=record.submit_time - self.run_config.dedupe_window,
+                include_states=_REUSABLE_STATES,
+                limit=None,
+            )
+        except (OSError, sqlite3.Error) as e:
+            logging.warning("Failed to look up duplicates in the job index: %s", e)
+            return None
+        for candidate in candidates:
+            if (
+                candidate.params_hash == record.params_hash
+                and candidate.project == record.project
+                and candidate.location == record.location
+                and self._is_reusable(candidate)
+            ):
+                logging.info(
+                    "Reusing job %s with the same template and parameters.",
+                    candidate.job_id,
+                )
+                self._count("deduplicated")
+                return candidate.job_id
+        return None
+
+    def run(self, pipeline_params: Dict[str, Any], force: bool = False) -> str:
+        """Runs a Kubeflow pipeline given by specification file.
+
+        Args:
+            pipeline_params: Kubeflow pipeline parameters
+            force: If True, submit the job even if an identical job would be
+                reused according to `run_config.dedupe_window`.
+
+        Returns:
+            Vertex Pipelines job ID.
+        """
+        job_id = utils.get_job_id(self.run_config.pipeline_name)
+        template_path = self._prepare_submission()
+        record = self._create_job_record(pipeline_params, job_id, template_path)
+        duplicate_id = None if force else self._find_duplicate(record)
+        if duplicate_id is not None:
+            job_id = duplicate_id
+        else:
+            (job_request,) = self._get_job_template(template_path).create_requests(
+                [job_id], [pipeline_params]
+            )
+            self._submit_job_request(job_request)
+            self._record_jobs([record])
+        if self.run_config.sync:
+            job = vertex.PipelineJob.get(
+                job_id,
+                project=self.project,
+                location=self.run_config.location,
+                credentials=self.credentials,
+            )
+            try:
+                job.wait()
+            finally:
+                self._record_job_state(job_id, job.gca_resource)
+        return job_id
+
+    def _count(self, counter: str) -> None:
+        """Increments one of the submission counters in `stats`."""
+        with self._stats_lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def _reserve(self) -> float:
+        """Returns the seconds to wait for the rate limit before submitting."""
+        if self._rate_limiter is None:
+            return 0.0
+        delay = self._rate_limiter.reserve()
+        if delay:
+            self._count("throttled")
+        return delay
+
+    def _handle_submit_error(
+        self, job_id: str, attempt: int, error: Exception
+    ) -> Optional[float]:
+        """Classifies an error of a submission attempt.
+
+        Args:
+            job_id: Vertex Pipelines job ID.
+            attempt: Number of the failed attempt, starting at 1.
+            error: Error raised by the attempt.
+
+        Returns:
+            Seconds to wait before retrying, or None if the job was created
+            by an earlier attempt whose response was lost.
+
+        Raises:
+            error: If the submission failed for good.
+        """
+        if isinstance(error, exceptions.AlreadyExists):
+            if attempt == 1:
+                # The job ID is taken by another job.
+                self._count("failed")
+                raise error
+            logging.info("Job %s was created by an earlier attempt.", job_id)
+            self._count("submitted")
+            return None
+        if (
+            not isinstance(error, rate_limit.RETRYABLE_ERRORS)
+            or attempt > self.run_config.max_submission_retries
+        ):
+            self._count("failed")
+            raise error
+        self._count("retried")
+        delay = rate_limit.get_backoff(attempt)
+        logging.warning(
+            "Failed to submit job %s, retrying in %.1fs: %s", job_id, delay, error
+        )
+        return delay
+
+    def _call_with_retries(self, job_id: str, create: Callable[[], object]) -> bool:
+        """Creates a job, rate limited and retried after retryable errors.
+
+        Errors that are not retried are raised, including AlreadyExists if
+        the job ID is taken by another job.
+
+        Args:
+            job_id: Vertex Pipelines job ID.
+            create: Function sending the request that creates the job.
+
+        Returns:
+            True if the job was created by this call, or False if it was
+            created by an earlier attempt whose response was lost.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            delay = self._reserve()
+            if delay:
+                time.sleep(delay)
+            try:
+                with profiling.span("run.submit_job"):
+                    create()
+            except Exception as e:
+                retry_delay = self._handle_submit_error(job_id, attempt, e)
+                if retry_delay is None:
+                    return False
+                time.sleep(retry_delay)
+                continue
+            self._count("submitted")
+            return True
+
+    def _submit_job_request(self, job_request: job_requests.JobRequest) -> None:
+        """Submits a job, rate limited and retried after retryable errors."""
+        request = job_request.to_request(self._get_parent())
+        self._call_with_retries(
+            job_request.job_id,
+            lambda: self._api_client.create_pipeline_job(request=request),
+        )
+        logging.info("Submitted job %s.", job_request.job_id)
+
+    def _submit(
+        self,
+        pipeline_params: Dict[str, Any],
+        job_id: str,
+        template_path: str,
+        force: bool = False,
+        job_request: Optional[job_requests.JobRequest] = None,
+    ) -> SubmissionResult:
+        """Submits a pipeline job without waiting for it, capturing any error.
+
+        Args:
+            pipeline_params: Kubeflow pipeline parameters.
+            job_id: Vertex Pipelines job ID.
+            template_path: Local path of the pipeline template.
+            force: If True, submit the job even if an identical job would be
+                reused according to `run_config.dedupe_window`.
+            job_request: Request to create the job from. If None, the
+                parameters are bound to the template at `template_path`.
+
+        Returns:
+            Result of the submission.
+        """
+        start_time = time.perf_counter()
+        record = self._create_job_record(pipeline_params, job_id, template_path)
+        duplicate_id = None if force else self._find_duplicate(record)
+        if duplicate_id is not None:
+            return SubmissionResult(
+                pipeline_params=pipeline_params,
+                job_id=duplicate_id,
+                seconds=time.perf_counter() - start_time,
+                deduplicated=True,
+            )
+        try:
+            if job_request is None:
+                (job_request,) = self._get_job_template(template_path).create_requests(
+                    [job_id], [pipeline_params]
+                )
+            self._submit_job_request(job_request)
+            self._record_jobs([record])
+        except Exception as e:
+            logging.exception("Failed to submit job %s.", job_id)
+            error: Optional[str] = f"{type(e).__name__}: {e}"
+        else:
+            error = None
+        return SubmissionResult(
+            pipeline_params=pipeline_params,
+            job_id=job_id,
+            seconds=time.perf_counter() - start_time,
+            error=error,
+        )
+
+    def run_many(
+        self,
+        param_sets: Sequence[Dict[str, Any]],
+        max_in_flight: int = 8,
+        force: bool = False,
+    ) -> List[SubmissionResult]:
+        """Submits one pipeline job per parameter set concurrently.
+
+        Jobs are submitted without waiting for them to complete, regardless of
+        `run_config.sync`. A failure to submit one job does not affect the
+        others. With `run_config.dedupe_window` set, identical parameter sets
+        within the batch are submitted only once.
+
+        Args:
+            param_sets: Kubeflow pipeline parameters of each job.
+            max_in_flight: Maximum number of concurrent submission requests.
+            force: If True, submit every job even if identical jobs would be
+                reused according to `run_config.dedupe_window`.
+
+        Returns:
+            One result per parameter set, in the same order as `param_sets`.
+        """
+        first_indices = self._get_first_indices(param_sets, force)
+        unique_indices = sorted(set(first_indices))
+        job_ids = [
+            utils.get_job_id(self.run_config.pipeline_name) for _ in unique_indices
+        ]
+        # Fetches and parses a remote template once for the whole batch.
+        template_path = self._prepare_submission()
+        self._get_job_template(template_path)
+        with futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            unique_results = executor.map(
+                self._submit,
+                [param_sets[i] for i in unique_indices],
+                job_ids,
+                itertools.repeat(template_path),
+                itertools.repeat(force),
+            )
+            results = dict(zip(unique_indices, unique_results, strict=True))
+        return self._fill_duplicates(results, first_indices, param_sets)
+
+    def _get_first_indices(
+        self, param_sets: Sequence[Dict[str, Any]], force: bool
+    ) -> List[int]:
+        """Returns the index of the first identical parameter set of each one.
+
+        Args:
+            param_sets: Kubeflow pipeline parameters of each job.
+            force: If True, every parameter set is only identical to itself,
+                as it is if `run_config.dedupe_window` is not set.
+
+        Returns:
+            Index of the first parameter set identical to each parameter set.
+        """
+        first_indices = list(range(len(param_sets)))
+        if self.run_config.dedupe_window and not force:
+            seen: Dict[str, int] = {}
+            for i, params in enumerate(param_sets):
+                first_indices[i] = seen.setdefault(job_index.get_params_hash(params), i)
+        return first_indices
+
+    def _fill_duplicates(
+        self,
+        results: Dict[int, SubmissionResult],
+        first_indices: List[int],
+        param_sets: Sequence[Dict[str, Any]],
+    ) -> List[SubmissionResult]:
+        """Returns all results, reusing those of the first identical parameter sets.
+
+        Args:
+            results: Results of the unique parameter sets, keyed by index.
+            first_indices: Values returned by `_get_first_indices`.
+            param_sets: Kubeflow pipeline parameters of each job.
+
+        Returns:
+            One result per parameter set, in the same order as `param_sets`.
+        """
+        for i, first_index in enumerate(first_indices):
+            if i != first_index:
+                self._count("deduplicated")
+                results[i] = dataclasses.replace(
+                    results[first_index],
+                    pipeline_params=param_sets[i],
+                    seconds=0.0,
+                    deduplicated=True,
+                )
+        return [results[i] for i in range(len(param_sets))]
+
+    def _get_job_template(self, template_path: str) -> job_requests.JobTemplate:
+        """Returns the template of job requests, parsed and validated once per path."""
+        with self._job_templates_lock:
+            if template_path in self._job_templates:
+                self._job_templates.move_to_end(template_path)
+                return self._job_templates[template_path]
+            with profiling.span("run.parse_template"):
+                template = job_requests.JobTemplate(
+                    template_cache.get_template_cache().load(template_path),
+                    display_name=self.run_config.pipeline_name,
+                    pipeline_root=self.run_config.gcs_root_path,
+                    enable_caching=self.run_config.enable_caching,
+                    service_account=self.run_config.service_account,
+                    # Set by `aiplatform.init`, as `vertex.PipelineJob` does.
+                    encryption_spec_key_name=(
+                        initializer.global_config.encryption_spec_key_name
+                    ),
+                )
+            self._job_templates[template_path] = template
+            if len(self._job_templates) > _MAX_JOB_TEMPLATES:
+                self._job_templates.popitem(last=False)
+            return template
+
+    def create_job_requests(
+        self, param_sets: Sequence[Dict[str, Any]]
+    ) -> List[job_requests.JobRequest]:
+        """Binds parameter sets to the pipeline template, which is parsed once.
+
+        Every parameter set is checked against the template's input
+        definitions, so that a ValueError or TypeError is raised before any
+        job is submitted if one does not match.
+
+        Args:
+            param_sets: Kubeflow pipeline parameters of each job.
+
+        Returns:
+            One job request per parameter set, sharing the parsed template.
+        """
+        template = self._get_job_template(self._get_template_path())
+        job_ids = [utils.get_job_id(self.run_config.pipeline_name) for _ in param_sets]
+        with profiling.span("run.bind_params"):
+            return template.create_requests(job_ids, list(param_sets))
+
+    def submit_job_requests(
+        self,
+        requests: Sequence[job_requests.JobRequest],
+        max_in_flight: int = 8,
+        force: bool = False,
+    ) -> List[SubmissionResult]:
+        """Submits job requests concurrently, like `run_many`.
+
+        Args:
+            requests: Job requests from `create_job_requests`.
+            max_in_flight: Maximum number of concurrent submission requests.
+            force: If True, submit every job even if identical jobs would be
+                reused according to `run_config.dedupe_window`.
+
+        Returns:
+            One result per job request, in the same order as `requests`.
+        """
+        param_sets = [request.pipeline_params for request in requests]
+        first_indices = self._get_first_indices(param_sets, force)
+        unique_indices = sorted(set(first_indices))
+        template_path = self._prepare_submission()
+        with futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            unique_results = executor.map(
+                lambda i: self._submit(
+                    param_sets[i],
+                    requests[i].job_id,
+                    template_path,
+                    force=force,
+                    job_request=requests[i],
+                ),
+                unique_indices,
+            )
+            results = dict(zip(unique_indices, unique_results, strict=True))
+        return self._fill_duplicates(results, first_indices, param_sets)
+
+    def run_batch(
+        self,
+        param_sets: Sequence[Dict[str, Any]],
+        max_in_flight: int = 8,
+        force: bool = False,
+    ) -> List[SubmissionResult]:
+        """Submits one pipeline job per parameter set from a template parsed once.
+
+        Unlike `run_many`, which checks each parameter set when its job is
+        submitted and reports mismatches as failed submissions, all parameter
+        sets are checked before any job is submitted. See
+        `create_job_requests` and `submit_job_requests`.
+
+        Args:
+            param_sets: Kubeflow pipeline parameters of each job.
+            max_in_flight: Maximum number of concurrent submission requests.
+            force: If True, submit every job even if identical jobs would be
+                reused according to `run_config.dedupe_window`.
+
+        Returns:
+            One result per parameter set, in the same order as `param_sets`.
+        """
+        return self.submit_job_requests(
+            self.create_job_requests(param_sets), max_in_flight, force=force
+        )
+
+    def _create_client(self) -> pipeline_service.PipelineServiceClient:
+        """Returns a new client of the Vertex AI Pipelines API."""
+        with profiling.span("run.create_api_client"):
+            return pipeline_service.PipelineServiceClient(
+                credentials=self.credentials,
+                client_options=initializer.global_config.get_client_options(
+                    location_override=self.run_config.location
+                ),
+            )
+
+    def _create_async_client(self) -> pipeline_service.PipelineServiceAsyncClient:
+        """Returns a new asyncio client of the Vertex AI Pipelines API."""
+        with profiling.span("run.create_api_client"):
+            return pipeline_service.PipelineServiceAsyncClient(
+                credentials=self.credentials,
+                client_options=initializer.global_config.get_client_options(
+                    location_override=self.run_config.location
+                ),
+            )
+
+    def _get_async_client(self) -> pipeline_service.PipelineServiceAsyncClient:
+        """Returns the asyncio API client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._create_async_client()
+        return client
+
+    def _get_parent(self) -> str:
+        """Returns the resource name of the location of pipeline jobs."""
+        return pipeline_service.PipelineServiceAsyncClient.common_location_path(
+            self.project or initializer.global_config.project,
+            self.run_config.location,
+        )
+
+    def _get_job_name(self, job_id: str) -> str:
+        """Returns the resource name of a pipeline job."""
+        return pipeline_service.PipelineServiceAsyncClient.pipeline_job_path(
+            self.project or initializer.global_config.project,
+            self.run_config.location,
+            job_id,
+        )
+
+    def _prepare_submission(self) -> str:
+        """Returns the template path, creating the pipeline root bucket once."""
+        # `PipelineJob.submit` does the same for every job.
+        if not self._bucket_created:
+            try:
+                gcs_utils.create_gcs_bucket_for_pipeline_artifacts_if_it_does_not_exist(
+                    output_artifacts_gcs_dir=self.run_config.gcs_root_path,
+                    service_account=self.run_config.service_account,
+                    project=self.project,
+                    location=self.run_config.location,
+                    credentials=self.credentials,
+                )
+            except Exception:
+                logging.exception("Failed to get or create the pipeline root bucket.")
+            self._bucket_created = True
+        return self._get_template_path()
+
+    def _prepare_template(self) -> str:
+        """Prepares the submission and hashes and parses the template once."""
+        template_path = self._prepare_submission()
+        self._get_template_digest(template_path)
+        self._get_job_template(template_path)
+        return template_path
+
+    async def _prepare_submission_async(self) -> str:
+        """Runs `_prepare_template` in a thread, once per event loop.
+
+        The result is kept for later calls, and concurrent callers share a
+        pending preparation. It is only prepared again after a failure.
+
+        Returns:
+            Local path of the pipeline template.
+        """
+        loop = asyncio.get_running_loop()
+        preparation = self._async_preparations.get(loop)
+        if preparation is None:
+            preparation = loop.run_in_executor(None, self._prepare_template)
+            self._async_preparations[loop] = preparation
+
+            def forget_failed(future: asyncio.Future) -> None:
+                if future.cancelled() or future.exception() is not None:
+                    self._async_preparations.pop(loop, None)
+
+            preparation.add_done_callback(forget_failed)
+        # Cancelling one caller must not cancel the preparation of the others.
+        return await asyncio.shield(preparation)
+
+    async def _submit_job_request_async(
+        self, job_request: job_requests.JobRequest
+    ) -> None:
+        """Submits a job request like `_submit_job_request`, without blocking."""
+        client = self._get_async_client()
+        job_id = job_request.job_id
+        request = job_request.to_request(self._get_parent())
+        attempt = 0
+        while True:
+            attempt += 1
+            delay = self._reserve()
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                await client.create_pipeline_job(request=request)
+            except Exception as e:
+                retry_delay = self._handle_submit_error(job_id, attempt, e)
+                if retry_delay is None:
+                    return
+                await asyncio.sleep(retry_delay)
+                continue
+            self._count("submitted")
+            return
+
+    async def run_async(
+        self, pipeline_params: Dict[str, Any], force: bool = False
+    ) -> str:
+        """Submits a pipeline job without blocking the event loop.
+
+        The job is not waited for, regardless of `run_config.sync`. Follow its
+        progress with `watch_async`. Cancelling the call cancels the pending
+        request, in which case the job may or may not have been created.
+
+        The template is fetched, hashed and parsed in a thread once, and
+        shared by all jobs, so that each job only binds its parameters on the
+        event loop.
+
+        Args:
+            pipeline_params: Kubeflow pipeline parameters
+            force: If True, submit the job even if an identical job would be
+                reused according to `run_config.dedupe_window`.
+
+        Returns:
+            Vertex Pipelines job ID.
+        """
+        loop = asyncio.get_running_loop()
+        job_id = utils.get_job_id(self.run_config.pipeline_name)
+        template_path = await self._prepare_submission_async()
+        record = self._create_job_record(pipeline_params, job_id, template_path)
+        if self.run_config.dedupe_window and not force:
+            duplicate_id = await loop.run_in_executor(
+                None, self._find_duplicate, record
+            )
+            if duplicate_id is not None:
+                return duplicate_id
+        (job_request,) = self._get_job_template(template_path).create_requests(
+            [job_id], [pipeline_params]
+        )
+        await self._submit_job_request_async(job_request)
+        logging.info("Submitted job %s.", job_id)
+        await loop.run_in_executor(None, self._record_jobs, [record])
+        return job_id
+
+    async def watch_async(
+        self,
+        job_id: str,
+        initial_interval: float = 5.0,
+        max_interval: float = 60.0,
+        multiplier: float = 2.0,
+    ) -> AsyncIterator[str]:
+        """Yields the state of a pipeline job whenever it changes.
+
+        The polling interval grows by `multiplier` while the state is
+        unchanged, and is reset to `initial_interval` whenever it changes.
+
+        Args:
+            job_id: Vertex Pipelines job ID.
+            initial_interval: Initial seconds between polls.
+            max_interval: Maximum seconds between polls.
+            multiplier: Factor by which the interval grows while nothing changes.
+
+        Yields:
+            State names such as `PIPELINE_STATE_RUNNING`, ending with a terminal
+            state.
+        """
+        name = self._get_job_name(job_id)
+        state = None
+        interval = initial_interval
+        while True:
+            job = await self._get_async_client().get_pipeline_job(name=name)
+            if job.state.name != state:
+                state = job.state.name
+                interval = initial_interval
+                if state in job_watcher.TERMINAL_STATES:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._record_job_state, job_id, job
+                    )
+                yield state
+                if state in job_watcher.TERMINAL_STATES:
+                    return
+            else:
+                interval = min(interval * multiplier, max_interval)
+            await asyncio.sleep(interval)
+
+    async def cancel_async(self, job_id: str) -> None:
+        """Requests cancellation of a pipeline job.
+
+        Cancellation is asynchronous on the server. The job ends in the
+        `PIPELINE_STATE_CANCELLED` state unless it completes first.
+
+        Args:
+            job_id: Vertex Pipelines job ID.
+        """
+        await self._get_async_client().cancel_pipeline_job(
+            name=self._get_job_name(job_id)
+        )
+
 
 def run(
     run_config: PipelineRunConfig,
     pipeline_params: Dict[str, Any],
+    force: bool = False,
 ) -> str:
     """Runs a Kubeflow pipeline given by specification file.
 
     Args:
         run_config: Vertex Pipelines pipeline run configuration.
         pipeline_params: Kubeflow pipeline parameters
+        force: If True, submit the job even if an identical job would be
+            reused according to `run_config.dedupe_window`.
 
     Returns:
         Vertex Pipelines job ID.
     """
-    job_id = utils.get_job_id(run_config.pipeline_name)
-    vertex.PipelineJob(
-        display_name=run_config.pipeline_name,
-        job_id=job_id,
-        template_path=run_config.pipeline_path,
-        pipeline_root=run_config.gcs_root_path,
-        parameter_values=pipeline_params,
-        enable_caching=run_config.enable_caching,
-        location=run_config.location,
-    ).run(
-        service_account=run_config.service_account,
-        sync=run_config.sync,
+    return PipelineRunner(run_config).run(pipeline_params, force=force)
+
+
+def run_many(
+    run_config: PipelineRunConfig,
+    param_sets: Sequence[Dict[str, Any]],
+    max_in_flight: int = 8,
+) -> List[SubmissionResult]:
+    """Submits one pipeline job per parameter set concurrently.
+
+    See `PipelineRunner.run_many`.
+
+    Args:
+        run_config: Vertex Pipelines pipeline run configuration.
+        param_sets: Kubeflow pipeline parameters of each job.
+        max_in_flight: Maximum number of concurrent submission requests.
+
+    Returns:
+        One result per parameter set, in the same order as `param_sets`.
+    """
+    return PipelineRunner(run_config).run_many(param_sets, max_in_flight=max_in_flight)
+
+
+def run_batch(
+    run_config: PipelineRunConfig,
+    param_sets: Sequence[Dict[str, Any]],
+    max_in_flight: int = 8,
+    force: bool = False,
+) -> List[SubmissionResult]:
+    """Submits one pipeline job per parameter set from a template parsed once.
+
+    See `PipelineRunner.run_batch`.
+
+    Args:
+        run_config: Vertex Pipelines pipeline run configuration.
+        param_sets: Kubeflow pipeline parameters of each job.
+        max_in_flight: Maximum number of concurrent submission requests.
+        force: If True, submit every job even if identical jobs would be
+            reused according to `run_config.dedupe_window`.
+
+    Returns:
+        One result per parameter set, in the same order as `param_sets`.
+    """
+    return PipelineRunner(run_config).run_batch(
+        param_sets, max_in_flight=max_in_flight, force=force
     )
-    return job_id
+
+
+async def run_async(
+    run_config: PipelineRunConfig,
+    pipeline_params: Dict[str, Any],
+) -> str:
+    """Submits a pipeline job without blocking the event loop.
+
+    See `PipelineRunner.run_async`. Each call discovers credentials and sets up
+    API clients anew, so submit many jobs through one `PipelineRunner`.
+
+    Args:
+        run_config: Vertex Pipelines pipeline run configuration.
+        pipeline_params: Kubeflow pipeline parameters
+
+    Returns:
+        Vertex Pipelines job ID.
+    """
+    loop = asyncio.get_running_loop()
+    runner = await loop.run_in_executor(None, PipelineRunner, run_config)
+    return await runner.run_async(pipeline_params)
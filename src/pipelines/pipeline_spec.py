@@ -0,0 +1,120 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reads the task graph of compiled pipeline specifications."""
+
+import collections
+from typing import Any, Dict, List, Set
+
+
+def get_pipeline_spec(template: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the pipeline spec of a compiled pipeline template.
+
+    Args:
+        template: Parsed JSON file written by `pipeline_compiler.compile`,
+            either a pipeline job with a `pipelineSpec` or a bare pipeline spec.
+
+    Returns:
+        Pipeline spec, with `root`, `components` and `deploymentSpec` keys.
+    """
+    return template.get("pipelineSpec", template)
+
+
+def get_task_dependencies(
+    dag: Dict[str, Any], explicit: bool = True
+) -> Dict[str, Set[str]]:
+    """Returns the upstream tasks of each task in a DAG spec.
+
+    Args:
+        dag: The `dag` of a component spec, e.g. that of the pipeline `root`.
+        explicit: If False, only include tasks whose outputs are consumed,
+            leaving out dependencies that only order tasks, e.g. from `after`.
+
+    Returns:
+        Names of the tasks each task depends on, keyed by task name. By default
+        both explicit dependencies and tasks whose outputs are consumed are
+        included.
+    """
+    dependencies = {}
+    for name, task in dag.get("tasks", {}).items():
+        upstream = set(task.get("dependentTasks", [])) if explicit else set()
+        inputs = task.get("inputs", {})
+        for parameter in inputs.get("parameters", {}).values():
+            if "taskOutputParameter" in parameter:
+                upstream.add(parameter["taskOutputParameter"]["producerTask"])
+        for artifact in inputs.get("artifacts", {}).values():
+            if "taskOutputArtifact" in artifact:
+                upstream.add(artifact["taskOutputArtifact"]["producerTask"])
+        dependencies[name] = upstream
+    return dependencies
+
+
+def get_levels(dependencies: Dict[str, Set[str]]) -> List[List[str]]:
+    """Groups tasks by the length of their longest chain of upstream tasks.
+
+    Tasks are visited once with Kahn's algorithm, so this takes linear time in
+    the number of tasks and dependencies.
+
+    Args:
+        dependencies: Upstream tasks of each task, keyed by task name.
+
+    Returns:
+        Task names of each level, sorted by name. Tasks of the first level
+        have no upstream tasks, and every other task comes one level after
+        its last upstream task.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle or an unknown task.
+    """
+    downstream: Dict[str, List[str]] = collections.defaultdict(list)
+    for name, upstream in dependencies.items():
+        unknown = [task for task in upstream if task not in dependencies]
+        if unknown:
+            raise ValueError(f"Task {name} depends on unknown tasks {sorted(unknown)}.")
+        for upstream_name in upstream:
+            downstream[upstream_name].append(name)
+    remaining = {name: len(upstream) for name, upstream in dependencies.items()}
+    level = sorted(name for name, count in remaining.items() if not count)
+    levels = []
+    num_visited = 0
+    while level:
+        levels.append(level)
+        num_visited += len(level)
+        next_level = []
+        for name in level:
+            for downstream_name in downstream[name]:
+                remaining[downstream_name] -= 1
+                if not remaining[downstream_name]:
+                    next_level.append(downstream_name)
+        level = sorted(next_level)
+    if num_visited < len(dependencies):
+        cyclic = sorted(name for name, count in remaining.items() if count)
+        raise ValueError(f"Tasks {cyclic} have cyclic dependencies.")
+    return levels
+
+
+def topological_sort(dependencies: Dict[str, Set[str]]) -> List[str]:
+    """Orders tasks so that every task comes after the tasks it depends on.
+
+    Ties are broken by task name, so the order is deterministic. A ValueError
+    is raised, as by `get_levels`, if the dependencies contain a cycle or an
+    unknown task.
+
+    Args:
+        dependencies: Upstream tasks of each task, keyed by task name.
+
+    Returns:
+        Task names in dependency order, level by level as in `get_levels`.
+    """
+    return [name for level in get_levels(dependencies) for name in level]
@@ -0,0 +1,212 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Records how long each phase of a command takes.
+
+Phases are marked with `span`, which does nothing unless profiling has been
+enabled with `enable`, e.g. by the `--profile` option of the CLI.
+"""
+
+import collections
+import contextlib
+import dataclasses
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclasses.dataclass
+class Span:
+    """A timed phase.
+
+    Attributes:
+        name: Name of the phase.
+        start: Seconds since profiling was enabled.
+        duration: Duration in seconds.
+        thread_id: Identifier of the thread the phase ran in.
+        depth: Number of enclosing spans in the same thread.
+    """
+
+    name: str
+    start: float
+    duration: float
+    thread_id: int
+    depth: int
+
+
+class Profiler:
+    """Collects spans from all threads, and optionally a cProfile profile."""
+
+    def __init__(self, use_cprofile: bool = False) -> None:
+        """Initializes the profiler and starts timing.
+
+        Args:
+            use_cprofile: If True, also profile all function calls made in the
+                current thread with cProfile.
+        """
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._cprofile: Any = None
+        if use_cprofile:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the profiler was created."""
+        return time.perf_counter() - self._origin
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Times the enclosed block as a span named `name`.
+
+        Args:
+            name: Name of the phase.
+
+        Yields:
+            Nothing.
+        """
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter()
+            self._local.depth = depth
+            span = Span(
+                name=name,
+                start=start_time - self._origin,
+                duration=end_time - start_time,
+                thread_id=threading.get_ident(),
+                depth=depth,
+            )
+            with self._lock:
+                self.spans.append(span)
+
+    def stop(self) -> None:
+        """Stops cProfile profiling, if it was enabled."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+    def format_breakdown(self) -> str:
+        """Returns a table of the total time spent in each phase.
+
+        Spans with the same name are aggregated. Phases are listed in the order
+        they first started and indented below the phases enclosing them.
+
+        Returns:
+            Human-readable table, one phase per line.
+        """
+        totals: Dict[str, float] = collections.defaultdict(float)
+        counts: Dict[str, int] = collections.defaultdict(int)
+        first_seen: Dict[str, Tuple[float, int]] = {}
+        for span in self.spans:
+            totals[span.name] += span.duration
+            counts[span.name] += 1
+            if span.name not in first_seen or span.start < first_seen[span.name][0]:
+                first_seen[span.name] = (span.start, span.depth)
+        elapsed = self.elapsed
+        lines = [f"{'Phase':<40} {'Calls':>6} {'Seconds':>9} {'%':>6}"]
+        for name, (_, depth) in sorted(first_seen.items(), key=lambda x: x[1][0]):
+            label = "  " * depth + name
+            share = 100 * totals[name] / elapsed if elapsed else 0.0
+            lines.append(
+                f"{label:<40} {counts[name]:>6} {totals[name]:>9.3f} {share:>6.1f}"
+            )
+        lines.append(f"{'Total':<40} {'':>6} {elapsed:>9.3f} {100.0:>6.1f}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Writes spans as Chrome trace events, viewable in `chrome://tracing`.
+
+        Args:
+            path: Output JSON file path.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+            }
+            for span in self.spans
+        ]
+        with open(path, "w") as fp:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
+
+    def write_pstats(self, path: str) -> None:
+        """Writes cProfile statistics, readable with `pstats.Stats`.
+
+        Args:
+            path: Output file path.
+
+        Raises:
+            RuntimeError: If the profiler was created without cProfile.
+        """
+        if self._cprofile is None:
+            raise RuntimeError("cProfile was not enabled for this profiler.")
+        self._cprofile.dump_stats(path)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def enable(use_cprofile: bool = False) -> Profiler:
+    """Starts recording spans in this process.
+
+    Args:
+        use_cprofile: If True, also profile all function calls with cProfile.
+
+    Returns:
+        The profiler that records spans.
+    """
+    global _profiler
+    _profiler = Profiler(use_cprofile=use_cprofile)
+    return _profiler
+
+
+def disable() -> None:
+    """Stops recording spans."""
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+    _profiler = None
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[None]:
+    """Times the enclosed block as a phase named `name` if profiling is enabled.
+
+    Args:
+        name: Name of the phase.
+
+    Yields:
+        Nothing.
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+    with profiler.span(name):
+        yield
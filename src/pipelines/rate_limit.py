@@ -0,0 +1,107 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client-side rate limiting and retries of API requests."""
+
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from google.api_core import exceptions
+
+# Errors after which a request may succeed if retried later: quota and rate
+# limits, and transient server or network failures.
+RETRYABLE_ERRORS = (
+    exceptions.TooManyRequests,
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.InternalServerError,
+    exceptions.DeadlineExceeded,
+    exceptions.Aborted,
+)
+
+
+class TokenBucket:
+    """Token bucket rate limiter shared by threads or asyncio tasks.
+
+    Tokens accumulate at `rate` per second up to `capacity`, and each request
+    takes one. Instead of blocking, `reserve` returns how long the caller
+    should wait before sending its request, so the bucket can be used from
+    both threads and coroutines.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initializes a full bucket.
+
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum number of tokens, i.e. the largest burst of
+                requests sent without waiting. Defaults to `max(1, rate)`.
+            clock: Function returning the current time in seconds.
+
+        Raises:
+            ValueError: If `rate` or `capacity` is not positive.
+        """
+        if capacity is None:
+            capacity = max(1.0, rate)
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Rate and capacity must be positive.")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns the seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+            # Tokens go negative while requests are waiting for them.
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+
+def get_backoff(
+    attempt: int,
+    initial: float = 1.0,
+    maximum: float = 60.0,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """Returns a randomized delay before retrying a failed request.
+
+    Delays grow exponentially with the number of attempts and are drawn
+    uniformly between zero and the exponential bound ("full jitter"), so that
+    clients throttled at the same time do not retry at the same time.
+
+    Args:
+        attempt: Number of attempts that failed so far, starting at 1.
+        initial: Upper bound of the delay after the first attempt, in seconds.
+        maximum: Upper bound of any delay, in seconds.
+        rng: Random number generator. Defaults to the `random` module's.
+
+    Returns:
+        Delay in seconds.
+    """
+    bound = min(maximum, initial * 2 ** (attempt - 1))
+    return (rng or random).uniform(0, bound)  # noqa: S311
@@ -0,0 +1,373 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reports where the wall-clock time of a finished pipeline run went.
+
+Task timings are read from the job details of a Vertex AI Pipelines job,
+either fetched from the API or loaded from a saved JSON file, and combined
+with the task graph of the compiled pipeline spec to find the critical path.
+"""
+
+import dataclasses
+import datetime
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud import aiplatform as vertex
+
+from pipelines import pipeline_spec
+
+# `datetime.fromisoformat` accepts neither `Z` nor the nanoseconds that the API
+# may return, so the fraction and offset are parsed separately.
+_TIMESTAMP_PATTERN = re.compile(r"(.*?)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)?")
+
+
+@dataclasses.dataclass
+class TaskTiming:
+    """Timing of a single task of a pipeline run.
+
+    Times are in seconds since the run started.
+
+    Attributes:
+        name: Task name, as in the pipeline spec. Tasks nested in loops or in
+            different sub-DAGs may share a name.
+        state: Final task state, e.g. `SUCCEEDED` or `SKIPPED`.
+        create_time: When the task was scheduled.
+        start_time: When the task started executing, if it did.
+        end_time: When the task ended, if it did.
+        upstream: Names of the tasks this task depends on, if it is in the
+            top-level DAG.
+        task_id: Unique ID of the task within the run.
+        top_level: Whether the task is in the top-level DAG rather than
+            nested in a condition or loop.
+    """
+
+    name: str
+    state: str
+    create_time: Optional[float]
+    start_time: Optional[float]
+    end_time: Optional[float]
+    upstream: Tuple[str, ...] = ()
+    task_id: str = ""
+    top_level: bool = True
+
+    @property
+    def queued_seconds(self) -> Optional[float]:
+        """Seconds between scheduling and starting the task."""
+        if self.create_time is None or self.start_time is None:
+            return None
+        return self.start_time - self.create_time
+
+    @property
+    def execution_seconds(self) -> Optional[float]:
+        """Seconds the task was executing."""
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+
+@dataclasses.dataclass
+class RunReport:
+    """Task timings and critical path of a pipeline run.
+
+    Attributes:
+        job_id: Vertex Pipelines job ID.
+        state: Final state of the job.
+        wall_seconds: Seconds from the start of the run to the end of its last
+            task.
+        tasks: Timing of each task, in order of creation.
+        critical_path: Names of the chain of tasks that determined when the run
+            ended, each task being the last upstream task of the next to end.
+        average_parallelism: Total execution time of all tasks divided by
+            `wall_seconds`.
+        max_parallelism: Maximum number of tasks executing at the same time.
+    """
+
+    job_id: str
+    state: str
+    wall_seconds: float
+    tasks: List[TaskTiming]
+    critical_path: List[str]
+    average_parallelism: float
+    max_parallelism: int
+
+    @property
+    def critical_path_seconds(self) -> float:
+        """Seconds from the start of the run to the end of the critical path."""
+        if not self.critical_path:
+            return 0.0
+        return self._get_task(self.critical_path[-1]).end_time or 0.0
+
+    def _get_task(self, name: str) -> TaskTiming:
+        """Returns the timing of the top-level task with the given name."""
+        return next(task for task in self.tasks if task.top_level and task.name == name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the report as a JSON-serializable dictionary."""
+        data = dataclasses.asdict(self)
+        data["critical_path_seconds"] = self.critical_path_seconds
+        for task_data, task in zip(data["tasks"], self.tasks, strict=True):
+            task_data["queued_seconds"] = task.queued_seconds
+            task_data["execution_seconds"] = task.execution_seconds
+        return data
+
+    def format_breakdown(self) -> str:
+        """Returns a human-readable table of task timings and a summary.
+
+        Returns:
+            The report, one task per line. Tasks on the critical path are marked
+            with `*`.
+        """
+
+        def seconds(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value:.1f}"
+
+        lines = [
+            f"Job {self.job_id} {self.state} in {self.wall_seconds:.1f}s.",
+            "",
+            f"  {'Task':<38} {'State':<10} {'Start':>8} {'Queued':>8}"
+            f" {'Running':>8}",
+        ]
+        critical = set(self.critical_path)
+        for task in self.tasks:
+            marker = "*" if task.top_level and task.name in critical else " "
+            lines.append(
+                f"{marker} {task.name:<38} {task.state:<10}"
+                f" {seconds(task.start_time):>8} {seconds(task.queued_seconds):>8}"
+                f" {seconds(task.execution_seconds):>8}"
+            )
+        queued = sum(
+            self._get_task(name).queued_seconds or 0.0 for name in self.critical_path
+        )
+        lines += [
+            "",
+            f"Critical path ({self.critical_path_seconds:.1f}s, {queued:.1f}s"
+            f" queued): {' -> '.join(self.critical_path) or '-'}",
+            f"Parallelism: {self.average_parallelism:.2f} average,"
+            f" {self.max_parallelism} max",
+        ]
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Writes task timings as Chrome trace events.
+
+        Each task is shown as a queued and an executing phase. Tasks are spread
+        over as few rows as possible without overlapping.
+
+        Args:
+            path: Output JSON file path.
+        """
+        events: List[Dict[str, Any]] = []
+        row_ends: List[float] = []
+        tasks = [task for task in self.tasks if task.create_time is not None]
+        for task in sorted(tasks, key=lambda t: t.create_time or 0.0):
+            start = task.create_time or 0.0
+            times = (start, task.start_time, task.end_time)
+            end = max(time for time in times if time is not None)
+            row = next((i for i, e in enumerate(row_ends) if e <= start), None)
+            if row is None:
+                row = len(row_ends)
+                row_ends.append(end)
+            row_ends[row] = end
+            args = {"state": task.state, "upstream": list(task.upstream)}
+            if task.queued_seconds is not None:
+                events.append(
+                    _trace_event(f"{task.name} (queued)", start, task.queued_seconds)
+                )
+                events[-1].update(tid=row, cat="queued", args=args)
+            if task.execution_seconds is not None:
+                events.append(
+                    _trace_event(
+                        task.name, task.start_time or 0.0, task.execution_seconds
+                    )
+                )
+                events[-1].update(tid=row, cat="running", args=args)
+        with open(path, "w") as fp:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp)
+
+
+def _trace_event(name: str, start: float, duration: float) -> Dict[str, Any]:
+    """Returns a Chrome trace event of a complete phase."""
+    return {"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": 0}
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Returns seconds since the epoch of an RFC 3339 timestamp."""
+    if not value:
+        return None
+    match = _TIMESTAMP_PATTERN.fullmatch(value)
+    if match is None:
+        raise ValueError(f"Invalid timestamp {value!r}.")
+    base, fraction, offset = match.groups()
+    if offset in (None, "Z"):
+        offset = "+00:00"
+    timestamp = datetime.datetime.fromisoformat(base + offset).timestamp()
+    return timestamp + float(f"0.{fraction or 0}")
+
+
+def _get_critical_path(tasks: Dict[str, TaskTiming]) -> List[str]:
+    """Returns the chain of tasks that ended last, from first to last.
+
+    Args:
+        tasks: Timings of the top-level tasks, keyed by task name.
+
+    Returns:
+        Task names of the chain.
+    """
+    ended = [task for task in tasks.values() if task.end_time is not None]
+    if not ended:
+        return []
+    task = max(ended, key=lambda t: t.end_time or 0.0)
+    path = [task.name]
+    while True:
+        upstream = [
+            tasks[name]
+            for name in task.upstream
+            if name in tasks and tasks[name].end_time is not None
+        ]
+        if not upstream:
+            return path[::-1]
+        task = max(upstream, key=lambda t: t.end_time or 0.0)
+        path.append(task.name)
+
+
+def _get_parallelism(tasks: List[TaskTiming], wall_seconds: float) -> Tuple[float, int]:
+    """Returns the average and maximum number of tasks executing at once."""
+    changes = []
+    for task in tasks:
+        if task.start_time is not None and task.end_time is not None:
+            changes += [(task.start_time, 1), (task.end_time, -1)]
+    # Ends sort before starts at the same time, so back-to-back tasks do not
+    # count as running at once.
+    executing = peak = 0
+    for _, change in sorted(changes):
+        executing += change
+        peak = max(peak, executing)
+    busy = sum(task.execution_seconds or 0.0 for task in tasks)
+    return (busy / wall_seconds if wall_seconds else 0.0), peak
+
+
+def create_report(
+    job_details: Dict[str, Any], spec: Optional[Dict[str, Any]] = None
+) -> RunReport:
+    """Creates the timing report of a pipeline run.
+
+    Only tasks of the top-level DAG are on the critical path. Tasks nested in
+    conditions and loops are listed without dependencies, and the DAG task
+    that contains them covers their time on the critical path.
+
+    Args:
+        job_details: The pipeline job as returned by the Vertex AI API in JSON,
+            e.g. by `get_job_details` or `gcloud ai pipeline-jobs describe`.
+        spec: Compiled pipeline template or spec that defines the task graph.
+            Defaults to the spec embedded in the job details.
+
+    Returns:
+        The report.
+
+    Raises:
+        ValueError: If the job details contain no task details.
+    """
+    dag = pipeline_spec.get_pipeline_spec(spec or job_details.get("pipelineSpec", {}))
+    dependencies = pipeline_spec.get_task_dependencies(
+        dag.get("root", {}).get("dag", {})
+    )
+    task_details = job_details.get("jobDetail", {}).get("taskDetails", [])
+    if not task_details:
+        raise ValueError("The job details contain no task details.")
+    # The task of the pipeline itself is the parent of all top-level tasks.
+    parent_ids = {detail.get("parentTaskId") for detail in task_details} - {None}
+    root_ids = {
+        detail.get("taskId")
+        for detail in task_details
+        if not detail.get("parentTaskId") and detail.get("taskId") in parent_ids
+    }
+    task_details = [
+        detail for detail in task_details if detail.get("taskId") not in root_ids
+    ]
+    origin = _parse_timestamp(job_details.get("startTime")) or min(
+        _parse_timestamp(detail.get("createTime")) or float("inf")
+        for detail in task_details
+    )
+
+    def relative(value: Optional[str]) -> Optional[float]:
+        timestamp = _parse_timestamp(value)
+        return None if timestamp is None else timestamp - origin
+
+    # Iterations of loops and tasks of different sub-DAGs may share names, so
+    # only task IDs are unique.
+    top_level_parent_ids = root_ids | {None}
+    tasks: Dict[str, TaskTiming] = {}
+    for i, detail in enumerate(
+        sorted(task_details, key=lambda d: d.get("createTime", ""))
+    ):
+        name = detail["taskName"]
+        top_level = detail.get("parentTaskId") in top_level_parent_ids
+        task_id = detail.get("taskId") or str(i)
+        tasks[task_id] = TaskTiming(
+            name=name,
+            state=detail.get("state", "STATE_UNSPECIFIED"),
+            create_time=relative(detail.get("createTime")),
+            start_time=relative(detail.get("startTime")),
+            end_time=relative(detail.get("endTime")),
+            upstream=tuple(sorted(dependencies.get(name, ()))) if top_level else (),
+            task_id=task_id,
+            top_level=top_level,
+        )
+    timings = list(tasks.values())
+    wall_seconds = max((task.end_time or 0.0 for task in timings), default=0.0)
+    average_parallelism, max_parallelism = _get_parallelism(timings, wall_seconds)
+    return RunReport(
+        job_id=job_details.get("name", "").rsplit("/", 1)[-1],
+        state=job_details.get("state", "").replace("PIPELINE_STATE_", ""),
+        wall_seconds=wall_seconds,
+        tasks=timings,
+        critical_path=_get_critical_path(
+            {task.name: task for task in timings if task.top_level}
+        ),
+        average_parallelism=average_parallelism,
+        max_parallelism=max_parallelism,
+    )
+
+
+def get_job_details(
+    job_id: str, location: str, project: Optional[str] = None
+) -> Dict[str, Any]:
+    """Fetches the details of a pipeline job from Vertex AI.
+
+    Args:
+        job_id: Vertex Pipelines job ID.
+        location: GCP location of the job, e.g. us-central1.
+        project: GCP project of the job. Defaults to the environment's.
+
+    Returns:
+        The pipeline job in the JSON form accepted by `create_report`.
+    """
+    job = vertex.PipelineJob.get(job_id, project=project, location=location)
+    return job.to_dict()
+
+
+def load_job_details(path: str) -> Dict[str, Any]:
+    """Loads the details of a pipeline job saved as JSON.
+
+    Args:
+        path: JSON file with the pipeline job, e.g. as written by
+            `gcloud ai pipeline-jobs describe --format=json`.
+
+    Returns:
+        The pipeline job in the JSON form accepted by `create_report`.
+    """
+    with open(path) as fp:
+        return json.load(fp)
@@ -0,0 +1,113 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Locates the source files of pipeline modules without importing them."""
+
+import ast
+import pathlib
+from typing import Iterator, List, Optional, Set
+
+PACKAGE_NAME = "pipelines"
+
+PACKAGE_DIR = pathlib.Path(__file__).resolve().parent
+
+
+def get_module_path(module_name: str) -> Optional[pathlib.Path]:
+    """Returns the source file of a module in the `pipelines` package.
+
+    Args:
+        module_name: Module name relative to the package, e.g. `sample_pipeline`.
+
+    Returns:
+        Path to the module source file, or None if there is no such module.
+    """
+    relative_path = PACKAGE_DIR.joinpath(*module_name.split("."))
+    for candidate in (relative_path.with_suffix(".py"), relative_path / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _resolve_relative(module_name: str, level: int, is_package: bool) -> List[str]:
+    """Returns the module name parts that a relative import is relative to."""
+    parts = module_name.split(".")
+    # A module's own package is one level up, unless the module is a package.
+    drop = level - 1 if is_package else level
+    return parts[: len(parts) - drop] if drop else parts
+
+
+def _iter_names_from(
+    module_name: str, is_package: bool, node: ast.ImportFrom
+) -> Iterator[str]:
+    """Yields package-relative names that a `from ... import` may import."""
+    if node.level:
+        base = _resolve_relative(module_name, node.level, is_package)
+        if node.module:
+            base = base + node.module.split(".")
+    elif node.module and node.module.split(".")[0] == PACKAGE_NAME:
+        base = node.module.split(".")[1:]
+    else:
+        return
+    if base:
+        yield ".".join(base)
+    # `from pipelines import utils` may import either a module or a name.
+    for alias in node.names:
+        yield ".".join(base + [alias.name])
+
+
+def _iter_imported_names(
+    module_name: str, module_path: pathlib.Path, tree: ast.AST
+) -> Iterator[str]:
+    """Yields package-relative names of modules that may be imported."""
+    is_package = module_path.name == "__init__.py"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                parts = alias.name.split(".")
+                if parts[0] == PACKAGE_NAME and len(parts) > 1:
+                    yield ".".join(parts[1:])
+        elif isinstance(node, ast.ImportFrom):
+            yield from _iter_names_from(module_name, is_package, node)
+
+
+def get_local_dependencies(module_name: str) -> List[str]:
+    """Returns modules of the `pipelines` package that a module depends on.
+
+    Imports are found statically, so the modules are never executed.
+
+    Args:
+        module_name: Module name relative to the package, e.g. `sample_pipeline`.
+
+    Returns:
+        Sorted names of the module itself and all modules it transitively
+        imports from the `pipelines` package.
+
+    Raises:
+        ModuleNotFoundError: If `module_name` does not exist in the package.
+    """
+    if get_module_path(module_name) is None:
+        raise ModuleNotFoundError(f"No module named '{PACKAGE_NAME}.{module_name}'")
+    seen: Set[str] = set()
+    pending = [module_name]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        module_path = get_module_path(name)
+        if module_path is None:
+            continue
+        seen.add(name)
+        tree = ast.parse(module_path.read_bytes(), filename=str(module_path))
+        pending.extend(_iter_imported_names(name, module_path, tree))
+    return sorted(seen)
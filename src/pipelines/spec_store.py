@@ -0,0 +1,157 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Content-addressed storage of compiled pipeline specifications.
+
+Specifications are stored in canonical form as `<root>/specs/<digest>.json`,
+named after the SHA-256 digest of their content, so a stored specification
+never changes. Aliases are small objects `<root>/specs/aliases/<name>` that
+hold the digest of a specification, e.g. the latest one of a pipeline.
+
+Run configs refer to stored specifications as `sha256:<digest>` or
+`alias:<name>` in place of a path, relative to their `gcs-root-path`.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from typing import Optional
+
+import cloudpathlib as cpl
+
+DIGEST_PREFIX = "sha256:"
+
+ALIAS_PREFIX = "alias:"
+
+_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+_ALIAS_PATTERN = re.compile(r"[A-Za-z0-9][-A-Za-z0-9_.]*")
+
+# Matches the path of a stored specification, whose content never changes.
+_SPEC_PATH_PATTERN = re.compile(r".*/specs/[0-9a-f]{64}\.json")
+
+
+def canonicalize(spec: str) -> bytes:
+    """Returns a JSON specification with sorted keys and fixed formatting."""
+    return json.dumps(json.loads(spec), indent=2, sort_keys=True).encode()
+
+
+def _check_digest(digest: str) -> str:
+    """Returns a digest, raising ValueError if it is not a SHA-256 hex digest."""
+    if not _DIGEST_PATTERN.fullmatch(digest):
+        raise ValueError(f"Invalid specification digest: {digest!r}.")
+    return digest
+
+
+def check_alias(alias: str) -> str:
+    """Returns an alias, raising ValueError if it is not a valid alias name."""
+    if not _ALIAS_PATTERN.fullmatch(alias):
+        raise ValueError(f"Invalid specification alias: {alias!r}.")
+    return alias
+
+
+def get_spec_uri(root: str, digest: str) -> str:
+    """Returns the location of the stored specification with a digest."""
+    return f"{root.rstrip('/')}/specs/{_check_digest(digest)}.json"
+
+
+def get_alias_uri(root: str, alias: str) -> str:
+    """Returns the location of an alias object."""
+    return f"{root.rstrip('/')}/specs/aliases/{check_alias(alias)}"
+
+
+def is_reference(pipeline_path: str) -> bool:
+    """Returns True if a pipeline path refers to a stored specification."""
+    return pipeline_path.startswith((DIGEST_PREFIX, ALIAS_PREFIX))
+
+
+def is_content_addressed(uri: str) -> bool:
+    """Returns True if a location is that of a stored, immutable specification."""
+    return _SPEC_PATH_PATTERN.fullmatch(uri) is not None
+
+
+def put(spec: str, root: str, alias: Optional[str] = None) -> str:
+    """Stores a specification unless an identical one is already stored.
+
+    Args:
+        spec: JSON pipeline specification.
+        root: Local directory or GCS URI under which specifications are stored.
+        alias: If set, also point this alias to the specification.
+
+    Returns:
+        SHA-256 digest of the canonical specification.
+    """
+    data = canonicalize(spec)
+    digest = hashlib.sha256(data).hexdigest()
+    spec_path = cpl.AnyPath(get_spec_uri(root, digest))
+    if spec_path.exists():
+        logging.info("Pipeline specification %s is already stored.", digest)
+    else:
+        spec_path.parent.mkdir(parents=True, exist_ok=True)
+        spec_path.write_bytes(data)
+    if alias is not None:
+        set_alias(root, alias, digest)
+    return digest
+
+
+def set_alias(root: str, alias: str, digest: str) -> None:
+    """Points an alias to a stored specification, unless it already does.
+
+    Args:
+        root: Local directory or GCS URI under which specifications are stored.
+        alias: Alias name.
+        digest: SHA-256 digest of the specification.
+    """
+    alias_path = cpl.AnyPath(get_alias_uri(root, alias))
+    if get_alias(root, alias) == _check_digest(digest):
+        return
+    alias_path.parent.mkdir(parents=True, exist_ok=True)
+    alias_path.write_text(digest)
+
+
+def get_alias(root: str, alias: str) -> Optional[str]:
+    """Returns the digest an alias points to, or None if there is no such alias."""
+    alias_path = cpl.AnyPath(get_alias_uri(root, alias))
+    try:
+        return alias_path.read_text().strip()
+    except FileNotFoundError:
+        return None
+
+
+def resolve(pipeline_path: str, root: str) -> str:
+    """Returns the location of the specification a pipeline path refers to.
+
+    Args:
+        pipeline_path: `sha256:<digest>` or `alias:<name>` of a stored
+            specification, or the location of any other specification.
+        root: Local directory or GCS URI under which specifications are stored.
+
+    Returns:
+        Location of the stored specification, or `pipeline_path` itself if it
+        is not a reference.
+
+    Raises:
+        ValueError: If the reference is malformed or the alias does not exist.
+    """
+    if pipeline_path.startswith(DIGEST_PREFIX):
+        return get_spec_uri(root, pipeline_path[len(DIGEST_PREFIX) :])
+    if pipeline_path.startswith(ALIAS_PREFIX):
+        alias = pipeline_path[len(ALIAS_PREFIX) :]
+        digest = get_alias(root, alias)
+        if digest is None:
+            raise ValueError(f"No pipeline specification alias {alias!r} in {root}.")
+        return get_spec_uri(root, digest)
+    return pipeline_path
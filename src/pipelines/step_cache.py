@@ -0,0 +1,131 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Caches the outputs of pipeline tasks run locally.
+
+A task's outputs are reused when its component and all of its inputs are
+unchanged. Input artifacts are identified by the digest of their contents, so
+a task whose upstream task re-ran but produced the same outputs is reused too.
+"""
+
+import hashlib
+import io
+import json
+import os
+import pathlib
+import tarfile
+from typing import Any, Dict, Optional
+
+from pipelines import cache
+
+# Bump to invalidate existing step cache entries after format changes.
+_CACHE_KEY_VERSION = "1"
+
+_step_cache: Optional[cache.DiskCache] = None
+
+
+def get_step_cache() -> cache.DiskCache:
+    """Returns the on-disk cache of task outputs."""
+    global _step_cache
+    if _step_cache is None:
+        _step_cache = cache.DiskCache(cache.get_cache_dir("steps"))
+    return _step_cache
+
+
+def get_path_digest(path: str) -> str:
+    """Returns a digest of the contents of a file or directory tree.
+
+    Args:
+        path: Local file or directory path.
+
+    Returns:
+        Hex digest, which is the same for a missing path and an empty directory.
+    """
+    digest = hashlib.sha256()
+    root = pathlib.Path(path)
+    if root.is_file():
+        files = [root]
+    else:
+        files = (
+            sorted(p for p in root.rglob("*") if p.is_file()) if root.exists() else []
+        )
+    for file_path in files:
+        digest.update(file_path.relative_to(root).as_posix().encode())
+        digest.update(b"\0")
+        with open(file_path, "rb") as fp:
+            for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_cache_key(
+    component: Dict[str, Any],
+    container: Dict[str, Any],
+    parameters: Dict[str, Any],
+    artifact_digests: Dict[str, str],
+) -> str:
+    """Returns a digest of everything that determines a task's outputs.
+
+    Args:
+        component: Component spec of the task.
+        container: Container spec of the component's executor, which includes
+            the component's source.
+        parameters: Input parameter values of the task, keyed by input name.
+        artifact_digests: Content digests of the task's input artifacts, keyed
+            by input name.
+
+    Returns:
+        Hex digest usable as a cache key.
+    """
+    payload = {
+        "version": _CACHE_KEY_VERSION,
+        "component": component,
+        "container": container,
+        "parameters": parameters,
+        "artifacts": artifact_digests,
+    }
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def pack(task_dir: str) -> bytes:
+    """Returns an archive of the output directory of a task."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        for entry in sorted(os.listdir(task_dir)):
+            archive.add(os.path.join(task_dir, entry), arcname=entry)
+    return buffer.getvalue()
+
+
+def unpack(data: bytes, task_dir: str) -> None:
+    """Extracts an archive created by `pack` into the output directory of a task.
+
+    Args:
+        data: Archive contents.
+        task_dir: Directory to extract into.
+
+    Raises:
+        ValueError: If the archive has entries outside of `task_dir`.
+    """
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        for member in archive.getmembers():
+            parts = pathlib.PurePosixPath(member.name).parts
+            if (
+                member.name.startswith("/")
+                or ".." in parts
+                or not (member.isfile() or member.isdir())
+            ):
+                raise ValueError(f"Unexpected entry {member.name} in cached outputs.")
+        archive.extractall(task_dir)  # noqa: S202
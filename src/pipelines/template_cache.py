@@ -0,0 +1,140 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local cache of pipeline templates stored in Cloud Storage."""
+
+import collections
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import cloudpathlib as cpl
+
+from pipelines import cache
+
+_GCS_PREFIX = "gs://"
+
+
+def is_gcs_uri(uri: str) -> bool:
+    """Returns True if given URI points to Cloud Storage."""
+    return uri.startswith(_GCS_PREFIX)
+
+
+class TemplateCache:
+    """Local copies of remote pipeline templates, revalidated by etag.
+
+    Each lookup of a `gs://` template fetches only the object's etag. The
+    template is downloaded again only if the etag changed. Parsed templates
+    are also kept in memory, so repeated loads of an unchanged template are
+    not parsed again.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_size_bytes: int = cache.DEFAULT_MAX_SIZE_BYTES,
+        max_parsed: int = 16,
+    ) -> None:
+        """Initializes the cache.
+
+        Args:
+            directory: Directory where templates are stored locally.
+                Defaults to the `templates` cache directory.
+            max_size_bytes: Maximum total size of locally stored templates.
+            max_parsed: Maximum number of parsed templates kept in memory.
+        """
+        self._disk_cache = cache.DiskCache(
+            directory or cache.get_cache_dir("templates"), max_size_bytes
+        )
+        self.max_parsed = max_parsed
+        self._parsed: "collections.OrderedDict[str, Dict[str, Any]]" = (
+            collections.OrderedDict()
+        )
+
+    @property
+    def stats(self) -> cache.CacheStats:
+        """Usage counters of locally stored templates."""
+        return self._disk_cache.stats
+
+    def _fetch(self, uri: str, immutable: bool = False) -> Tuple[str, str]:
+        """Returns the version key and local path of the current template."""
+        template_path = cpl.CloudPath(uri)
+        if immutable:
+            # A template that never changes needs no revalidation.
+            key = hashlib.sha256(uri.encode()).hexdigest()
+        else:
+            etag = template_path.etag  # type: ignore[attr-defined]
+            if etag is None:
+                raise FileNotFoundError(f"Pipeline template not found: {uri}")
+            key = hashlib.sha256(f"{uri}\0{etag}".encode()).hexdigest()
+        local_path = self._disk_cache.get_path(key)
+        if local_path is None:
+            local_path = self._disk_cache.put(key, template_path.read_bytes())
+        return key, str(local_path)
+
+    def get_local_path(self, uri: str, immutable: bool = False) -> str:
+        """Returns a local path to the current version of a template.
+
+        Args:
+            uri: Template location. Only Cloud Storage URIs are cached.
+            immutable: If True, the template at `uri` never changes, so a
+                cached copy is used without checking its etag.
+
+        Returns:
+            Local path of the cached copy for Cloud Storage templates,
+            otherwise `uri` itself.
+        """
+        if not is_gcs_uri(uri):
+            return uri
+        _, local_path = self._fetch(uri, immutable=immutable)
+        return local_path
+
+    def load(self, uri: str) -> Dict[str, Any]:
+        """Returns the parsed current version of a template.
+
+        The returned template is shared between callers and must not be
+        modified.
+
+        Args:
+            uri: Local path or Cloud Storage URI of a JSON pipeline template.
+
+        Returns:
+            Parsed pipeline template.
+        """
+        if is_gcs_uri(uri):
+            key, local_path = self._fetch(uri)
+        else:
+            local_path = uri
+            key = f"{os.path.abspath(uri)}\0{os.stat(uri).st_mtime_ns}"
+        if key in self._parsed:
+            self._parsed.move_to_end(key)
+            return self._parsed[key]
+        with open(local_path) as fp:
+            template = json.load(fp)
+        self._parsed[key] = template
+        if len(self._parsed) > self.max_parsed:
+            self._parsed.popitem(last=False)
+        return template
+
+
+_template_cache: Optional[TemplateCache] = None
+
+
+def get_template_cache() -> TemplateCache:
+    """Returns the default template cache."""
+    global _template_cache
+    if _template_cache is None:
+        _template_cache = TemplateCache()
+    return _template_cache
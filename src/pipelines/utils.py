@@ -15,8 +15,26 @@
 """Utility functions."""
 
 import datetime
+import math
 import os
-from typing import Optional
+import re
+import threading
+import time
+from typing import Optional, Sequence
+
+# Crockford's base32 alphabet in lower case, which sorts like the values it
+# encodes and satisfies the character rules of Vertex job IDs.
+_BASE32_ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"
+
+# Pairs of base32 digits encoding each 10-bit value.
+_BASE32_PAIRS = [a + b for a in _BASE32_ALPHABET for b in _BASE32_ALPHABET]
+
+_ULID_RANDOM_BITS = 80
+
+# Vertex job IDs must match `[a-z][-a-z0-9]{0,127}`.
+_JOB_ID_MAX_LENGTH = 128
+_MAX_USERNAME_LENGTH = 32
+_INVALID_JOB_ID_CHARS = re.compile(r"[^-a-z0-9]+")
 
 
 def get_timestamp() -> str:
@@ -24,9 +42,73 @@ def get_timestamp() -> str:
     return datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
 
 
+def _encode_base32(value: int, num_pairs: int) -> str:
+    """Returns the lowest `2 * num_pairs` base32 digits of a value."""
+    return "".join(
+        [
+            _BASE32_PAIRS[(value >> shift) & 0x3FF]
+            for shift in range(10 * num_pairs - 10, -1, -10)
+        ]
+    )
+
+
+class _UlidGenerator:
+    """Generates ULIDs, which sort by creation time.
+
+    A ULID is a 48-bit millisecond timestamp in 10 base32 digits followed by
+    80 random bits in 16 digits. IDs generated in the same millisecond by one
+    process increment the random part of the previous ID, so they are unique
+    and increasing even if the clock does not advance or goes backwards. The
+    random part makes collisions between processes and machines negligible.
+    """
+
+    def __init__(self) -> None:
+        """Initializes the generator."""
+        self._lock = threading.Lock()
+        self._reset()
+        # A forked child must not continue the parent's sequence.
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        """Forgets the previous ID."""
+        self._last_time_ms = -1
+        self._last_random = 0
+        self._time_digits = ""
+
+    def __call__(self) -> str:
+        """Returns a new ULID."""
+        with self._lock:
+            time_ms = time.time_ns() // 1_000_000
+            random_value = self._last_random + 1
+            if time_ms > self._last_time_ms or random_value >> _ULID_RANDOM_BITS:
+                time_ms = max(time_ms, self._last_time_ms + 1)
+                random_value = int.from_bytes(os.urandom(_ULID_RANDOM_BITS // 8), "big")
+                self._time_digits = _encode_base32(time_ms, 5)
+            else:
+                time_ms = self._last_time_ms
+            self._last_time_ms = time_ms
+            self._last_random = random_value
+            time_digits = self._time_digits
+        return time_digits + _encode_base32(random_value, 8)
+
+
+get_ulid = _UlidGenerator()
+
+
+def _sanitize_job_id_part(part: str) -> str:
+    """Replaces characters not allowed in Vertex job IDs with hyphens."""
+    return _INVALID_JOB_ID_CHARS.sub("-", part.lower()).strip("-")
+
+
 def get_job_id(prefix: str, username: Optional[str] = None) -> str:
     """Generates a unique ID for a pipeline job.
 
+    IDs are unique across threads, processes and machines, even when many are
+    generated per second, and IDs with the same prefix sort by creation time.
+    They satisfy the Vertex job ID rules: at most 128 lowercase letters,
+    digits and hyphens, starting with a letter. Other characters of the prefix
+    and username are replaced with hyphens, and a long prefix is truncated.
+
     Args:
         prefix: String prefix to prepend to the job ID.
         username: Optional username to append to the job ID.
@@ -34,10 +116,34 @@ def get_job_id(prefix: str, username: Optional[str] = None) -> str:
             the USER environmental variable, if it is set.
 
     Returns:
-        ID string.
+        ID string of the form `<prefix>-<ulid>[-<username>]`.
     """
-    job_id = f"{prefix}-{get_timestamp()}"
+    suffix = get_ulid()
     username = username or os.environ.get("USER")
     if username:
-        job_id += f"-{username}"
-    return job_id
+        username = _sanitize_job_id_part(username)[:_MAX_USERNAME_LENGTH].strip("-")
+        if username:
+            suffix += f"-{username}"
+    prefix = _sanitize_job_id_part(prefix)
+    if not prefix[:1].isalpha():
+        prefix = f"job-{prefix}".rstrip("-")
+    prefix = prefix[: _JOB_ID_MAX_LENGTH - len(suffix) - 1].rstrip("-")
+    return f"{prefix}-{suffix}"
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Returns the q-th percentile of values using linear interpolation.
+
+    Args:
+        values: Non-empty sequence of values.
+        q: Percentile to compute, between 0 and 100.
+
+    Returns:
+        Percentile value.
+    """
+    sorted_values = sorted(values)
+    rank = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    weight = rank - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
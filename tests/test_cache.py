@@ -0,0 +1,69 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests `cache.py`."""
+
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from pipelines import cache
+
+
+class GetCacheDirTest(unittest.TestCase):
+    """Tests `get_cache_dir`."""
+
+    @mock.patch.dict(os.environ, {"PIPELINES_CACHE_DIR": "/some/cache"})
+    def test_env_variable(self):
+        """It places caches under PIPELINES_CACHE_DIR."""
+        output = cache.get_cache_dir("compile")
+        self.assertEqual(pathlib.Path("/some/cache/compile"), output)
+
+    @mock.patch.dict(os.environ, {"XDG_CACHE_HOME": "/xdg"})
+    def test_xdg_cache_home(self):
+        """It falls back to XDG_CACHE_HOME."""
+        os.environ.pop("PIPELINES_CACHE_DIR", None)
+        output = cache.get_cache_dir("compile")
+        self.assertEqual(pathlib.Path("/xdg/pipelines/compile"), output)
+
+
+class DiskCacheTest(unittest.TestCase):
+    """Tests `DiskCache`."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache = cache.DiskCache(self.tempdir.name, max_size_bytes=10)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_get_put(self):
+        """It returns stored values and counts hits and misses."""
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.put("key", b"value")
+        self.assertEqual(b"value", self.cache.get("key"))
+        self.assertEqual(cache.CacheStats(hits=1, misses=1), self.cache.stats)
+
+    def test_evicts_least_recently_used(self):
+        """It evicts the least recently used entries beyond the size limit."""
+        self.cache.put("old", b"1234")
+        os.utime(os.path.join(self.tempdir.name, "old"), (0, 0))
+        self.cache.put("new", b"5678")
+        self.cache.put("newest", b"9012")
+        self.assertIsNone(self.cache.get("old"))
+        self.assertEqual(b"5678", self.cache.get("new"))
+        self.assertEqual(b"9012", self.cache.get("newest"))
+        self.assertEqual(1, self.cache.stats.evictions)
@@ -0,0 +1,155 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `compile_server` module."""
+import json
+import logging
+import os
+import subprocess  # noqa: S404
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pipelines
+from pipelines import compile_server
+
+# Disables logging from objects-under-test
+logging.disable(logging.CRITICAL)
+
+
+class GetSocketPathTest(unittest.TestCase):
+    """Tests `get_socket_path` function."""
+
+    def test_env_var(self):
+        """It uses the socket path set in the environment."""
+        with mock.patch.dict(os.environ, {"PIPELINES_COMPILE_SOCKET": "/a.sock"}):
+            self.assertEqual("/a.sock", compile_server.get_socket_path())
+
+    def test_default(self):
+        """It defaults to a socket in the pipelines cache directory."""
+        env = {"PIPELINES_CACHE_DIR": "/cache"}
+        with mock.patch.dict(os.environ, env):
+            os.environ.pop("PIPELINES_COMPILE_SOCKET", None)
+            socket_path = compile_server.get_socket_path()
+        self.assertEqual("/cache/compile-server/compile.sock", socket_path)
+
+
+class RequestCompileTest(unittest.TestCase):
+    """Tests `request_compile` against a server process."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.tempdir.name, "compile.sock")
+        src_dir = os.path.dirname(os.path.dirname(pipelines.__file__))
+        env = dict(os.environ, PYTHONPATH=src_dir, PIPELINES_CACHE_DIR=cls.tempdir.name)
+        code = "from pipelines import compile_server; compile_server.serve({!r})"
+        cls.server = subprocess.Popen(  # noqa: S603
+            [sys.executable, "-c", code.format(cls.socket_path)],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 60
+        while not compile_server._is_listening(cls.socket_path):
+            if cls.server.poll() is not None or time.monotonic() > deadline:
+                cls.server.kill()
+                cls.tempdir.cleanup()
+                raise RuntimeError("The compile server did not start.")
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+        cls.tempdir.cleanup()
+
+    def test_compile(self):
+        """It compiles the pipeline in the server."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            package_path = os.path.join(tempdir, "pipeline.json")
+            stats = compile_server.request_compile(
+                "sample_pipeline",
+                "pipeline",
+                package_path,
+                use_cache=False,
+                socket_path=self.socket_path,
+            )
+            with open(package_path) as fp:
+                self.assertIn("pipelineSpec", json.load(fp))
+        self.assertEqual({"cache_hits": 0, "cache_misses": 0}, stats)
+
+    def test_relative_path(self):
+        """It resolves relative paths against the caller's directory."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            cwd = os.getcwd()
+            os.chdir(tempdir)
+            self.addCleanup(os.chdir, cwd)
+            compile_server.request_compile(
+                "sample_pipeline", "pipeline", "p.json", socket_path=self.socket_path
+            )
+            self.assertTrue(os.path.isfile(os.path.join(tempdir, "p.json")))
+
+    def test_compile_error(self):
+        """It raises the error that the server failed with."""
+        with self.assertRaisesRegex(compile_server.CompileServerError, "ValueError"):
+            compile_server.request_compile(
+                "sample_pipeline", "pipeline", "p.txt", socket_path=self.socket_path
+            )
+
+    def test_already_listening(self):
+        """It refuses to start a second server on the same socket."""
+        with self.assertRaisesRegex(RuntimeError, "already listening"):
+            compile_server.serve(self.socket_path)
+
+
+class NoServerTest(unittest.TestCase):
+    """Tests `request_compile` without a server."""
+
+    def test_no_server(self):
+        """It returns None if no server is running."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            socket_path = os.path.join(tempdir, "compile.sock")
+            result = compile_server.request_compile(
+                "module", "pipeline", "pipeline.json", socket_path=socket_path
+            )
+        self.assertIsNone(result)
+
+    def test_stale_socket(self):
+        """It returns None if the socket is left over from a stopped server."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            socket_path = os.path.join(tempdir, "compile.sock")
+            with compile_server._ForkingUnixStreamServer(socket_path, None):
+                pass
+            result = compile_server.request_compile(
+                "module", "pipeline", "pipeline.json", socket_path=socket_path
+            )
+        self.assertIsNone(result)
+
+    def test_invalid_socket_path(self):
+        """It returns None if the socket cannot be connected to at all."""
+        socket_path = os.path.join(tempfile.gettempdir(), "x" * 200, "compile.sock")
+        result = compile_server.request_compile(
+            "module", "pipeline", "pipeline.json", socket_path=socket_path
+        )
+        self.assertIsNone(result)
+        with mock.patch.object(
+            compile_server.socket.socket, "connect", side_effect=TimeoutError()
+        ):
+            result = compile_server.request_compile(
+                "module", "pipeline", "pipeline.json", socket_path=socket_path
+            )
+        self.assertIsNone(result)
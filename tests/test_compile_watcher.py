@@ -0,0 +1,146 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `compile_watcher` module."""
+import json
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import pipelines
+from pipelines import compile_watcher
+from pipelines import pipeline_compiler
+from pipelines import sources
+
+# Disables logging from objects-under-test
+logging.disable(logging.CRITICAL)
+
+_HELPER_SOURCE = """
+from kfp.v2 import dsl
+
+
+@dsl.component(base_image="{image}")
+def step(message: str) -> str:
+    return message
+"""
+
+_PIPELINE_SOURCE = """
+import kfp
+
+from pipelines.watched_helper import step
+
+
+@kfp.dsl.pipeline(name="{name}")
+def pipeline(message: str) -> None:
+    step(message)
+"""
+
+_OTHER_SOURCE = """
+import kfp
+from kfp.v2 import dsl
+
+
+@dsl.component
+def other_step(message: str) -> str:
+    return message
+
+
+@kfp.dsl.pipeline(name="other")
+def pipeline(message: str) -> None:
+    other_step(message)
+"""
+
+
+class CompileWatcherTest(unittest.TestCase):
+    """Tests `CompileWatcher`."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.package_dir = pathlib.Path(self.tempdir.name, "package")
+        self.package_dir.mkdir()
+        self._write("watched_helper", _HELPER_SOURCE.format(image="python:3.9"))
+        self._write("watched_pipeline", _PIPELINE_SOURCE.format(name="watched"))
+        self._write("watched_other", _OTHER_SOURCE)
+        mock.patch.object(
+            pipelines, "__path__", [*pipelines.__path__, str(self.package_dir)]
+        ).start()
+        mock.patch.object(sources, "PACKAGE_DIR", self.package_dir).start()
+        mock.patch.dict(
+            os.environ,
+            {"PIPELINES_CACHE_DIR": os.path.join(self.tempdir.name, "cache")},
+        ).start()
+        mock.patch.object(pipeline_compiler, "_compile_cache", None).start()
+        self.tasks = [
+            pipeline_compiler.CompileTask(
+                module_name, "pipeline", self._output_path(module_name)
+            )
+            for module_name in ("watched_pipeline", "watched_other")
+        ]
+        self.watcher = compile_watcher.CompileWatcher(self.tasks)
+
+    def tearDown(self):
+        mock.patch.stopall()
+        for module_name in ("watched_helper", "watched_pipeline", "watched_other"):
+            sys.modules.pop(f"pipelines.{module_name}", None)
+        self.tempdir.cleanup()
+
+    def _write(self, module_name: str, source: str):
+        (self.package_dir / f"{module_name}.py").write_text(source)
+
+    def _output_path(self, module_name: str) -> str:
+        return os.path.join(self.tempdir.name, f"{module_name}.json")
+
+    def _read_image(self, module_name: str) -> str:
+        with open(self._output_path(module_name)) as fp:
+            spec = json.load(fp)
+        executors = spec["pipelineSpec"]["deploymentSpec"]["executors"]
+        (executor,) = executors.values()
+        return executor["container"]["image"]
+
+    def test_compile_all(self):
+        """It compiles all pipelines."""
+        results = self.watcher.compile_all()
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual("python:3.9", self._read_image("watched_pipeline"))
+        self.assertTrue(os.path.exists(self._output_path("watched_other")))
+
+    def test_poll_unchanged(self):
+        """It compiles nothing if no source changed."""
+        self.watcher.compile_all()
+        self.assertEqual([], self.watcher.poll())
+
+    def test_poll_changed_dependency(self):
+        """It recompiles only pipelines depending on a changed module."""
+        self.watcher.compile_all()
+        self._write("watched_helper", _HELPER_SOURCE.format(image="python:3.10"))
+        results = self.watcher.poll()
+        self.assertEqual([self.tasks[0]], [result.task for result in results])
+        self.assertTrue(results[0].ok)
+        self.assertEqual("python:3.10", self._read_image("watched_pipeline"))
+        self.assertEqual([], self.watcher.poll())
+
+    def test_poll_broken_module(self):
+        """It reports errors in changed modules and recovers once they are fixed."""
+        self.watcher.compile_all()
+        self._write("watched_helper", "def broken(:\n")
+        (result,) = self.watcher.poll()
+        self.assertFalse(result.ok)
+        self._write("watched_helper", _HELPER_SOURCE.format(image="python:3.11"))
+        (result,) = self.watcher.poll()
+        self.assertTrue(result.ok)
+        self.assertEqual("python:3.11", self._read_image("watched_pipeline"))
@@ -0,0 +1,151 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Test cases for `component_images` module."""
+import json
+import pathlib
+import tempfile
+import unittest
+
+from pipelines import component_images
+
+# Command of a component with `packages_to_install`, as generated by KFP.
+_PIP_INSTALL_SCRIPT = """
+if ! [ -x "$(command -v pip)" ]; then
+    python3 -m ensurepip || python3 -m ensurepip --user || apt-get install python3-pip
+fi
+
+PIP_DISABLE_PIP_VERSION_CHECK=1 python3 -m pip install --quiet \
+    --no-warn-script-location {} && "$0" "$@"
+"""
+
+_EXECUTOR_COMMAND = ["sh", "-ec", "python3 -m kfp.v2.components.executor_main", ""]
+
+
+def _container(image, packages):
+    """Returns an executor container spec installing the given packages."""
+    command = list(_EXECUTOR_COMMAND)
+    if packages:
+        script = _PIP_INSTALL_SCRIPT.format(" ".join(f"{p!r}" for p in packages))
+        command = ["sh", "-c", script] + command
+    return {"container": {"image": image, "command": command, "args": []}}
+
+
+def _template():
+    """Returns a compiled pipeline job with executors of varied images."""
+    executors = {
+        "exec-a": _container("python:3.10", ["kfp==1.8.13", "pandas"]),
+        "exec-b": _container("python:3.10", ["pandas", "kfp==1.8.13"]),
+        "exec-c": _container("python:3.9", ["kfp==1.8.13"]),
+        "exec-d": _container("python:3.10", []),
+        "exec-e": {"importer": {}},
+    }
+    return {"pipelineSpec": {"deploymentSpec": {"executors": executors}}}
+
+
+class ComponentImageTest(unittest.TestCase):
+    """Tests `ComponentImage`."""
+
+    def test_get_tag(self):
+        """It tags the image by the digest of its contents."""
+        image = component_images.ComponentImage("python:3.10", ("kfp==1.8.13",))
+        other = component_images.ComponentImage("python:3.9", ("kfp==1.8.13",))
+        self.assertEqual(
+            f"gcr.io/p/components:{image.digest}", image.get_tag("gcr.io/p/")
+        )
+        self.assertNotEqual(image.digest, other.digest)
+
+    def test_get_dockerfile(self):
+        """It installs the packages on top of the base image."""
+        image = component_images.ComponentImage("python:3.10", ("a>=1", "b"))
+        dockerfile = image.get_dockerfile()
+        self.assertTrue(dockerfile.startswith("FROM python:3.10\nRUN "))
+        self.assertIn("pip install", dockerfile)
+        self.assertIn(" 'a>=1' b\n", dockerfile)
+
+
+class FindImagesTest(unittest.TestCase):
+    """Tests `find_images`."""
+
+    def test_groups_executors(self):
+        """It groups executors by base image and package set."""
+        images = component_images.find_images(_template())
+        self.assertEqual(
+            {
+                component_images.ComponentImage(
+                    "python:3.10", ("kfp==1.8.13", "pandas")
+                ): ["exec-a", "exec-b"],
+                component_images.ComponentImage("python:3.9", ("kfp==1.8.13",)): [
+                    "exec-c"
+                ],
+            },
+            images,
+        )
+
+    def test_skips_pip_options(self):
+        """It does not bake packages installed with extra pip options."""
+        template = {
+            "deploymentSpec": {
+                "executors": {
+                    "exec-a": _container(
+                        "python:3.10", ["--index-url", "https://pypi.example.com"]
+                    )
+                }
+            }
+        }
+        self.assertEqual({}, component_images.find_images(template))
+
+
+class WriteDockerfilesTest(unittest.TestCase):
+    """Tests `write_dockerfiles`."""
+
+    def test_write_dockerfiles(self):
+        """It writes one build context per image."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            contexts = component_images.write_dockerfiles(
+                _template(), tempdir, "gcr.io/p"
+            )
+            self.assertEqual(2, len(contexts))
+            for tag, context_dir in contexts.items():
+                self.assertEqual(pathlib.Path(tempdir), context_dir.parent)
+                self.assertTrue(tag.endswith(f":{context_dir.name}"))
+                dockerfile = (context_dir / "Dockerfile").read_text()
+                self.assertIn("kfp==1.8.13", dockerfile)
+
+
+class BakeTest(unittest.TestCase):
+    """Tests `bake` and `bake_spec`."""
+
+    def test_bake(self):
+        """It uses the baked images and removes the run time installs."""
+        template = _template()
+        self.assertEqual(3, component_images.bake(template, "gcr.io/p"))
+        executors = template["pipelineSpec"]["deploymentSpec"]["executors"]
+        images = component_images.find_images(_template())
+        for image, names in images.items():
+            for name in names:
+                container = executors[name]["container"]
+                self.assertEqual(image.get_tag("gcr.io/p"), container["image"])
+                self.assertEqual(_EXECUTOR_COMMAND, container["command"])
+        self.assertEqual(_container("python:3.10", []), executors["exec-d"])
+        self.assertEqual({}, component_images.find_images(template))
+
+    def test_bake_spec(self):
+        """It rewrites a JSON specification."""
+        spec = json.dumps(_template())
+        baked = json.loads(component_images.bake_spec(spec, "gcr.io/p"))
+        expected = _template()
+        component_images.bake(expected, "gcr.io/p")
+        self.assertEqual(expected, baked)
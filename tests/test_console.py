@@ -14,15 +14,32 @@
 
 """Test cases for `console` module."""
 import json
+import os
+import pstats
+import subprocess  # noqa: S404
+import sys
 import tempfile
+from typing import Dict
 import unittest
 from unittest import mock
 
 from click import testing
+from google.cloud.aiplatform_v1.types import pipeline_job as gca_pipeline_job
 
+import pipelines
+from pipelines import compile_server
+from pipelines import compile_watcher
 from pipelines import console
+from pipelines import job_index
+from pipelines import job_watcher
+from pipelines import local_runner
 from pipelines import pipeline_compiler
+from pipelines import pipeline_registry
 from pipelines import pipeline_runner
+from pipelines import profiling
+from pipelines import run_report
+from tests import test_component_images
+from tests import test_run_report
 
 
 class CliTestCase(unittest.TestCase):
@@ -30,6 +47,11 @@ class CliTestCase(unittest.TestCase):
 
     def setUp(self):
         self.runner = testing.CliRunner()
+        # Keeps `compile` from using a compile server running on this machine.
+        socket_path = os.path.join(tempfile.gettempdir(), "no-compile-server.sock")
+        patcher = mock.patch.dict(os.environ, {"PIPELINES_COMPILE_SOCKET": socket_path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
 
 class CompileTest(CliTestCase):
@@ -57,8 +79,255 @@ class CompileTest(CliTestCase):
             )
         self.assertEqual(0, result.exit_code)
         mock_compile.assert_called_once_with(
-            module_name, function_name, output_path.name
+            module_name,
+            function_name,
+            output_path.name,
+            use_cache=True,
+            image_registry=None,
         )
+        self.assertIn("Compile cache:", result.output)
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_compile_no_cache(self, mock_compile):
+        """It disables the compile cache with `--no-cache`."""
+        args = ["some-module", "pipeline-function", "pipeline.json", "--no-cache"]
+        result = self.runner.invoke(console.compile, args)
+        self.assertEqual(0, result.exit_code)
+        mock_compile.assert_called_once_with(
+            *args[:3], use_cache=False, image_registry=None
+        )
+        self.assertNotIn("Compile cache:", result.output)
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_compile_image_registry(self, mock_compile):
+        """It uses baked component images with `--image-registry`."""
+        args = ["module", "pipeline", "pipeline.json"]
+        result = self.runner.invoke(
+            console.compile, args + ["--image-registry", "gcr.io/p"]
+        )
+        self.assertEqual(0, result.exit_code)
+        mock_compile.assert_called_once_with(
+            *args, use_cache=True, image_registry="gcr.io/p"
+        )
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_compile_analyze(self, mock_compile):
+        """It prints an analysis of the compiled task graph with `--analyze`."""
+        tasks = {"a": {}, "b": {"dependentTasks": ["a"]}}
+        mock_compile.return_value = json.dumps({"root": {"dag": {"tasks": tasks}}})
+        args = ["module", "pipeline", "pipeline.json", "--analyze"]
+        result = self.runner.invoke(console.compile, args)
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("Tasks: 2, depth: 2, max width: 1", result.output)
+        self.assertIn("Serial bottlenecks: a, b", result.output)
+        self.assertIn("Dependencies without data flow", result.output)
+
+    def test_compile_analyze_watch(self):
+        """It fails if `--analyze` is combined with `--watch`."""
+        args = ["module", "pipeline", "pipeline.json", "--analyze", "--watch"]
+        result = self.runner.invoke(console.compile, args)
+        self.assertEqual(2, result.exit_code)
+        self.assertIn("--analyze cannot be used with --watch.", result.output)
+
+
+class CompileServerTest(CliTestCase):
+    """Tests `compile` with a running compile server."""
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    @mock.patch.object(compile_server, "request_compile", autospec=True)
+    def test_compile_uses_server(self, mock_request_compile, mock_compile):
+        """It sends the request to the server instead of compiling."""
+        mock_request_compile.return_value = {"cache_hits": 1, "cache_misses": 0}
+        args = ["module", "pipeline", "pipeline.json"]
+        result = self.runner.invoke(console.compile, args)
+        self.assertEqual(0, result.exit_code)
+        mock_request_compile.assert_called_once_with(
+            *args, use_cache=True, image_registry=None
+        )
+        mock_compile.assert_not_called()
+        self.assertIn("Compile cache: 1 hit(s), 0 miss(es).", result.output)
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_compile_server_unreachable(self, mock_compile):
+        """It compiles in-process if the server socket cannot be used."""
+        socket_path = os.path.join(tempfile.gettempdir(), "x" * 200, "c.sock")
+        args = ["module", "pipeline", "pipeline.json"]
+        with mock.patch.dict(os.environ, {"PIPELINES_COMPILE_SOCKET": socket_path}):
+            result = self.runner.invoke(console.compile, args)
+        self.assertEqual(0, result.exit_code, result.output)
+        mock_compile.assert_called_once_with(*args, use_cache=True, image_registry=None)
+
+    @mock.patch.object(compile_server, "request_compile", autospec=True)
+    def test_compile_server_error(self, mock_request_compile):
+        """It fails with the error reported by the server."""
+        mock_request_compile.side_effect = compile_server.CompileServerError("Err")
+        result = self.runner.invoke(console.compile, ["module", "pipeline", "p.json"])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Error: Err", result.output)
+
+    @mock.patch.object(compile_server, "serve", autospec=True)
+    def test_compile_server_already_running(self, mock_serve):
+        """It fails if another server is listening on the socket."""
+        mock_serve.side_effect = RuntimeError("Already listening.")
+        result = self.runner.invoke(console.serve_compile, ["--socket", "c.sock"])
+        self.assertEqual(1, result.exit_code)
+        mock_serve.assert_called_once_with("c.sock")
+        self.assertIn("Error: Already listening.", result.output)
+
+
+class CompileWatchTest(CliTestCase):
+    """Tests the `--watch` option of the compile commands."""
+
+    def _watch(self):
+        task = pipeline_compiler.CompileTask("module", "pipeline", "pipeline.json")
+        yield [pipeline_compiler.CompileResult(task, 1.0)]
+        yield [pipeline_compiler.CompileResult(task, 0.5, error="Err")]
+        raise KeyboardInterrupt()
+
+    @mock.patch.object(compile_watcher.CompileWatcher, "watch", autospec=True)
+    def test_compile_watch(self, mock_watch):
+        """It prints the results of each compilation until interrupted."""
+        mock_watch.side_effect = lambda _: self._watch()
+        args = ["module", "pipeline", "pipeline.json", "--watch"]
+        result = self.runner.invoke(console.compile, args)
+        self.assertEqual(0, result.exit_code)
+        watcher = mock_watch.call_args.args[0]
+        self.assertEqual([pipeline_compiler.CompileTask(*args[:3])], watcher.tasks)
+        self.assertIn("OK      module.pipeline -> pipeline.json", result.output)
+        self.assertIn("FAILED  module.pipeline (0.50s): Err", result.output)
+
+
+class ListPipelinesTest(CliTestCase):
+    """Tests `list-pipelines` command."""
+
+    pipeline = pipeline_registry.PipelineInfo(
+        module_name="module",
+        function_name="pipeline",
+        pipeline_name="my-pipeline",
+        description="My pipeline.",
+        parameters=(
+            pipeline_registry.PipelineParameter("message", "str"),
+            pipeline_registry.PipelineParameter("count", "int", "1"),
+            pipeline_registry.PipelineParameter("flag", default="True"),
+        ),
+        path="/src/pipelines/module.py",
+        lineno=3,
+    )
+
+    @mock.patch.object(pipeline_registry, "list_pipelines", autospec=True)
+    def test_list_pipelines(self, mock_list_pipelines):
+        """It prints each pipeline with its signature and location."""
+        mock_list_pipelines.return_value = [self.pipeline]
+        result = self.runner.invoke(console.list_pipelines)
+        self.assertEqual(0, result.exit_code)
+        mock_list_pipelines.assert_called_once_with(use_cache=True)
+        self.assertEqual(
+            "module pipeline(message: str, count: int = 1, flag=True)"
+            "  /src/pipelines/module.py:3\n    My pipeline.\n",
+            result.output,
+        )
+
+    @mock.patch.object(pipeline_registry, "list_pipelines", autospec=True)
+    def test_list_pipelines_json(self, mock_list_pipelines):
+        """It prints the pipelines as JSON with `--json`."""
+        mock_list_pipelines.return_value = [self.pipeline]
+        result = self.runner.invoke(console.list_pipelines, ["--json", "--no-cache"])
+        self.assertEqual(0, result.exit_code)
+        mock_list_pipelines.assert_called_once_with(use_cache=False)
+        (output,) = json.loads(result.output)
+        self.assertEqual("my-pipeline", output["pipeline_name"])
+        self.assertEqual(
+            {"name": "count", "annotation": "int", "default": "1"},
+            output["parameters"][1],
+        )
+
+
+class CompileManyTest(CliTestCase):
+    """Tests `compile-many` command."""
+
+    def setUp(self):
+        super().setUp()
+        self.task = pipeline_compiler.CompileTask("module", "function", "out.json")
+        mock.patch.object(
+            pipeline_compiler, "load_manifest", return_value=[self.task]
+        ).start()
+        self.mock_compile_many = mock.patch.object(
+            pipeline_compiler, "compile_many", autospec=True
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_compile_many_ok(self):
+        """It compiles all pipelines in the manifest with the given workers."""
+        self.mock_compile_many.return_value = [
+            pipeline_compiler.CompileResult(self.task, seconds=1.5)
+        ]
+        result = self.runner.invoke(console.compile_many, ["m.yaml", "-w", "4"])
+        self.assertEqual(0, result.exit_code)
+        self.mock_compile_many.assert_called_once_with(
+            [self.task], max_workers=4, use_cache=True
+        )
+        self.assertIn("module.function -> out.json (1.50s)", result.output)
+
+    def test_compile_many_failure(self):
+        """It exits with an error if any pipeline fails to compile."""
+        self.mock_compile_many.return_value = [
+            pipeline_compiler.CompileResult(self.task, seconds=0.1, error="Boom")
+        ]
+        result = self.runner.invoke(console.compile_many, ["m.yaml"])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("FAILED", result.output)
+
+
+class PublishTest(CliTestCase):
+    """Tests `publish` command."""
+
+    @mock.patch.object(pipeline_compiler, "publish", autospec=True)
+    def test_publish(self, mock_publish):
+        """It prints the reference to the stored specification."""
+        mock_publish.return_value = "0" * 64
+        args = ["module", "pipeline", "gs://bucket/root", "--alias", "latest"]
+        result = self.runner.invoke(console.publish, args)
+        self.assertEqual(0, result.exit_code)
+        mock_publish.assert_called_once_with(
+            *args[:3], alias="latest", use_cache=True, image_registry=None
+        )
+        self.assertEqual(f"sha256:{'0' * 64}\n", result.output)
+
+    @mock.patch.object(pipeline_compiler, "publish", autospec=True)
+    def test_publish_invalid_alias(self, mock_publish):
+        """It rejects an invalid alias before compiling."""
+        args = ["module", "pipeline", "gs://bucket/root", "--alias", "a/b"]
+        result = self.runner.invoke(console.publish, args)
+        self.assertEqual(2, result.exit_code)
+        mock_publish.assert_not_called()
+
+
+class BuildImagesTest(CliTestCase):
+    """Tests `build-images` command."""
+
+    @mock.patch.object(pipeline_compiler, "compile_spec", autospec=True)
+    def test_build_images(self, mock_compile_spec):
+        """It writes a Dockerfile per image and prints how to build them."""
+        mock_compile_spec.return_value = json.dumps(test_component_images._template())
+        with self.runner.isolated_filesystem():
+            args = ["module", "pipeline", "images", "--image-registry", "gcr.io/p"]
+            result = self.runner.invoke(console.build_images, args)
+            self.assertEqual(0, result.exit_code)
+            self.assertEqual(2, len(os.listdir("images")))
+        mock_compile_spec.assert_called_once_with("module", "pipeline", use_cache=True)
+        self.assertEqual(2, result.output.count("docker build -t gcr.io/p/components:"))
+
+    @mock.patch.object(pipeline_compiler, "compile_spec", autospec=True)
+    def test_build_images_none(self, mock_compile_spec):
+        """It reports if no component installs packages at run time."""
+        mock_compile_spec.return_value = json.dumps({"pipelineSpec": {}})
+        with self.runner.isolated_filesystem():
+            args = ["module", "pipeline", "images", "--image-registry", "gcr.io/p"]
+            result = self.runner.invoke(console.build_images, args)
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("No components install packages at run time.", result.output)
 
 
 class RunTest(CliTestCase):
@@ -78,4 +347,443 @@ class RunTest(CliTestCase):
 
         # Check called `run` function.
         pipeline_params = dict(param1="some-param")
-        mock_run.assert_called_once_with(mock.ANY, pipeline_params)
+        mock_run.assert_called_once_with(mock.ANY, pipeline_params, force=False)
+
+    @mock.patch.object(pipeline_runner.PipelineRunConfig, "from_file")
+    @mock.patch.object(pipeline_runner, "run", autospec=True)
+    def test_run_force(self, mock_run, _):
+        """It passes `--force` on to `pipeline_runner.run`."""
+        result = self.runner.invoke(console.run, ["config.yaml", "--force"])
+        self.assertEqual(0, result.exit_code)
+        mock_run.assert_called_once_with(mock.ANY, {}, force=True)
+
+
+class ImportTimeTest(unittest.TestCase):
+    """Tests CLI startup cost."""
+
+    # Budget for importing the CLI module, in microseconds.
+    budget_us = 500_000
+
+    heavy_modules = ("kfp", "google.cloud.aiplatform", "cloudpathlib")
+
+    @staticmethod
+    def _get_import_times(module_name: str) -> Dict[str, int]:
+        """Returns cumulative import time per module in microseconds."""
+        src_dir = os.path.dirname(os.path.dirname(pipelines.__file__))
+        env = dict(os.environ, PYTHONPATH=src_dir)
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=True,
+        )
+        import_times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line[len("import time:") :].split("|")
+            import_times[name.strip()] = int(cumulative)
+        return import_times
+
+    def test_heavy_modules_not_imported(self):
+        """It does not import KFP or Google Cloud libraries at startup."""
+        import_times = self._get_import_times("pipelines.console")
+        for name in self.heavy_modules:
+            self.assertNotIn(name, import_times)
+
+    def test_import_time_within_budget(self):
+        """It imports the CLI module within the startup time budget."""
+        import_times = self._get_import_times("pipelines.console")
+        self.assertLess(import_times["pipelines.console"], self.budget_us)
+
+
+class RunSweepTest(CliTestCase):
+    """Tests `run-sweep` command."""
+
+    @mock.patch.object(pipeline_runner.PipelineRunConfig, "from_file")
+    @mock.patch.object(pipeline_runner, "load_param_sets")
+    @mock.patch.object(pipeline_runner, "PipelineRunner", autospec=True)
+    def test_run_sweep_ok(self, mock_runner_class, mock_load_param_sets, _):
+        """It submits one job per parameter set merged with shared params."""
+        mock_load_param_sets.return_value = [{"lr": 0.1}, {"lr": 0.2}]
+        mock_runner = mock_runner_class.return_value
+        mock_runner.submit_job_requests.return_value = [
+            pipeline_runner.SubmissionResult({"lr": 0.1}, "job-0", 0.5),
+            pipeline_runner.SubmissionResult({"lr": 0.2}, "job-1", 1.5),
+        ]
+        mock_runner.stats = pipeline_runner.SubmissionStats(
+            submitted=2, throttled=1, retried=3
+        )
+        args = [
+            "config.yaml",
+            "params.yaml",
+            "-p",
+            "message=hi",
+            "--max-in-flight",
+            "3",
+        ]
+        result = self.runner.invoke(console.run_sweep, args)
+        self.assertEqual(0, result.exit_code)
+        expected_param_sets = [
+            {"message": "hi", "lr": 0.1},
+            {"message": "hi", "lr": 0.2},
+        ]
+        mock_runner.create_job_requests.assert_called_once_with(expected_param_sets)
+        mock_runner.submit_job_requests.assert_called_once_with(
+            mock_runner.create_job_requests.return_value, max_in_flight=3, force=False
+        )
+        self.assertIn("job-0\njob-1\n", result.output)
+        self.assertIn("p50=1.00s", result.output)
+        self.assertIn("Throttled 1 and retried 3 submission(s).", result.output)
+
+    @mock.patch.object(pipeline_runner.PipelineRunConfig, "from_file")
+    @mock.patch.object(pipeline_runner, "load_param_sets")
+    @mock.patch.object(pipeline_runner, "PipelineRunner", autospec=True)
+    def test_run_sweep_deduplicated(self, mock_runner_class, mock_load_param_sets, _):
+        """It marks reused jobs."""
+        mock_load_param_sets.return_value = [{"lr": 0.1}, {"lr": 0.1}]
+        mock_runner = mock_runner_class.return_value
+        mock_runner.submit_job_requests.return_value = [
+            pipeline_runner.SubmissionResult({"lr": 0.1}, "job-0", 0.5),
+            pipeline_runner.SubmissionResult(
+                {"lr": 0.1}, "job-0", 0.0, deduplicated=True
+            ),
+        ]
+        mock_runner.stats = pipeline_runner.SubmissionStats(submitted=1, deduplicated=1)
+        result = self.runner.invoke(
+            console.run_sweep, ["config.yaml", "params.yaml", "--force"]
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertTrue(mock_runner.submit_job_requests.call_args.kwargs["force"])
+        self.assertIn("job-0\njob-0  (reused)\n", result.output)
+        self.assertIn("Reused 1 identical job(s).", result.output)
+
+    @mock.patch.object(pipeline_runner.PipelineRunConfig, "from_file")
+    @mock.patch.object(pipeline_runner, "load_param_sets")
+    @mock.patch.object(pipeline_runner, "PipelineRunner", autospec=True)
+    def test_run_sweep_invalid_params(self, mock_runner_class, mock_load_param_sets, _):
+        """It submits no job if a parameter set does not match the pipeline."""
+        mock_load_param_sets.return_value = [{"lr": 0.1}]
+        mock_runner = mock_runner_class.return_value
+        mock_runner.create_job_requests.side_effect = ValueError("Unknown lr.")
+        result = self.runner.invoke(console.run_sweep, ["config.yaml", "params.yaml"])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Unknown lr.", result.output)
+        mock_runner.submit_job_requests.assert_not_called()
+
+
+class WatchTest(CliTestCase):
+    """Tests `watch` command."""
+
+    @mock.patch.object(job_watcher, "watch", autospec=True)
+    def test_watch_ok(self, mock_watch):
+        """It waits for all jobs and prints their final states."""
+        mock_watch.return_value = {
+            "job-a": "PIPELINE_STATE_SUCCEEDED",
+            "job-b": "PIPELINE_STATE_FAILED",
+        }
+        args = ["job-a", "job-b", "-l", "us-central1", "--no-fail-fast"]
+        result = self.runner.invoke(console.watch, args)
+        self.assertEqual(1, result.exit_code)
+        mock_watch.assert_called_once_with(
+            ("job-a", "job-b"), mock.ANY, fail_fast=False
+        )
+        self.assertIn("job-b  PIPELINE_STATE_FAILED", result.output)
+
+    @mock.patch.object(job_watcher, "watch", autospec=True)
+    def test_watch_fail_fast(self, mock_watch):
+        """It reports the first failed job."""
+        mock_watch.side_effect = job_watcher.JobFailedError(
+            "job-a", "PIPELINE_STATE_FAILED"
+        )
+        result = self.runner.invoke(console.watch, ["job-a", "-l", "us-central1"])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Job job-a ended with state PIPELINE_STATE_FAILED", result.output)
+
+    @mock.patch.object(job_watcher, "watch", autospec=True)
+    def test_watch_not_found(self, mock_watch):
+        """It reports jobs that cannot be found."""
+        mock_watch.side_effect = job_watcher.JobNotFoundError(["job-typo"])
+        result = self.runner.invoke(console.watch, ["job-typo", "-l", "us-central1"])
+        self.assertEqual(1, result.exit_code)
+        self.assertIn("Jobs not found: job-typo.", result.output)
+
+
+class JobsTest(CliTestCase):
+    """Tests `jobs` commands."""
+
+    def setUp(self):
+        super().setUp()
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        patcher = mock.patch.dict(
+            os.environ, {"PIPELINES_CACHE_DIR": self.tempdir.name}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.index = job_index.get_job_index()
+        self.index.add(
+            job_index.JobRecord(
+                job_id=f"job-{i}",
+                pipeline_name="sample-pipeline",
+                template_digest="digest",
+                params_hash=job_index.get_params_hash({"i": i % 2}),
+                params={"i": i % 2},
+                submit_time=1000.0 + i,
+                location="us-central1",
+                project="some-project",
+                state="PIPELINE_STATE_SUCCEEDED" if i < 2 else None,
+            )
+            for i in range(4)
+        )
+
+    def test_list(self):
+        """It lists matching jobs, latest first."""
+        params_hash = job_index.get_params_hash({"i": 0})
+        result = self.runner.invoke(
+            console.jobs,
+            ["list", "--params-hash", params_hash[:8], "--since", "1970-01-01"],
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        lines = result.output.splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertTrue(lines[0].startswith("job-2  "))
+        self.assertIn("UNKNOWN", lines[0])
+        self.assertIn(f"SUCCEEDED        -  {params_hash[:12]}", lines[1])
+
+    def test_list_json(self):
+        """It prints the jobs as JSON with `--json`."""
+        result = self.runner.invoke(
+            console.jobs, ["list", "--json", "--pipeline", "other"]
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual([], json.loads(result.output))
+
+    def test_list_invalid_time(self):
+        """It rejects invalid times."""
+        result = self.runner.invoke(console.jobs, ["list", "--until", "later"])
+        self.assertEqual(2, result.exit_code)
+        self.assertIn("Invalid time 'later'", result.output)
+
+    def test_show(self):
+        """It prints a job as JSON."""
+        result = self.runner.invoke(console.jobs, ["show", "job-1"])
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual({"i": 1}, json.loads(result.output)["params"])
+        result = self.runner.invoke(console.jobs, ["show", "job-9"])
+        self.assertEqual(1, result.exit_code)
+
+    @mock.patch.object(job_watcher, "VertexJobStateProvider", autospec=True)
+    def test_refresh(self, mock_provider):
+        """It fetches the states of jobs that have not ended."""
+        mock_provider.return_value.get_jobs.return_value = {
+            "job-2": gca_pipeline_job.PipelineJob(state="PIPELINE_STATE_RUNNING"),
+            "job-3": gca_pipeline_job.PipelineJob(state="PIPELINE_STATE_FAILED"),
+        }
+        result = self.runner.invoke(console.jobs, ["refresh"])
+        self.assertEqual(0, result.exit_code, result.output)
+        mock_provider.assert_called_once_with("us-central1", project="some-project")
+        mock_provider.return_value.get_jobs.assert_called_once_with(["job-3", "job-2"])
+        self.assertEqual("Refreshed 2 jobs, 1 of which have ended.\n", result.output)
+        self.assertEqual("PIPELINE_STATE_FAILED", self.index.get("job-3").state)
+
+    @mock.patch.object(job_watcher, "VertexJobStateProvider", autospec=True)
+    def test_refresh_without_location(self, mock_provider):
+        """It skips jobs recorded without a location unless one is given."""
+        self.index.add(
+            [
+                job_index.JobRecord(
+                    job_id="job-9",
+                    pipeline_name="sample-pipeline",
+                    template_digest="digest",
+                    params_hash=job_index.get_params_hash({}),
+                    params={},
+                    submit_time=2000.0,
+                    project="some-project",
+                )
+            ]
+        )
+        mock_provider.return_value.get_jobs.return_value = {}
+        result = self.runner.invoke(console.jobs, ["refresh"])
+        self.assertEqual(0, result.exit_code, result.output)
+        mock_provider.assert_called_once_with("us-central1", project="some-project")
+        self.assertIn("Skipped 1 jobs recorded without a location", result.output)
+        self.assertIn("Refreshed 2 jobs", result.output)
+        mock_provider.reset_mock()
+        result = self.runner.invoke(console.jobs, ["refresh", "-l", "europe-west4"])
+        self.assertEqual(0, result.exit_code, result.output)
+        mock_provider.assert_any_call("europe-west4", project="some-project")
+        self.assertIn("Refreshed 3 jobs", result.output)
+
+
+class ReportTest(CliTestCase):
+    """Tests `report` command."""
+
+    def setUp(self):
+        super().setUp()
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        patcher = mock.patch.dict(
+            os.environ, {"PIPELINES_CACHE_DIR": self.tempdir.name}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.job_details_path = os.path.join(self.tempdir.name, "job.json")
+        with open(self.job_details_path, "w") as fp:
+            json.dump(test_run_report.JOB_DETAILS, fp)
+
+    def test_report_from_file(self):
+        """It reports on saved job details and writes a Chrome trace."""
+        trace_path = os.path.join(self.tempdir.name, "trace.json")
+        result = self.runner.invoke(
+            console.report,
+            ["--job-details", self.job_details_path, "--chrome-trace", trace_path],
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn(
+            "Critical path (200.0s, 30.0s queued): a -> b -> d", result.output
+        )
+        self.assertTrue(os.path.exists(trace_path))
+
+    def test_report_json(self):
+        """It prints the report as JSON with `--json`."""
+        result = self.runner.invoke(
+            console.report, ["--job-details", self.job_details_path, "--json"]
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(["a", "b", "d"], json.loads(result.output)["critical_path"])
+
+    @mock.patch.object(run_report, "get_job_details", autospec=True)
+    def test_report_indexed_job(self, mock_get_job_details):
+        """It fetches jobs from the location recorded in the job index."""
+        mock_get_job_details.return_value = test_run_report.JOB_DETAILS
+        job_index.get_job_index().add(
+            [
+                job_index.JobRecord(
+                    job_id="sample-job",
+                    pipeline_name="sample-pipeline",
+                    template_digest=None,
+                    params_hash="",
+                    params={},
+                    submit_time=0.0,
+                    location="europe-west4",
+                    project="some-project",
+                )
+            ]
+        )
+        result = self.runner.invoke(console.report, ["sample-job"])
+        self.assertEqual(0, result.exit_code, result.output)
+        mock_get_job_details.assert_called_once_with(
+            "sample-job", "europe-west4", project="some-project"
+        )
+
+    def test_report_requires_location(self):
+        """It asks for the location of jobs that are not indexed."""
+        result = self.runner.invoke(console.report, ["other-job"])
+        self.assertEqual(2, result.exit_code)
+        self.assertIn("pass --location", result.output)
+
+
+class ProfileTest(CliTestCase):
+    """Tests the `--profile` options."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(profiling.disable)
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_profile_prints_breakdown(self, _):
+        """It prints the time spent in each phase."""
+        args = ["--profile", "compile", "module", "function", "pipeline.json"]
+        result = self.runner.invoke(console.cli, args)
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("cli.import", result.output)
+        self.assertIn("Total", result.output)
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_profile_output_chrome_trace(self, _):
+        """It writes spans as a Chrome trace to a `.json` output path."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_path = os.path.join(tempdir, "trace.json")
+            args = ["--profile-output", output_path, "compile", "m", "f", "p.json"]
+            result = self.runner.invoke(console.cli, args)
+            with open(output_path) as fp:
+                trace = json.load(fp)
+        self.assertEqual(0, result.exit_code)
+        names = [event["name"] for event in trace["traceEvents"]]
+        self.assertIn("cli.import", names)
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_profile_output_pstats(self, _):
+        """It writes cProfile statistics to other output paths."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_path = os.path.join(tempdir, "compile.prof")
+            args = ["--profile-output", output_path, "compile", "m", "f", "p.json"]
+            result = self.runner.invoke(console.cli, args)
+            stats = pstats.Stats(output_path)
+        self.assertEqual(0, result.exit_code)
+        self.assertGreater(stats.total_calls, 0)
+
+    @mock.patch.object(pipeline_compiler, "compile", autospec=True)
+    def test_no_profile(self, _):
+        """It records nothing without `--profile`."""
+        result = self.runner.invoke(console.cli, ["compile", "m", "f", "p.json"])
+        self.assertEqual(0, result.exit_code)
+        self.assertNotIn("Total", result.output)
+        self.assertIsNone(profiling._profiler)
+
+
+class RunLocalTest(CliTestCase):
+    """Tests `run-local` command."""
+
+    def setUp(self):
+        super().setUp()
+        self.run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="pipeline",
+            pipeline_path="pipeline.json",
+            gcs_root_path="gs://bucket/root",
+            location="us-central1",
+        )
+        mock.patch.object(
+            pipeline_runner.PipelineRunConfig,
+            "from_file",
+            return_value=self.run_config,
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    @mock.patch.object(local_runner, "run_local", autospec=True)
+    def test_run_local(self, mock_run_local):
+        """It runs the pipeline locally and prints the state of each task."""
+        mock_run_local.return_value = local_runner.LocalRunResult(
+            run_id="run",
+            run_dir="root/run",
+            tasks=[
+                local_runner.TaskResult(
+                    "load", local_runner.SUCCEEDED, 0.5, cached=True
+                ),
+                local_runner.TaskResult("train", local_runner.FAILED, 1.0, error="Err"),
+                local_runner.TaskResult("deploy", local_runner.SKIPPED),
+            ],
+        )
+        args = ["config.yaml", "-p", "a=1", "--pipeline-root", "root", "-w", "2"]
+        result = self.runner.invoke(console.run_local, args)
+        self.assertEqual(1, result.exit_code)
+        mock_run_local.assert_called_once_with(
+            "pipeline.json", {"a": "1"}, "root", max_workers=2, enable_caching=True
+        )
+        self.assertIn("SUCCEEDED  load (0.50s, cached)", result.output)
+        self.assertIn("FAILED     train (1.00s): Err", result.output)
+        self.assertIn("SKIPPED    deploy\n", result.output)
+        self.assertIn("Outputs written to root/run.", result.output)
+
+    @mock.patch.object(local_runner, "run_local", autospec=True)
+    def test_run_local_caching(self, mock_run_local):
+        """It disables caching per the run config or `--no-cache`."""
+        mock_run_local.return_value = local_runner.LocalRunResult("run", "run", [])
+        self.runner.invoke(console.run_local, ["config.yaml", "--no-cache"])
+        self.run_config.enable_caching = False
+        self.runner.invoke(console.run_local, ["config.yaml"])
+        self.assertEqual(2, mock_run_local.call_count)
+        for call in mock_run_local.call_args_list:
+            self.assertFalse(call.kwargs["enable_caching"])
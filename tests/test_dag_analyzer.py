@@ -0,0 +1,92 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Test cases for `dag_analyzer` module."""
+import unittest
+
+from pipelines import dag_analyzer
+
+
+def _task(*producers, after=()):
+    """Returns a task spec consuming an output of each producer."""
+    parameters = {
+        f"x_{producer}": {
+            "taskOutputParameter": {
+                "producerTask": producer,
+                "outputParameterKey": "Output",
+            }
+        }
+        for producer in producers
+    }
+    return {"dependentTasks": list(after), "inputs": {"parameters": parameters}}
+
+
+def _template(tasks):
+    """Returns a compiled pipeline job with the given top-level tasks."""
+    return {"pipelineSpec": {"root": {"dag": {"tasks": tasks}}}}
+
+
+class AnalyzeTest(unittest.TestCase):
+    """Tests `analyze`."""
+
+    def test_diamond(self):
+        """It finds the levels and bottlenecks of a diamond."""
+        template = _template(
+            {"a": _task(), "b": _task("a"), "c": _task("a"), "d": _task("b", "c")}
+        )
+        analysis = dag_analyzer.analyze(template)
+        self.assertEqual(4, analysis.task_count)
+        self.assertEqual(3, analysis.depth)
+        self.assertEqual(2, analysis.max_width)
+        self.assertEqual([["a"], ["b", "c"], ["d"]], analysis.levels)
+        self.assertEqual(["a", "d"], analysis.bottlenecks)
+        self.assertEqual([], analysis.ordering_only_dependencies)
+        self.assertEqual([], analysis.redundant_dependencies)
+
+    def test_ordering_only_dependency(self):
+        """It reports explicit dependencies through which no data flows."""
+        template = _template({"a": _task(), "b": _task(), "c": _task(after=["b"])})
+        analysis = dag_analyzer.analyze(template)
+        self.assertEqual([("b", "c")], analysis.ordering_only_dependencies)
+        self.assertEqual([], analysis.bottlenecks)
+
+    def test_redundant_dependency(self):
+        """It reports dependencies implied by other dependencies."""
+        template = _template(
+            {"a": _task(), "b": _task("a"), "c": _task("b", after=["a"])}
+        )
+        analysis = dag_analyzer.analyze(template)
+        self.assertEqual([("a", "c")], analysis.redundant_dependencies)
+        self.assertEqual([], analysis.ordering_only_dependencies)
+        self.assertEqual(["a", "b", "c"], analysis.bottlenecks)
+        self.assertIn("Redundant dependencies:\n  a -> c", analysis.format_summary())
+
+    def test_empty(self):
+        """It analyzes a pipeline without tasks."""
+        analysis = dag_analyzer.analyze({"root": {}})
+        self.assertEqual(0, analysis.task_count)
+        self.assertEqual(0, analysis.max_width)
+        self.assertEqual("Tasks: 0, depth: 0, max width: 0", analysis.format_summary())
+
+    def test_cycle(self):
+        """It fails if the dependencies contain a cycle."""
+        template = _template({"a": _task("b"), "b": _task("a"), "c": _task()})
+        with self.assertRaisesRegex(ValueError, "cyclic"):
+            dag_analyzer.analyze(template)
+
+    def test_unknown_task(self):
+        """It fails if a task depends on a task that does not exist."""
+        with self.assertRaisesRegex(ValueError, "unknown"):
+            dag_analyzer.analyze(_template({"a": _task("missing")}))
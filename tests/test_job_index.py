@@ -0,0 +1,202 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `job_index` module."""
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from pipelines import job_index
+
+
+def _record(job_id: str, **kwargs) -> job_index.JobRecord:
+    """Returns a job record with default values for unspecified fields."""
+    params = kwargs.pop("params", {"message": job_id})
+    values = dict(
+        job_id=job_id,
+        pipeline_name="sample-pipeline",
+        template_digest="digest",
+        params_hash=job_index.get_params_hash(params),
+        params=params,
+        submit_time=1000.0,
+    )
+    values.update(kwargs)
+    return job_index.JobRecord(**values)
+
+
+class GetParamsHashTest(unittest.TestCase):
+    """Tests `get_params_hash` function."""
+
+    def test_ignores_order(self):
+        """It hashes parameters regardless of their order."""
+        self.assertEqual(
+            job_index.get_params_hash({"a": 1, "b": "x"}),
+            job_index.get_params_hash({"b": "x", "a": 1}),
+        )
+
+    def test_distinguishes_values(self):
+        """It hashes different values differently."""
+        self.assertNotEqual(
+            job_index.get_params_hash({"a": 1}), job_index.get_params_hash({"a": "1"})
+        )
+
+
+class ParseDurationTest(unittest.TestCase):
+    """Tests `parse_duration` function."""
+
+    def test_parse_duration(self):
+        """It parses durations with units or in seconds."""
+        self.assertEqual(45.0, job_index.parse_duration("45"))
+        self.assertEqual(30 * 60, job_index.parse_duration("30m"))
+        self.assertEqual(2 * 7 * 24 * 60 * 60, job_index.parse_duration("2w"))
+        self.assertEqual(3600.0, job_index.parse_duration(3600))
+        with self.assertRaises(ValueError):
+            job_index.parse_duration("1 day")
+
+
+class ParseTimeTest(unittest.TestCase):
+    """Tests `parse_time` function."""
+
+    def test_relative(self):
+        """It subtracts relative times from now."""
+        self.assertEqual(1000.0 - 90, job_index.parse_time("90s", now=1000.0))
+        self.assertEqual(1e6 - 7 * 24 * 60 * 60, job_index.parse_time("7d", now=1e6))
+        self.assertEqual(1e6 - 1.5 * 3600, job_index.parse_time("1.5h", now=1e6))
+
+    def test_absolute(self):
+        """It parses ISO dates and times."""
+        self.assertEqual(86400.0, job_index.parse_time("1970-01-02T00:00:00+00:00"))
+
+    def test_invalid(self):
+        """It raises ValueError for anything else."""
+        with self.assertRaises(ValueError):
+            job_index.parse_time("yesterday")
+
+
+class JobIndexTest(unittest.TestCase):
+    """Tests `JobIndex` class."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempdir.cleanup)
+        self.index = job_index.JobIndex(
+            os.path.join(self.tempdir.name, "jobs", "jobs.sqlite3")
+        )
+        self.addCleanup(self.index.close)
+
+    def test_add_and_get(self):
+        """It returns stored jobs by ID."""
+        record = _record("job-a", params={"count": 1, "names": ["x"]})
+        self.index.add([record])
+        self.assertEqual(record, self.index.get("job-a"))
+        self.assertIsNone(self.index.get("job-b"))
+
+    def test_update_state(self):
+        """It records states and keeps durations once known."""
+        self.index.add([_record("job-a")])
+        self.index.update_state("job-a", "PIPELINE_STATE_SUCCEEDED", 12.5)
+        self.index.update_state("job-a", "PIPELINE_STATE_SUCCEEDED")
+        record = self.index.get("job-a")
+        self.assertEqual("PIPELINE_STATE_SUCCEEDED", record.state)
+        self.assertEqual(12.5, record.duration)
+
+    def test_query(self):
+        """It returns the latest matching jobs first."""
+        self.index.add(
+            [
+                _record("job-a", submit_time=1.0),
+                _record("job-b", submit_time=2.0, pipeline_name="other"),
+                _record("job-c", submit_time=3.0, params={"message": "job-a"}),
+                _record("job-d", submit_time=4.0, state="PIPELINE_STATE_FAILED"),
+            ]
+        )
+
+        def query(**kwargs):
+            return [record.job_id for record in self.index.query(**kwargs)]
+
+        self.assertEqual(["job-d", "job-c", "job-b", "job-a"], query())
+        self.assertEqual(["job-d", "job-c"], query(limit=2))
+        self.assertEqual(["job-b"], query(pipeline_name="other"))
+        params_hash = job_index.get_params_hash({"message": "job-a"})
+        self.assertEqual(["job-c", "job-a"], query(params_hash=params_hash))
+        self.assertEqual(["job-c", "job-a"], query(params_hash=params_hash[:6]))
+        self.assertEqual(["job-c", "job-b"], query(since=2.0, until=4.0))
+        self.assertEqual([], query(template_digest="other"))
+        self.assertEqual(
+            ["job-c", "job-a"],
+            query(
+                pipeline_name="sample-pipeline",
+                exclude_states=["PIPELINE_STATE_FAILED"],
+            ),
+        )
+        self.assertEqual(
+            ["job-d", "job-c", "job-b", "job-a"],
+            query(include_states=["PIPELINE_STATE_FAILED"]),
+        )
+        self.assertEqual(
+            ["job-c", "job-b", "job-a"],
+            query(include_states=["PIPELINE_STATE_RUNNING"]),
+        )
+
+    def test_query_uses_indexes(self):
+        """It looks jobs up by index rather than scanning the table."""
+        connection = sqlite3.connect(self.index.path)
+        self.addCleanup(connection.close)
+        for condition in (
+            "pipeline_name = 'x'",
+            "params_hash >= 'ab' AND params_hash < 'abg'",
+            "submit_time >= 1",
+        ):
+            plan = connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM jobs"  # noqa: S608
+                f" WHERE {condition} ORDER BY submit_time DESC"
+            ).fetchall()
+            self.assertIn("USING INDEX", " ".join(row[-1] for row in plan))
+
+    def test_concurrent_writers(self):
+        """It accepts jobs from many threads and connections at once."""
+        other = job_index.JobIndex(self.index.path)
+        self.addCleanup(other.close)
+
+        def add(index, prefix):
+            for i in range(50):
+                index.add([_record(f"{prefix}-{i}")])
+
+        threads = [
+            threading.Thread(target=add, args=(index, f"job-{n}"))
+            for n, index in enumerate([self.index, other] * 2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(200, len(self.index.query(limit=None)))
+
+
+class GetJobIndexTest(unittest.TestCase):
+    """Tests `get_job_index` function."""
+
+    def test_cache_dir(self):
+        """It keeps one index in the pipelines cache directory."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            with mock.patch.dict(os.environ, {"PIPELINES_CACHE_DIR": tempdir}):
+                index = job_index.get_job_index()
+                self.assertIs(index, job_index.get_job_index())
+                self.assertEqual(
+                    os.path.join(tempdir, "jobs", "jobs.sqlite3"), str(index.path)
+                )
+                index.close()
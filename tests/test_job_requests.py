@@ -0,0 +1,194 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Test cases for `job_requests` module."""
+import copy
+import unittest
+
+from google.protobuf import json_format
+
+from pipelines import job_requests
+
+_PARENT = "projects/some-project/locations/us-central1"
+
+
+def _legacy_template() -> dict:
+    return {
+        "pipelineSpec": {
+            "schemaVersion": "2.0.0",
+            "pipelineInfo": {"name": "some-pipeline"},
+            "components": {
+                "comp-for-loop-1": {"dag": {"tasks": {"nested-task": {}}}},
+                "comp-some-task": {"executorLabel": "exec-some-task"},
+            },
+            "root": {
+                "inputDefinitions": {
+                    "parameters": {
+                        "message": {"type": "STRING"},
+                        "count": {"type": "INT"},
+                        "ratio": {"type": "DOUBLE"},
+                    }
+                },
+                "dag": {"tasks": {"some-task": {"cachingOptions": {}}}},
+            },
+        },
+        "runtimeConfig": {"parameters": {"ratio": {"doubleValue": 0.5}}},
+    }
+
+
+def _template() -> dict:
+    return {
+        "schemaVersion": "2.1.0",
+        "pipelineInfo": {"name": "some-pipeline"},
+        "root": {
+            "inputDefinitions": {
+                "parameters": {
+                    "message": {"parameterType": "STRING"},
+                    "flags": {"parameterType": "LIST", "isOptional": True},
+                    "enabled": {"parameterType": "BOOLEAN", "defaultValue": False},
+                }
+            },
+            "dag": {"tasks": {}},
+        },
+    }
+
+
+class JobTemplateTest(unittest.TestCase):
+    """Tests binding parameters to a template."""
+
+    def setUp(self):
+        self.template = job_requests.JobTemplate(
+            _legacy_template(), "some-pipeline", "gs://bucket/root"
+        )
+
+    def test_parse(self):
+        """It parses the template into the shared job resource."""
+        self.assertTrue(self.template.legacy)
+        self.assertEqual(["count", "message"], self.template.required_parameters)
+        resource = self.template.resource
+        self.assertEqual("some-pipeline", resource.display_name)
+        self.assertEqual(
+            "gs://bucket/root", resource.runtime_config.gcs_output_directory
+        )
+        self.assertEqual(0.5, resource.runtime_config.parameters["ratio"].double_value)
+        self.assertEqual(
+            "2.0.0", resource.pipeline_spec.fields["schemaVersion"].string_value
+        )
+
+    def test_invalid_template(self):
+        """It rejects templates that are not pipeline specs."""
+        with self.assertRaisesRegex(ValueError, "root"):
+            job_requests.JobTemplate(
+                {"schemaVersion": "2.0.0", "pipelineInfo": {}}, "name", "gs://b"
+            )
+
+    def test_bind(self):
+        """It checks values against the input definitions."""
+        self.assertEqual(
+            {"message": "hi", "count": 2},
+            self.template.bind({"message": "hi", "count": 2, "ratio": None}),
+        )
+        self.assertEqual(
+            {"message": '{"a": 1}', "count": 2},
+            self.template.bind({"message": {"a": 1}, "count": 2}),
+        )
+
+    def test_bind_strings(self):
+        """It converts string values to the parameter types."""
+        self.assertEqual(
+            {"message": "5", "count": 5, "ratio": 0.25},
+            self.template.bind({"message": "5", "count": "5", "ratio": "0.25"}),
+        )
+        template = job_requests.JobTemplate(
+            _template(), "some-pipeline", "gs://bucket/root"
+        )
+        self.assertEqual(
+            {"message": "hi", "flags": ["a", 1], "enabled": True},
+            template.bind({"message": "hi", "flags": '["a", 1]', "enabled": "true"}),
+        )
+
+    def test_bind_invalid(self):
+        """It rejects unknown, missing and mistyped parameters."""
+        with self.assertRaisesRegex(ValueError, "typo"):
+            self.template.bind({"message": "hi", "count": 2, "typo": 1})
+        with self.assertRaisesRegex(ValueError, "count"):
+            self.template.bind({"message": "hi"})
+        with self.assertRaisesRegex(TypeError, "count"):
+            self.template.bind({"message": "hi", "count": "two"})
+        with self.assertRaisesRegex(TypeError, "count"):
+            self.template.bind({"message": "hi", "count": True})
+
+    def test_to_request(self):
+        """It copies the shared template into each request."""
+        requests = self.template.create_requests(
+            ["job-1", "job-2"],
+            [{"message": "a", "count": 1}, {"message": "b", "count": 2, "ratio": 2}],
+        )
+        first, second = (r.to_request(_PARENT) for r in requests)
+        self.assertEqual(_PARENT, first.parent)
+        self.assertEqual("job-1", first.pipeline_job_id)
+        self.assertEqual("job-2", second.pipeline_job_id)
+        parameters = second.pipeline_job.runtime_config.parameters
+        self.assertEqual("b", parameters["message"].string_value)
+        self.assertEqual(2, parameters["count"].int_value)
+        self.assertEqual(2.0, parameters["ratio"].double_value)
+        self.assertEqual(
+            0.5, first.pipeline_job.runtime_config.parameters["ratio"].double_value
+        )
+        self.assertNotIn("message", self.template.resource.runtime_config.parameters)
+
+    def test_enable_caching(self):
+        """It overrides caching of all tasks without modifying the template."""
+        template = _legacy_template()
+        original = copy.deepcopy(template)
+        for enable_caching in (False, True):
+            job_template = job_requests.JobTemplate(
+                template,
+                "some-pipeline",
+                "gs://bucket/root",
+                enable_caching=enable_caching,
+            )
+            self.assertEqual(original, template)
+            spec = json_format.MessageToDict(job_template.resource.pipeline_spec)
+            nested_dag = spec["components"]["comp-for-loop-1"]["dag"]
+            for task in (
+                spec["root"]["dag"]["tasks"]["some-task"],
+                nested_dag["tasks"]["nested-task"],
+            ):
+                self.assertEqual(
+                    {"enableCache": enable_caching}, task["cachingOptions"]
+                )
+        spec = json_format.MessageToDict(self.template.resource.pipeline_spec)
+        self.assertEqual(
+            {}, spec["root"]["dag"]["tasks"]["some-task"]["cachingOptions"]
+        )
+
+    def test_parameter_values(self):
+        """It sets values of newer specs as protobuf values."""
+        template = job_requests.JobTemplate(
+            _template(), "some-pipeline", "gs://bucket/root"
+        )
+        self.assertFalse(template.legacy)
+        self.assertEqual(["message"], template.required_parameters)
+        with self.assertRaisesRegex(TypeError, "flags"):
+            template.bind({"message": "hi", "flags": "a"})
+        (request,) = template.create_requests(
+            ["job-1"], [{"message": "hi", "flags": ["a", 1], "enabled": True}]
+        )
+        runtime_config = request.to_request(_PARENT).pipeline_job.runtime_config
+        self.assertEqual(
+            {"message": "hi", "flags": ["a", 1], "enabled": True},
+            dict(runtime_config.parameter_values),
+        )
@@ -0,0 +1,176 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests `job_watcher.py`."""
+
+import datetime
+import logging
+import pickle
+from typing import Dict, List, Sequence
+import unittest
+from unittest import mock
+
+from google.cloud import aiplatform as vertex
+from google.cloud.aiplatform_v1.types import pipeline_job as gca_pipeline_job
+
+from pipelines import job_watcher
+
+
+# Disables logging from objects-under-test
+logging.disable(logging.CRITICAL)
+
+_RUNNING = "PIPELINE_STATE_RUNNING"
+_SUCCEEDED = "PIPELINE_STATE_SUCCEEDED"
+_FAILED = "PIPELINE_STATE_FAILED"
+
+
+class FakeJobStateProvider:
+    """Returns scripted job states, one mapping per poll."""
+
+    def __init__(self, polls: List[Dict[str, str]]) -> None:  # noqa: D107
+        self.polls = polls
+        self.requests: List[Sequence[str]] = []
+
+    def get_states(self, job_ids: Sequence[str]) -> Dict[str, str]:
+        self.requests.append(job_ids)
+        states = self.polls[min(len(self.requests), len(self.polls)) - 1]
+        return {job_id: states[job_id] for job_id in job_ids if job_id in states}
+
+
+class WatchTest(unittest.TestCase):
+    """Tests `watch` function."""
+
+    def setUp(self):
+        self.mock_sleep = mock.patch.object(
+            job_watcher.asyncio, "sleep", new=mock.AsyncMock()
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_all_succeed(self):
+        """It polls only pending jobs until all are terminal."""
+        provider = FakeJobStateProvider(
+            [
+                {"a": _RUNNING, "b": _RUNNING},
+                {"a": _SUCCEEDED, "b": _RUNNING},
+                {"a": _SUCCEEDED, "b": _SUCCEEDED},
+            ]
+        )
+        output = job_watcher.watch(["a", "b"], provider)
+        self.assertEqual({"a": _SUCCEEDED, "b": _SUCCEEDED}, output)
+        self.assertEqual([["a", "b"], ["a", "b"], ["b"]], provider.requests)
+
+    def test_fail_fast(self):
+        """It raises an error as soon as a job fails."""
+        provider = FakeJobStateProvider([{"a": _FAILED, "b": _RUNNING}])
+        with self.assertRaises(job_watcher.JobFailedError) as context:
+            job_watcher.watch(["a", "b"], provider)
+        self.assertEqual("a", context.exception.job_id)
+        self.assertEqual(1, len(provider.requests))
+
+    def test_no_fail_fast(self):
+        """It waits for all jobs if `fail_fast` is False."""
+        provider = FakeJobStateProvider(
+            [{"a": _FAILED, "b": _RUNNING}, {"a": _FAILED, "b": _SUCCEEDED}]
+        )
+        output = job_watcher.watch(["a", "b"], provider, fail_fast=False)
+        self.assertEqual({"a": _FAILED, "b": _SUCCEEDED}, output)
+
+    def test_adaptive_backoff(self):
+        """It backs off while nothing changes and resets on state changes."""
+        provider = FakeJobStateProvider(
+            [
+                {"a": _RUNNING, "b": _RUNNING},
+                {"a": _RUNNING, "b": _RUNNING},
+                {"a": _RUNNING, "b": _RUNNING},
+                {"a": _RUNNING, "b": _RUNNING},
+                {"a": _SUCCEEDED, "b": _RUNNING},
+                {"a": _SUCCEEDED, "b": _RUNNING},
+                {"a": _SUCCEEDED, "b": _SUCCEEDED},
+            ]
+        )
+        job_watcher.watch(
+            ["a", "b"], provider, initial_interval=1, max_interval=3, multiplier=2
+        )
+        intervals = [call.args[0] for call in self.mock_sleep.await_args_list]
+        self.assertEqual([1, 2, 3, 3, 1, 2], intervals)
+
+    def test_not_found(self):
+        """It fails once a job is missing from consecutive polls."""
+        provider = FakeJobStateProvider([{"a": _RUNNING}])
+        with self.assertRaises(job_watcher.JobNotFoundError) as context:
+            job_watcher.watch(["a", "typo"], provider, max_missing_polls=2)
+        self.assertEqual(["typo"], context.exception.job_ids)
+        self.assertEqual(2, len(provider.requests))
+
+    def test_intermittently_missing(self):
+        """It keeps watching jobs that are missing from fewer polls."""
+        provider = FakeJobStateProvider(
+            [
+                {"b": _RUNNING},
+                {"a": _RUNNING, "b": _RUNNING},
+                {"b": _RUNNING},
+                {"a": _SUCCEEDED, "b": _SUCCEEDED},
+            ]
+        )
+        output = job_watcher.watch(["a", "b"], provider, max_missing_polls=2)
+        self.assertEqual({"a": _SUCCEEDED, "b": _SUCCEEDED}, output)
+
+
+class ErrorTest(unittest.TestCase):
+    """Tests the errors raised by watches."""
+
+    def test_pickle(self):
+        """It keeps the attributes and messages of errors when pickled."""
+        for error in (
+            job_watcher.JobFailedError("a", _FAILED),
+            job_watcher.JobNotFoundError(["a", "b"]),
+        ):
+            copy = pickle.loads(pickle.dumps(error))
+            self.assertEqual(vars(error), vars(copy))
+            self.assertEqual(str(error), str(copy))
+        self.assertEqual("Jobs not found: a, b.", str(copy))
+
+
+class VertexJobStateProviderTest(unittest.TestCase):
+    """Tests `VertexJobStateProvider`."""
+
+    @mock.patch.object(vertex.PipelineJob, "list", autospec=True)
+    def test_batched_fetches(self, mock_list):
+        """It fetches job states in batched list requests."""
+        job = mock.Mock()
+        job.name = "a"
+        job.gca_resource.state.name = _RUNNING
+        mock_list.return_value = [job]
+        provider = job_watcher.VertexJobStateProvider("us-central1", batch_size=2)
+        output = provider.get_states(["a", "b", "c"])
+        self.assertEqual({"a": _RUNNING}, output)
+        self.assertEqual(2, mock_list.call_count)
+        self.assertEqual(
+            "pipeline_job_user_id='a' OR pipeline_job_user_id='b'",
+            mock_list.call_args_list[0].kwargs["filter"],
+        )
+
+
+class GetDurationTest(unittest.TestCase):
+    """Tests `get_duration` function."""
+
+    def test_get_duration(self):
+        """It returns the run time of jobs that have ended."""
+        start_time = datetime.datetime(2022, 6, 30, tzinfo=datetime.timezone.utc)
+        job = gca_pipeline_job.PipelineJob(start_time=start_time)
+        self.assertIsNone(job_watcher.get_duration(job))
+        job.end_time = start_time + datetime.timedelta(minutes=2)
+        self.assertEqual(120.0, job_watcher.get_duration(job))
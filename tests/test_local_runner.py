@@ -0,0 +1,243 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `local_runner` module."""
+import json
+import logging
+import os
+import tempfile
+from typing import NamedTuple
+import unittest
+from unittest import mock
+
+import kfp
+from kfp.v2 import compiler
+from kfp.v2 import dsl
+
+from pipelines import local_runner
+from pipelines import step_cache
+
+# Disables logging from objects-under-test
+logging.disable(logging.CRITICAL)
+
+
+@dsl.component
+def _make_dataset(size: int, dataset: dsl.Output[dsl.Dataset]) -> str:
+    with open(dataset.path, "w") as fp:
+        fp.write("x" * size)
+    return "made"
+
+
+@dsl.component
+def _read_dataset(
+    dataset: dsl.Input[dsl.Dataset], tag: str
+) -> NamedTuple("Outputs", [("size", int), ("tag", str)]):  # type: ignore[valid-type]  # noqa: F821
+    import os
+
+    return (os.path.getsize(dataset.path), tag)
+
+
+@dsl.component
+def _sleep(seconds: float) -> str:
+    import time
+
+    start_time = time.time()
+    time.sleep(seconds)
+    return f"{start_time},{time.time()}"
+
+
+@dsl.component
+def _fail(message: str) -> str:
+    raise RuntimeError(message)
+
+
+@kfp.dsl.pipeline(name="data-pipeline")
+def _data_pipeline(size: int, tag: str = "default") -> None:
+    make_task = _make_dataset(size=size)
+    _read_dataset(dataset=make_task.outputs["dataset"], tag=tag)
+
+
+@kfp.dsl.pipeline(name="parallel-pipeline")
+def _parallel_pipeline(seconds: float) -> None:
+    _sleep(seconds=seconds)
+    _sleep(seconds=seconds)
+
+
+@kfp.dsl.pipeline(name="failing-pipeline")
+def _failing_pipeline(message: str) -> None:
+    fail_task = _fail(message=message)
+    _sleep(seconds=0.0).after(fail_task)
+
+
+class LocalRunnerTest(unittest.TestCase):
+    """Tests `LocalRunner`."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.pipeline_root = os.path.join(self.tempdir.name, "root")
+        cache_dir = os.path.join(self.tempdir.name, "cache")
+        mock.patch.dict(os.environ, {"PIPELINES_CACHE_DIR": cache_dir}).start()
+        mock.patch.object(step_cache, "_step_cache", None).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.tempdir.cleanup()
+
+    def _compile(self, pipeline_func) -> str:
+        pipeline_path = os.path.join(self.tempdir.name, "pipeline.json")
+        compiler.Compiler().compile(
+            pipeline_func=pipeline_func, package_path=pipeline_path
+        )
+        return pipeline_path
+
+    def test_run(self):
+        """It passes parameters and artifacts between tasks."""
+        runner = local_runner.LocalRunner(
+            self._compile(_data_pipeline), self.pipeline_root
+        )
+        result = runner.run({"size": "5"}, run_id="run")
+        self.assertTrue(result.ok)
+        self.assertEqual(os.path.join(self.pipeline_root, "run"), result.run_dir)
+        make_result, read_result = result.tasks
+        self.assertEqual({"Output": "made"}, make_result.parameters)
+        self.assertTrue(os.path.isfile(make_result.artifacts["dataset"]))
+        self.assertEqual({"size": 5, "tag": "default"}, read_result.parameters)
+
+    def test_parallel(self):
+        """It runs independent tasks at the same time."""
+        runner = local_runner.LocalRunner(
+            self._compile(_parallel_pipeline), self.pipeline_root, max_workers=2
+        )
+        result = runner.run({"seconds": 0.5})
+        self.assertTrue(result.ok)
+        (start_a, end_a), (start_b, end_b) = [
+            map(float, task.parameters["Output"].split(",")) for task in result.tasks
+        ]
+        self.assertLess(start_a, end_b)
+        self.assertLess(start_b, end_a)
+
+    def test_failure(self):
+        """It records the error of a failed task and skips downstream tasks."""
+        runner = local_runner.LocalRunner(
+            self._compile(_failing_pipeline), self.pipeline_root
+        )
+        result = runner.run({"message": "boom"}, run_id="run")
+        self.assertFalse(result.ok)
+        states = {task.name: task.state for task in result.tasks}
+        self.assertEqual(
+            {"fail": local_runner.FAILED, "sleep": local_runner.SKIPPED}, states
+        )
+        with open(os.path.join(result.run_dir, "fail", "stdout.log")) as fp:
+            self.assertIn("RuntimeError: boom", fp.read())
+
+    def test_missing_parameter(self):
+        """It requires values for pipeline parameters without defaults."""
+        runner = local_runner.LocalRunner(
+            self._compile(_data_pipeline), self.pipeline_root
+        )
+        with self.assertRaises(ValueError):
+            runner.run({})
+
+    def test_unknown_parameter(self):
+        """It rejects parameters the pipeline does not define."""
+        runner = local_runner.LocalRunner(
+            self._compile(_data_pipeline), self.pipeline_root
+        )
+        with self.assertRaises(ValueError):
+            runner.run({"size": 1, "color": "red"})
+
+    def test_container_component(self):
+        """It rejects components that are not lightweight Python components."""
+        pipeline_path = self._compile(_data_pipeline)
+        with open(pipeline_path) as fp:
+            template = json.load(fp)
+        executors = template["pipelineSpec"]["deploymentSpec"]["executors"]
+        for executor in executors.values():
+            executor["container"]["command"] = ["python", "train.py"]
+        with open(pipeline_path, "w") as fp:
+            json.dump(template, fp)
+        with self.assertRaises(ValueError):
+            local_runner.LocalRunner(pipeline_path, self.pipeline_root)
+
+    def test_schema_version(self):
+        """It rejects pipeline specs of newer schemas."""
+        pipeline_path = self._compile(_data_pipeline)
+        with open(pipeline_path) as fp:
+            template = json.load(fp)
+        template["pipelineSpec"]["schemaVersion"] = "2.1.0"
+        with open(pipeline_path, "w") as fp:
+            json.dump(template, fp)
+        with self.assertRaisesRegex(ValueError, "2.1.0"):
+            local_runner.LocalRunner(pipeline_path, self.pipeline_root)
+
+    @mock.patch.object(local_runner.metadata, "version", return_value="2.0.0")
+    def test_kfp_version(self, _):
+        """It rejects KFP releases whose artifact paths it cannot patch."""
+        with self.assertRaisesRegex(RuntimeError, "2.0.0"):
+            local_runner.LocalRunner(self._compile(_data_pipeline), self.pipeline_root)
+
+    def test_cache_hit(self):
+        """It reuses the outputs of tasks whose component and inputs are unchanged."""
+        runner = local_runner.LocalRunner(
+            self._compile(_data_pipeline), self.pipeline_root, enable_caching=True
+        )
+        first = runner.run({"size": 5}, run_id="first")
+        second = runner.run({"size": 5}, run_id="second")
+        self.assertEqual([False, False], [task.cached for task in first.tasks])
+        self.assertEqual([True, True], [task.cached for task in second.tasks])
+        self.assertEqual(
+            [task.parameters for task in first.tasks],
+            [task.parameters for task in second.tasks],
+        )
+        dataset_path = second.tasks[0].artifacts["dataset"]
+        self.assertTrue(dataset_path.startswith(second.run_dir))
+        with open(dataset_path) as fp:
+            self.assertEqual("xxxxx", fp.read())
+
+    def test_cache_changed_input(self):
+        """It re-runs tasks whose inputs changed."""
+        runner = local_runner.LocalRunner(
+            self._compile(_data_pipeline), self.pipeline_root, enable_caching=True
+        )
+        runner.run({"size": 5}, run_id="first")
+        result = runner.run({"size": 5, "tag": "new"}, run_id="second")
+        self.assertEqual([True, False], [task.cached for task in result.tasks])
+        self.assertEqual("new", result.tasks[1].parameters["tag"])
+
+    def test_cache_changed_component(self):
+        """It re-runs tasks whose component changed, and their downstream tasks."""
+        pipeline_path = self._compile(_data_pipeline)
+        local_runner.LocalRunner(pipeline_path, self.pipeline_root).run(
+            {"size": 5}, run_id="first"
+        )
+        with open(pipeline_path) as fp:
+            template = json.load(fp)
+        executors = template["pipelineSpec"]["deploymentSpec"]["executors"]
+        command = executors["exec-make-dataset"]["container"]["command"]
+        command[-1] = command[-1].replace('"x" * size', '"y" * size')
+        with open(pipeline_path, "w") as fp:
+            json.dump(template, fp)
+        result = local_runner.LocalRunner(pipeline_path, self.pipeline_root).run(
+            {"size": 5}, run_id="second"
+        )
+        self.assertEqual([False, False], [task.cached for task in result.tasks])
+
+    def test_cache_disabled(self):
+        """It runs all tasks if caching is disabled."""
+        runner = local_runner.LocalRunner(
+            self._compile(_data_pipeline), self.pipeline_root, enable_caching=False
+        )
+        runner.run({"size": 5}, run_id="first")
+        result = runner.run({"size": 5}, run_id="second")
+        self.assertEqual([False, False], [task.cached for task in result.tasks])
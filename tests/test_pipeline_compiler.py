@@ -16,12 +16,17 @@
 
 import json
 import logging
+import os
 import tempfile
 import unittest
+from unittest import mock
 
 import cloudpathlib as cpl
+from cloudpathlib import local as cpl_local
+from google.api_core import exceptions as api_exceptions
 
 from pipelines import pipeline_compiler
+from pipelines import spec_store
 
 
 # Disables logging from objects-under-test
@@ -44,6 +49,17 @@ def _is_json_file(filepath: str) -> bool:
 class CompileTest(unittest.TestCase):
     """Tests `compile` function."""
 
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        mock.patch.dict(
+            os.environ, {"PIPELINES_CACHE_DIR": self.cache_dir.name}
+        ).start()
+        mock.patch.object(pipeline_compiler, "_compile_cache", None).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.cache_dir.cleanup()
+
     def test_local_output_path(self):
         """It generates a pipeline specification JSON file."""
         module_name = "sample_pipeline"
@@ -51,3 +67,185 @@ class CompileTest(unittest.TestCase):
         with tempfile.NamedTemporaryFile(suffix=".json") as output_path:
             pipeline_compiler.compile(module_name, function_name, output_path.name)
             self.assertTrue(_is_json_file(output_path.name))
+
+    def test_cache_hit(self):
+        """It reuses the cached specification when sources are unchanged."""
+        module_name = "sample_pipeline"
+        function_name = "pipeline"
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_path = os.path.join(tempdir, "pipeline.json")
+            first = pipeline_compiler.compile(module_name, function_name, output_path)
+            with mock.patch.object(
+                pipeline_compiler, "_kfp_compile_wrapper", autospec=True
+            ) as mock_kfp_compile:
+                second = pipeline_compiler.compile(
+                    module_name, function_name, output_path
+                )
+            mock_kfp_compile.assert_not_called()
+            self.assertEqual(first, second)
+            with open(output_path) as fp:
+                self.assertEqual(first, fp.read())
+        stats = pipeline_compiler.get_compile_cache().stats
+        self.assertEqual((1, 1), (stats.hits, stats.misses))
+
+    def test_cache_key_changes_with_kfp_version(self):
+        """It invalidates cached specifications when KFP is upgraded."""
+        key = pipeline_compiler._get_cache_key("sample_pipeline", "pipeline")
+        with mock.patch.object(
+            pipeline_compiler.metadata, "version", return_value="0.0.0"
+        ):
+            other_key = pipeline_compiler._get_cache_key("sample_pipeline", "pipeline")
+        self.assertNotEqual(key, other_key)
+
+    @mock.patch.object(pipeline_compiler, "_compile_with_cache", autospec=True)
+    def test_no_cache(self, mock_compile_with_cache):
+        """It bypasses the compile cache if `use_cache` is False."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_path = os.path.join(tempdir, "pipeline.json")
+            pipeline_compiler.compile(
+                "sample_pipeline", "pipeline", output_path, use_cache=False
+            )
+            self.assertTrue(_is_json_file(output_path))
+        mock_compile_with_cache.assert_not_called()
+
+    def test_image_registry(self):
+        """It rewrites components to use baked images from `image_registry`."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            output_path = os.path.join(tempdir, "pipeline.json")
+            spec = pipeline_compiler.compile(
+                "sample_pipeline", "pipeline", output_path, image_registry="gcr.io/p"
+            )
+            with open(output_path) as fp:
+                self.assertEqual(spec, fp.read())
+        executors = json.loads(spec)["pipelineSpec"]["deploymentSpec"]["executors"]
+        container = executors["exec-save-message-to-file"]["container"]
+        self.assertTrue(container["image"].startswith("gcr.io/p/components:"))
+        self.assertNotIn("pip install", " ".join(container["command"]))
+
+    def test_publish(self):
+        """It stores the specification under its digest and updates the alias."""
+        with tempfile.TemporaryDirectory() as root:
+            digest = pipeline_compiler.publish(
+                "sample_pipeline", "pipeline", root, alias="sample"
+            )
+            self.assertEqual(digest, spec_store.get_alias(root, "sample"))
+            self.assertTrue(_is_json_file(spec_store.get_spec_uri(root, digest)))
+            # An unchanged pipeline is stored under the same digest.
+            self.assertEqual(
+                digest, pipeline_compiler.publish("sample_pipeline", "pipeline", root)
+            )
+
+    def test_skip_unchanged_cloud_upload(self):
+        """It does not re-upload an unchanged specification to cloud storage."""
+        registry = {"gs": cpl_local.local_gs_implementation}
+        output_path = "gs://bucket/pipeline.json"
+        with mock.patch.dict(cpl.cloudpath.implementation_registry, registry):
+            spec = pipeline_compiler.compile("sample_pipeline", "pipeline", output_path)
+            self.assertTrue(_is_json_file(output_path))
+            with mock.patch.object(
+                cpl_local.LocalGSClient, "_upload_file", autospec=True
+            ) as mock_upload:
+                pipeline_compiler.compile("sample_pipeline", "pipeline", output_path)
+            mock_upload.assert_not_called()
+            self.assertEqual(spec, cpl.AnyPath(output_path).read_text())
+
+
+class UploadToGcsTest(unittest.TestCase):
+    """Tests conditional uploads of specifications to GCS."""
+
+    def setUp(self):
+        self.storage_client = mock.MagicMock()
+        self.bucket = self.storage_client.bucket.return_value
+        client = cpl.GSClient(storage_client=self.storage_client)
+        self.package_path = cpl.GSPath("gs://bucket/pipeline.json", client=client)
+        self.spec = '{"pipelineSpec": {}}'
+
+    def test_new_object(self):
+        """It uploads only if the object still does not exist."""
+        self.bucket.get_blob.return_value = None
+        output = pipeline_compiler._write_pipeline_spec(self.spec, self.package_path)
+        self.assertTrue(output)
+        self.bucket.blob.return_value.upload_from_string.assert_called_once_with(
+            self.spec.encode(),
+            content_type="application/json",
+            if_generation_match=0,
+        )
+
+    def test_unchanged_object(self):
+        """It skips the upload if the object checksum matches."""
+        blob = self.bucket.get_blob.return_value
+        blob.md5_hash = pipeline_compiler._get_md5(self.spec.encode())
+        output = pipeline_compiler._write_pipeline_spec(self.spec, self.package_path)
+        self.assertFalse(output)
+        self.bucket.blob.return_value.upload_from_string.assert_not_called()
+
+    def test_changed_object(self):
+        """It overwrites only the generation whose checksum was compared."""
+        blob = self.bucket.get_blob.return_value
+        blob.md5_hash = pipeline_compiler._get_md5(b"old spec")
+        blob.generation = 42
+        output = pipeline_compiler._write_pipeline_spec(self.spec, self.package_path)
+        self.assertTrue(output)
+        self.bucket.blob.return_value.upload_from_string.assert_called_once_with(
+            self.spec.encode(),
+            content_type="application/json",
+            if_generation_match=42,
+        )
+
+    def test_concurrent_write(self):
+        """It raises an error if another writer updated the object."""
+        self.bucket.get_blob.return_value = None
+        upload = self.bucket.blob.return_value.upload_from_string
+        upload.side_effect = api_exceptions.PreconditionFailed("conflict")
+        with self.assertRaises(RuntimeError):
+            pipeline_compiler._write_pipeline_spec(self.spec, self.package_path)
+
+
+class CompileManyTest(unittest.TestCase):
+    """Tests `compile_many` function."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        mock.patch.dict(os.environ, {"PIPELINES_CACHE_DIR": self.tempdir.name}).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.tempdir.cleanup()
+
+    def test_load_manifest(self):
+        """It reads compile tasks from a manifest file."""
+        manifest_path = os.path.join(self.tempdir.name, "manifest.yaml")
+        with open(manifest_path, "w") as fp:
+            fp.write(
+                "- module-name: sample_pipeline\n"
+                "  function-name: pipeline\n"
+                "  output-path: gs://bucket/pipeline.json\n"
+                "- module-name: sample_pipeline\n"
+                "  function-name: pipeline\n"
+                "  output-path: gs://bucket/baked.json\n"
+                "  image-registry: gcr.io/p\n"
+            )
+        output = pipeline_compiler.load_manifest(manifest_path)
+        expected = [
+            pipeline_compiler.CompileTask(
+                "sample_pipeline", "pipeline", "gs://bucket/pipeline.json"
+            ),
+            pipeline_compiler.CompileTask(
+                "sample_pipeline", "pipeline", "gs://bucket/baked.json", "gcr.io/p"
+            ),
+        ]
+        self.assertEqual(expected, output)
+
+    def test_failures_are_isolated(self):
+        """It compiles valid pipelines even if others fail."""
+        good_path = os.path.join(self.tempdir.name, "good.json")
+        tasks = [
+            pipeline_compiler.CompileTask("missing_module", "pipeline", "bad.json"),
+            pipeline_compiler.CompileTask("sample_pipeline", "pipeline", good_path),
+        ]
+        results = pipeline_compiler.compile_many(tasks, max_workers=2)
+        self.assertEqual(tasks, [result.task for result in results])
+        self.assertFalse(results[0].ok)
+        self.assertIn("ModuleNotFoundError", results[0].error)
+        self.assertTrue(results[1].ok)
+        self.assertTrue(_is_json_file(good_path))
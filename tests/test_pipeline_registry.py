@@ -0,0 +1,197 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `pipeline_registry` module."""
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from pipelines import pipeline_registry
+from pipelines import sources
+
+# Disables logging from objects-under-test
+logging.disable(logging.CRITICAL)
+
+_PIPELINES_SOURCE = '''
+import kfp
+from kfp import dsl as kfp_dsl
+from kfp.v2 import dsl
+from kfp.dsl import pipeline as pipeline_decorator
+
+
+@kfp.dsl.pipeline(name="first")
+def first(message: str, count: int = 1, *, flag: bool = False) -> None:
+    """First pipeline.
+
+    More details.
+    """
+
+
+@dsl.pipeline(name="second", description="Second pipeline.")
+def second():
+    pass
+
+
+@kfp_dsl.pipeline("third")
+def third(message):
+    pass
+
+
+@pipeline_decorator
+def fourth():
+    pass
+
+
+@dsl.component
+def not_a_pipeline(message: str) -> str:
+    return message
+
+
+def helper():
+    @dsl.pipeline(name="nested")
+    def nested():
+        pass
+'''
+
+
+class ListPipelinesTest(unittest.TestCase):
+    """Tests `list_pipelines` function."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.package_dir = pathlib.Path(self.tempdir.name, "package")
+        self.package_dir.mkdir()
+        mock.patch.object(sources, "PACKAGE_DIR", self.package_dir).start()
+        mock.patch.dict(
+            os.environ,
+            {"PIPELINES_CACHE_DIR": os.path.join(self.tempdir.name, "cache")},
+        ).start()
+        mock.patch.object(pipeline_registry, "_registry_cache", None).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.tempdir.cleanup()
+
+    def _write_module(self, relative_path: str, source: str) -> None:
+        module_path = self.package_dir / relative_path
+        module_path.parent.mkdir(parents=True, exist_ok=True)
+        module_path.write_text(source)
+
+    def test_decorators(self):
+        """It finds top-level functions decorated with `pipeline` under any alias."""
+        self._write_module("pipelines_a.py", _PIPELINES_SOURCE)
+        output = pipeline_registry.list_pipelines()
+        self.assertEqual(
+            ["first", "second", "third", "fourth"],
+            [pipeline.function_name for pipeline in output],
+        )
+        self.assertEqual(
+            ["first", "second", "third", None],
+            [pipeline.pipeline_name for pipeline in output],
+        )
+        self.assertEqual(
+            ["First pipeline.", "Second pipeline.", None, None],
+            [pipeline.description for pipeline in output],
+        )
+
+    def test_details(self):
+        """It returns parameters and source locations."""
+        self._write_module("sub/pipelines_a.py", _PIPELINES_SOURCE)
+        first = pipeline_registry.list_pipelines()[0]
+        self.assertEqual("sub.pipelines_a", first.module_name)
+        self.assertEqual(str(self.package_dir / "sub/pipelines_a.py"), first.path)
+        self.assertEqual(9, first.lineno)
+        self.assertEqual(
+            (
+                pipeline_registry.PipelineParameter("message", "str"),
+                pipeline_registry.PipelineParameter("count", "int", "1"),
+                pipeline_registry.PipelineParameter("flag", "bool", "False"),
+            ),
+            first.parameters,
+        )
+
+    def test_does_not_import(self):
+        """It neither imports the modules nor KFP."""
+        source = (
+            "from kfp import dsl\nraise RuntimeError()\n@dsl.pipeline\ndef p(): pass\n"
+        )
+        self._write_module("exploding.py", source)
+        modules = dict(sys.modules)
+        modules.pop("kfp", None)
+        with mock.patch.dict(sys.modules, modules, clear=True):
+            output = pipeline_registry.list_pipelines()
+            self.assertNotIn("kfp", sys.modules)
+        self.assertEqual(["p"], [pipeline.function_name for pipeline in output])
+
+    def test_skips_unparsable_modules(self):
+        """It skips modules with syntax errors."""
+        self._write_module("broken.py", "def broken(:\n")
+        self._write_module("pipelines_a.py", _PIPELINES_SOURCE)
+        output = pipeline_registry.list_pipelines()
+        self.assertEqual({"pipelines_a"}, {p.module_name for p in output})
+
+    @mock.patch.object(
+        pipeline_registry, "scan_module", wraps=pipeline_registry.scan_module
+    )
+    def test_cache(self, mock_scan_module):
+        """It rescans only modules that changed since the last scan."""
+        self._write_module("a.py", _PIPELINES_SOURCE)
+        self._write_module("b.py", _PIPELINES_SOURCE)
+        first_output = pipeline_registry.list_pipelines()
+        self.assertEqual(2, mock_scan_module.call_count)
+
+        mock_scan_module.reset_mock()
+        self.assertEqual(first_output, pipeline_registry.list_pipelines())
+        mock_scan_module.assert_not_called()
+
+        self._write_module("b.py", "")
+        output = pipeline_registry.list_pipelines()
+        mock_scan_module.assert_called_once_with("b", self.package_dir / "b.py")
+        self.assertEqual({"a"}, {p.module_name for p in output})
+
+    @mock.patch.object(pipeline_registry, "scan_module", autospec=True)
+    def test_no_cache(self, mock_scan_module):
+        """It scans all modules with `use_cache=False`."""
+        mock_scan_module.return_value = []
+        self._write_module("a.py", "")
+        pipeline_registry.list_pipelines()
+        pipeline_registry.list_pipelines(use_cache=False)
+        self.assertEqual(2, mock_scan_module.call_count)
+
+    def test_get_pipeline(self):
+        """It returns a single pipeline or raises an error if there is none."""
+        self._write_module("pipelines_a.py", _PIPELINES_SOURCE)
+        output = pipeline_registry.get_pipeline("pipelines_a", "second")
+        self.assertEqual("second", output.pipeline_name)
+        with self.assertRaises(LookupError):
+            pipeline_registry.get_pipeline("pipelines_a", "not_a_pipeline")
+
+
+class SamplePipelineTest(unittest.TestCase):
+    """Tests `get_pipeline` on the `pipelines` package."""
+
+    def test_sample_pipeline(self):
+        """It finds the sample pipeline."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            with mock.patch.dict(os.environ, {"PIPELINES_CACHE_DIR": tempdir}):
+                with mock.patch.object(pipeline_registry, "_registry_cache", None):
+                    output = pipeline_registry.get_pipeline(
+                        "sample_pipeline", "pipeline"
+                    )
+        self.assertEqual("sample-pipeline", output.pipeline_name)
+        self.assertEqual("sample_pipeline.py", os.path.basename(output.path))
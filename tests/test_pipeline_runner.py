@@ -14,22 +14,81 @@
 
 """Tests `pipeline_runner.py`."""
 
+import asyncio
+import json
 import logging
+import os
 import tempfile
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional, Sequence
 import unittest
 from unittest import mock
 
+from google.api_core import exceptions
+import google.auth
 from google.cloud import aiplatform as vertex
+from google.cloud.aiplatform import initializer
+from google.cloud.aiplatform.utils import gcs_utils
+from google.cloud.aiplatform_v1.types import pipeline_job as gca_pipeline_job
+from google.cloud.aiplatform_v1.types import pipeline_service
 import yaml
 
+from pipelines import job_index
+from pipelines import pipeline_compiler
 from pipelines import pipeline_runner
+from pipelines import rate_limit
+from pipelines import spec_store
+from pipelines import template_cache
+from pipelines import utils
 
 
 # Disables logging from objects-under-test
 logging.disable(logging.CRITICAL)
 
 
+def _template(name: str = "sample-pipeline") -> Dict[str, Any]:
+    """Returns a minimal pipeline template whose parameters all have defaults."""
+    parameters = {"name": "STRING", "message": "STRING", "count": "INT", "a": "INT"}
+    return {
+        "pipelineSpec": {
+            "schemaVersion": "2.0.0",
+            "pipelineInfo": {"name": name},
+            "components": {},
+            "root": {
+                "inputDefinitions": {
+                    "parameters": {
+                        name: {"type": parameter_type}
+                        for name, parameter_type in parameters.items()
+                    }
+                },
+                "dag": {"tasks": {}},
+            },
+        },
+        "runtimeConfig": {
+            "parameters": {
+                "name": {"stringValue": ""},
+                "message": {"stringValue": ""},
+                "count": {"intValue": "0"},
+                "a": {"intValue": "0"},
+            }
+        },
+    }
+
+
+def _write_template(path: str, name: str = "sample-pipeline") -> None:
+    """Writes the template returned by `_template`."""
+    with open(path, "w") as fp:
+        json.dump(_template(name), fp)
+
+
+def _get_created_jobs(api_client: mock.Mock) -> List[gca_pipeline_job.PipelineJob]:
+    """Returns the jobs created through a mock API client."""
+    return [
+        call.kwargs["request"].pipeline_job
+        for call in api_client.create_pipeline_job.call_args_list
+    ]
+
+
 class PipelineRunConfigTest(unittest.TestCase):
     """Tests `PipelineRunConfig`."""
 
@@ -44,6 +103,10 @@ class PipelineRunConfigTest(unittest.TestCase):
             "enable-caching": False,
             "service-account": "name@project.iam.gserviceaccount.com",
             "sync": False,
+            "max-submissions-per-second": 2.5,
+            "submission-burst": 10,
+            "max-submission-retries": 3,
+            "dedupe-window": 3600,
         }
         self.run_config_params = self.required_params
 
@@ -74,31 +137,788 @@ class PipelineRunConfigTest(unittest.TestCase):
             output = pipeline_runner.PipelineRunConfig.from_file(tempf.name)
             self.assertEqual(expected, output)
 
+    def test_from_file_dedupe_window_duration(self) -> None:
+        """It parses the dedupe window as a duration."""
+        self.run_config_params["dedupe-window"] = "12h"
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml") as tempf:
+            self._write_config(tempf)
+            output = pipeline_runner.PipelineRunConfig.from_file(tempf.name)
+        self.assertEqual(12 * 60 * 60, output.dedupe_window)
+
+
+class RunnerTestCase(unittest.TestCase):
+    """Base class for tests submitting jobs to mock Vertex AI APIs."""
+
+    # Project of the default credentials.
+    default_project = "some-project"
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        mock.patch.dict(
+            os.environ, {"PIPELINES_CACHE_DIR": self.cache_dir.name}
+        ).start()
+        self.credentials = mock.Mock()
+        self.mock_auth_default = mock.patch.object(
+            google.auth,
+            "default",
+            return_value=(self.credentials, self.default_project),
+        ).start()
+        self.mock_create_bucket = mock.patch.object(
+            gcs_utils, "create_gcs_bucket_for_pipeline_artifacts_if_it_does_not_exist"
+        ).start()
+        self.mock_pipeline_job = mock.patch.object(
+            vertex, "PipelineJob", autospec=True
+        ).start()
+        self.mock_client = mock.patch.object(
+            pipeline_runner.pipeline_service, "PipelineServiceClient", autospec=True
+        ).start()
+        self.api_client = self.mock_client.return_value
+        self.pipeline_path = os.path.join(self.cache_dir.name, "pipeline.json")
+        _write_template(self.pipeline_path)
+
+    def tearDown(self):
+        mock.patch.stopall()
 
-class RunTest(unittest.TestCase):
+
+class RunTest(RunnerTestCase):
     """Tests `run` function."""
 
-    @mock.patch.object(vertex, "PipelineJob", autospec=True)
-    def test_default_run_config(self, mock_pipeline_job):
+    def test_default_run_config(self):
         """It tests running the pipeline using default run config values."""
         pipeline_params = {"name": "World"}
         run_config = pipeline_runner.PipelineRunConfig(
             pipeline_name="Sample pipeline",
-            pipeline_path="/path/to/pipeline.json",
+            pipeline_path=self.pipeline_path,
             gcs_root_path="gs://some-staging-bucket",
             location="us-central1",
         )
         output = pipeline_runner.run(run_config, pipeline_params)
         self.assertIsInstance(output, str)
-        mock_pipeline_job.assert_called_once_with(
-            display_name=run_config.pipeline_name,
-            job_id=mock.ANY,
-            template_path=run_config.pipeline_path,
-            pipeline_root=run_config.gcs_root_path,
-            parameter_values=pipeline_params,
-            enable_caching=run_config.enable_caching,
+        request = self.api_client.create_pipeline_job.call_args.kwargs["request"]
+        self.assertEqual("projects/some-project/locations/us-central1", request.parent)
+        self.assertEqual(output, request.pipeline_job_id)
+        job = request.pipeline_job
+        self.assertEqual(run_config.pipeline_name, job.display_name)
+        self.assertEqual(
+            run_config.gcs_root_path, job.runtime_config.gcs_output_directory
+        )
+        self.assertEqual("World", job.runtime_config.parameters["name"].string_value)
+        self.mock_pipeline_job.assert_not_called()
+        self.mock_pipeline_job.get.assert_called_once_with(
+            output,
+            project="some-project",
             location=run_config.location,
+            credentials=self.credentials,
+        )
+        self.mock_pipeline_job.get.return_value.wait.assert_called_once_with()
+
+    def test_string_params(self):
+        """It converts string parameters, as passed on the command line."""
+        run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="sample-pipeline",
+            pipeline_path=self.pipeline_path,
+            gcs_root_path="gs://some-staging-bucket",
+            location="us-central1",
+        )
+        pipeline_runner.run(run_config, {"count": "5"})
+        (job,) = _get_created_jobs(self.api_client)
+        self.assertEqual(5, job.runtime_config.parameters["count"].int_value)
+
+    @mock.patch.object(template_cache.TemplateCache, "get_local_path", autospec=True)
+    def test_cached_remote_template(self, mock_get_local_path):
+        """It creates the job from a locally cached copy of a GCS template."""
+        _write_template(self.pipeline_path, name="cached-pipeline")
+        mock_get_local_path.return_value = self.pipeline_path
+        run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="sample-pipeline",
+            pipeline_path="gs://bucket/pipeline.json",
+            gcs_root_path="gs://some-staging-bucket",
+            location="us-central1",
+        )
+        pipeline_runner.run(run_config, {})
+        mock_get_local_path.assert_called_once_with(
+            mock.ANY, run_config.pipeline_path, immutable=False
+        )
+        (job,) = _get_created_jobs(self.api_client)
+        self.assertEqual("cached-pipeline", job.pipeline_spec["pipelineInfo"]["name"])
+
+    def test_stored_template(self):
+        """It resolves an alias of a stored specification under the root path."""
+        with tempfile.TemporaryDirectory() as root:
+            spec_store.put(json.dumps(_template("stored-pipeline")), root, "latest")
+            run_config = pipeline_runner.PipelineRunConfig(
+                pipeline_name="sample-pipeline",
+                pipeline_path="alias:latest",
+                gcs_root_path=root,
+                location="us-central1",
+            )
+            pipeline_runner.run(run_config, {})
+        (job,) = _get_created_jobs(self.api_client)
+        self.assertEqual("stored-pipeline", job.pipeline_spec["pipelineInfo"]["name"])
+
+
+class LoadParamSetsTest(unittest.TestCase):
+    """Tests `load_param_sets` function."""
+
+    def _load(self, data: Any) -> List[Dict[str, Any]]:
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml") as tempf:
+            yaml.dump(data, tempf, sort_keys=False)
+            tempf.flush()
+            return pipeline_runner.load_param_sets(tempf.name)
+
+    def test_list(self):
+        """It reads a list of parameter sets."""
+        data = [{"lr": 0.1}, {"lr": 0.01}]
+        self.assertEqual(data, self._load(data))
+
+    def test_grid(self):
+        """It expands a grid to the cartesian product of its values."""
+        data = {"grid": {"lr": [0.1, 0.01], "depth": [2, 4]}}
+        expected = [
+            {"lr": 0.1, "depth": 2},
+            {"lr": 0.1, "depth": 4},
+            {"lr": 0.01, "depth": 2},
+            {"lr": 0.01, "depth": 4},
+        ]
+        self.assertEqual(expected, self._load(data))
+
+
+class RunManyTest(RunnerTestCase):
+    """Tests `run_many` function."""
+
+    def setUp(self):
+        super().setUp()
+        self.run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="sample-pipeline",
+            pipeline_path=self.pipeline_path,
+            gcs_root_path="gs://some-staging-bucket",
+            location="us-central1",
+        )
+        self.param_sets = [{"message": str(i)} for i in range(5)]
+
+    def test_submits_all_jobs(self):
+        """It submits one job per parameter set without blocking."""
+        results = pipeline_runner.run_many(
+            self.run_config, self.param_sets, max_in_flight=2
+        )
+        self.assertEqual(self.param_sets, [r.pipeline_params for r in results])
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(5, len({result.job_id for result in results}))
+        self.assertEqual(
+            {str(i) for i in range(5)},
+            {
+                job.runtime_config.parameters["message"].string_value
+                for job in _get_created_jobs(self.api_client)
+            },
+        )
+        self.mock_pipeline_job.get.assert_not_called()
+
+    def test_records_submitted_jobs(self):
+        """It records every submitted job in the job index."""
+        results = pipeline_runner.run_many(self.run_config, self.param_sets)
+        records = job_index.get_job_index().query(pipeline_name="sample-pipeline")
+        self.assertEqual(
+            {result.job_id for result in results},
+            {record.job_id for record in records},
+        )
+        record = job_index.get_job_index().get(results[0].job_id)
+        self.assertEqual(self.param_sets[0], record.params)
+        self.assertEqual(
+            job_index.get_params_hash(self.param_sets[0]), record.params_hash
+        )
+        self.assertEqual("us-central1", record.location)
+        self.assertEqual("some-project", record.project)
+        self.assertIsNone(record.state)
+
+    def test_failures_are_isolated(self):
+        """It reports failed submissions without aborting the others."""
+        self.api_client.create_pipeline_job.side_effect = [
+            None,
+            RuntimeError("quota"),
+            None,
+        ]
+        param_sets = [*self.param_sets[:3], {"typo": 1}]
+        results = pipeline_runner.run_many(self.run_config, param_sets, max_in_flight=1)
+        self.assertEqual([True, False, True, False], [result.ok for result in results])
+        self.assertIn("typo", results[3].error)
+        latencies = pipeline_runner.summarize_latencies(results)
+        self.assertEqual({"p50", "p90", "p99", "max"}, set(latencies))
+
+
+class PipelineRunnerTest(RunnerTestCase):
+    """Tests `PipelineRunner`."""
+
+    default_project = "default-project"
+
+    def setUp(self):
+        super().setUp()
+        self.run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="sample-pipeline",
+            pipeline_path=self.pipeline_path,
+            gcs_root_path="gs://some-staging-bucket",
+            location="us-central1",
+            sync=False,
         )
-        mock_pipeline_job.return_value.run.assert_called_once_with(
-            service_account=run_config.service_account, sync=run_config.sync
+
+    def test_reuses_context(self):
+        """It discovers credentials and creates an API client only once."""
+        runner = pipeline_runner.PipelineRunner(self.run_config)
+        runner.run({"message": "first"})
+        runner.run({"message": "second"})
+        self.mock_auth_default.assert_called_once()
+        self.mock_client.assert_called_once()
+        self.mock_pipeline_job.assert_not_called()
+        requests = [
+            call.kwargs["request"]
+            for call in self.api_client.create_pipeline_job.call_args_list
+        ]
+        self.assertEqual(2, len(requests))
+        for request in requests:
+            self.assertEqual(
+                "projects/default-project/locations/us-central1", request.parent
+            )
+
+    def test_encryption_spec(self):
+        """It protects jobs with the key set by `aiplatform.init`."""
+        key = "projects/p/locations/us-central1/keyRings/r/cryptoKeys/k"
+        # Restores the global configuration afterwards.
+        with mock.patch.object(initializer.global_config, "_encryption_spec_key_name"):
+            vertex.init(encryption_spec_key_name=key)
+            pipeline_runner.PipelineRunner(self.run_config).run({})
+        request = self.api_client.create_pipeline_job.call_args.kwargs["request"]
+        self.assertEqual(key, request.pipeline_job.encryption_spec.kms_key_name)
+
+    @mock.patch.object(pipeline_runner, "_MAX_JOB_TEMPLATES", 2)
+    @mock.patch.object(template_cache.TemplateCache, "get_local_path", autospec=True)
+    def test_template_versions(self, mock_get_local_path):
+        """It keeps the parsed templates of the latest versions only."""
+        paths = [os.path.join(self.cache_dir.name, f"v{i}.json") for i in range(3)]
+        for path in paths:
+            _write_template(path)
+        mock_get_local_path.side_effect = [paths[i] for i in (0, 1, 0, 2, 1)]
+        self.run_config.pipeline_path = "gs://bucket/pipeline.json"
+        runner = pipeline_runner.PipelineRunner(self.run_config)
+        with mock.patch.object(
+            pipeline_runner.job_requests,
+            "JobTemplate",
+            wraps=pipeline_runner.job_requests.JobTemplate,
+        ) as mock_template:
+            for _ in range(5):
+                runner.run({})
+        self.assertEqual(4, mock_template.call_count)
+
+    def test_explicit_credentials(self):
+        """It uses given credentials without discovering default ones."""
+        credentials = mock.Mock()
+        runner = pipeline_runner.PipelineRunner(
+            self.run_config, credentials=credentials, project="some-project"
+        )
+        runner.run({})
+        self.mock_auth_default.assert_not_called()
+        self.mock_client.assert_called_once_with(
+            credentials=credentials, client_options=mock.ANY
+        )
+        client_options = self.mock_client.call_args.kwargs["client_options"]
+        self.assertEqual(
+            "us-central1-aiplatform.googleapis.com", client_options.api_endpoint
+        )
+        request = self.api_client.create_pipeline_job.call_args.kwargs["request"]
+        self.assertEqual("projects/some-project/locations/us-central1", request.parent)
+
+
+class DedupeTest(RunnerTestCase):
+    """Tests deduplication of identical submissions."""
+
+    def setUp(self):
+        super().setUp()
+        self.set_remote_state("PIPELINE_STATE_RUNNING")
+        self.run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="sample-pipeline",
+            pipeline_path=self.pipeline_path,
+            gcs_root_path="gs://some-staging-bucket",
+            location="us-central1",
+            sync=False,
+            dedupe_window=3600,
+        )
+        self.runner = pipeline_runner.PipelineRunner(self.run_config)
+
+    def set_remote_state(self, state: str) -> None:
+        """Sets the state of jobs returned by the API."""
+        self.api_client.get_pipeline_job.return_value = gca_pipeline_job.PipelineJob(
+            state=state
+        )
+
+    @property
+    def submit_count(self) -> int:
+        """Returns the number of submitted jobs."""
+        return self.api_client.create_pipeline_job.call_count
+
+    def test_reuses_running_job(self):
+        """It returns the ID of an identical job that is still running."""
+        job_id = self.runner.run({"message": "hi", "count": 1})
+        self.assertEqual(job_id, self.runner.run({"count": 1, "message": "hi"}))
+        self.assertEqual(1, self.submit_count)
+        self.assertEqual(1, self.runner.stats.deduplicated)
+
+    def test_submits_different_jobs(self):
+        """It submits jobs with different parameters or templates."""
+        self.runner.run({"message": "hi"})
+        self.runner.run({"message": "bye"})
+        _write_template(self.pipeline_path, name="changed-pipeline")
+        runner = pipeline_runner.PipelineRunner(self.run_config)
+        runner.run({"message": "hi"})
+        self.assertEqual(3, self.submit_count)
+
+    def test_submits_after_failure(self):
+        """It does not reuse jobs that failed since they were recorded."""
+        job_id = self.runner.run({"message": "hi"})
+        self.set_remote_state("PIPELINE_STATE_FAILED")
+        self.assertNotEqual(job_id, self.runner.run({"message": "hi"}))
+        self.assertEqual(2, self.submit_count)
+        self.assertEqual(
+            "PIPELINE_STATE_FAILED", job_index.get_job_index().get(job_id).state
+        )
+
+    def test_does_not_reuse_inactive_jobs(self):
+        """It only reuses jobs that are active or succeeded."""
+        for state in ("PIPELINE_STATE_CANCELLING", "PIPELINE_STATE_UNSPECIFIED"):
+            job_id = self.runner.run({"message": state})
+            self.set_remote_state(state)
+            self.assertNotEqual(job_id, self.runner.run({"message": state}))
+            self.set_remote_state("PIPELINE_STATE_RUNNING")
+        self.assertEqual(4, self.submit_count)
+        job_id = self.runner.run({"message": "hi"})
+        self.set_remote_state("PIPELINE_STATE_PAUSED")
+        self.assertEqual(job_id, self.runner.run({"message": "hi"}))
+
+    def test_window(self):
+        """It only reuses jobs submitted within the dedupe window."""
+        job_id = self.runner.run({"message": "hi"})
+        with mock.patch.object(
+            pipeline_runner.time, "time", return_value=time.time() + 7200
+        ):
+            self.assertNotEqual(job_id, self.runner.run({"message": "hi"}))
+        self.assertEqual(2, self.submit_count)
+
+    def test_force(self):
+        """It submits identical jobs when forced."""
+        job_id = self.runner.run({"message": "hi"})
+        self.assertNotEqual(job_id, self.runner.run({"message": "hi"}, force=True))
+        self.assertEqual(2, self.submit_count)
+
+    def test_disabled(self):
+        """It submits identical jobs without a dedupe window."""
+        self.run_config.dedupe_window = None
+        self.runner.run({"message": "hi"})
+        self.runner.run({"message": "hi"})
+        self.assertEqual(2, self.submit_count)
+        self.api_client.get_pipeline_job.assert_not_called()
+
+    def test_run_many(self):
+        """It submits identical parameter sets in a batch once."""
+        results = self.runner.run_many([{"a": 1}, {"a": 2}, {"a": 1}])
+        self.assertEqual(2, self.submit_count)
+        self.assertEqual(results[0].job_id, results[2].job_id)
+        self.assertEqual([False, False, True], [r.deduplicated for r in results])
+        results = self.runner.run_many([{"a": 2}])
+        self.assertTrue(results[0].deduplicated)
+        self.assertEqual(2, self.submit_count)
+
+
+class FakePipelineServiceAsyncClient:
+    """Asyncio API client whose jobs step through given states."""
+
+    def __init__(self, states: List[str]) -> None:
+        """Initializes the client.
+
+        Args:
+            states: States returned by successive `get_pipeline_job` calls.
+        """
+        self.states = states
+        self.errors: List[Exception] = []
+        self.created: List[gca_pipeline_job.PipelineJob] = []
+        self.cancelled: List[str] = []
+        self.get_count = 0
+
+    async def create_pipeline_job(
+        self, request: pipeline_service.CreatePipelineJobRequest
+    ) -> gca_pipeline_job.PipelineJob:
+        await asyncio.sleep(0)
+        if self.errors:
+            raise self.errors.pop(0)
+        self.created.append(request.pipeline_job)
+        return request.pipeline_job
+
+    async def get_pipeline_job(self, name: str) -> gca_pipeline_job.PipelineJob:
+        state = self.states[min(self.get_count, len(self.states) - 1)]
+        self.get_count += 1
+        return gca_pipeline_job.PipelineJob(name=name, state=state)
+
+    async def cancel_pipeline_job(self, name: str) -> None:
+        self.cancelled.append(name)
+
+
+class RunAsyncTest(RunnerTestCase, unittest.IsolatedAsyncioTestCase):
+    """Tests the asyncio methods of `PipelineRunner`."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = FakePipelineServiceAsyncClient(
+            ["PIPELINE_STATE_PENDING", "PIPELINE_STATE_RUNNING"]
+        )
+        mock.patch.object(
+            pipeline_runner.PipelineRunner,
+            "_create_async_client",
+            return_value=self.client,
+        ).start()
+        self.run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="sample-pipeline",
+            pipeline_path=self.pipeline_path,
+            gcs_root_path="gs://some-staging-bucket",
+            location="us-central1",
+            service_account="sa@some-project.iam.gserviceaccount.com",
+        )
+        self.runner = pipeline_runner.PipelineRunner(self.run_config)
+
+    async def test_run_async(self):
+        """It submits the job through the asyncio client."""
+        job_id = await pipeline_runner.run_async(self.run_config, {"message": "hi"})
+        self.assertTrue(job_id.startswith("sample-pipeline-"))
+        self.assertEqual(1, len(self.client.created))
+        self.assertEqual(
+            self.run_config.service_account, self.client.created[0].service_account
+        )
+        self.assertEqual(
+            "hi",
+            self.client.created[0].runtime_config.parameters["message"].string_value,
+        )
+        self.mock_pipeline_job.assert_not_called()
+
+    async def test_many_concurrent_jobs(self):
+        """It prepares the submission and parses the template once."""
+        with mock.patch.object(
+            job_index, "get_file_digest", wraps=job_index.get_file_digest
+        ) as mock_digest, mock.patch.object(
+            pipeline_runner.job_requests,
+            "JobTemplate",
+            wraps=pipeline_runner.job_requests.JobTemplate,
+        ) as mock_template:
+            job_ids = await asyncio.gather(
+                *(self.runner.run_async({"message": str(i)}) for i in range(100))
+            )
+        self.assertEqual(100, len(set(job_ids)))
+        self.assertEqual(100, len(self.client.created))
+        self.assertEqual(
+            {str(i) for i in range(100)},
+            {
+                job.runtime_config.parameters["message"].string_value
+                for job in self.client.created
+            },
+        )
+        self.mock_create_bucket.assert_called_once()
+        mock_digest.assert_called_once()
+        mock_template.assert_called_once()
+
+    async def test_sequential_jobs(self):
+        """It keeps the prepared submission for later jobs."""
+        with mock.patch.object(
+            pipeline_runner.PipelineRunner,
+            "_prepare_template",
+            autospec=True,
+            side_effect=[OSError("Not found"), self.pipeline_path],
+        ) as mock_prepare:
+            with self.assertRaises(OSError):
+                await self.runner.run_async({})
+            await self.runner.run_async({})
+            await self.runner.run_async({})
+        self.assertEqual(2, mock_prepare.call_count)
+        self.assertEqual(2, len(self.client.created))
+
+    @mock.patch.object(rate_limit, "get_backoff", return_value=0.0)
+    async def test_run_async_retries_quota_errors(self, _):
+        """It retries submissions that failed with quota errors."""
+        self.client.errors = [exceptions.ResourceExhausted("Quota")]
+        await self.runner.run_async({})
+        self.assertEqual(1, len(self.client.created))
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(submitted=1, retried=1), self.runner.stats
+        )
+
+    async def test_cancel_pending_submission(self):
+        """It stops a submission that is cancelled before the job is created."""
+        task = asyncio.ensure_future(self.runner.run_async({}))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual([], self.client.created)
+
+    async def test_watch_async(self):
+        """It yields each state change until the job is terminal."""
+        self.client.states += ["PIPELINE_STATE_RUNNING", "PIPELINE_STATE_SUCCEEDED"]
+        states = [
+            state
+            async for state in self.runner.watch_async(
+                "job-a", initial_interval=0, max_interval=0
+            )
+        ]
+        self.assertEqual(
+            [
+                "PIPELINE_STATE_PENDING",
+                "PIPELINE_STATE_RUNNING",
+                "PIPELINE_STATE_SUCCEEDED",
+            ],
+            states,
+        )
+        self.assertEqual(4, self.client.get_count)
+
+    async def test_watch_async_records_final_state(self):
+        """It records the final state of a watched job in the job index."""
+        job_id = await self.runner.run_async({"message": "hi"})
+        self.client.states = ["PIPELINE_STATE_FAILED"]
+        async for _ in self.runner.watch_async(job_id):
+            pass
+        record = job_index.get_job_index().get(job_id)
+        self.assertEqual("PIPELINE_STATE_FAILED", record.state)
+        self.assertEqual({"message": "hi"}, record.params)
+
+    async def test_cancel_async(self):
+        """It requests cancellation of the job."""
+        await self.runner.cancel_async("job-a")
+        self.assertEqual(
+            ["projects/some-project/locations/us-central1/pipelineJobs/job-a"],
+            self.client.cancelled,
+        )
+
+
+class QuotaErrorPipelineServiceClient:
+    """Pipeline service that fails requests with injected errors."""
+
+    def __init__(self, errors: Sequence[Exception], lost_responses: int = 0) -> None:
+        """Initializes the client.
+
+        Args:
+            errors: Errors raised by successive create requests before any
+                job is created.
+            lost_responses: Number of create requests after those that create
+                the job but fail as if the response was lost.
+        """
+        self.errors = list(errors)
+        self.lost_responses = lost_responses
+        self.jobs: Dict[str, gca_pipeline_job.PipelineJob] = {}
+        self.create_count = 0
+
+    def create_pipeline_job(
+        self,
+        parent: Optional[str] = None,
+        pipeline_job: Optional[gca_pipeline_job.PipelineJob] = None,
+        pipeline_job_id: Optional[str] = None,
+        request: Optional[pipeline_service.CreatePipelineJobRequest] = None,
+        **kwargs: Any,
+    ) -> gca_pipeline_job.PipelineJob:
+        if request is not None:
+            parent = request.parent
+            pipeline_job = request.pipeline_job
+            pipeline_job_id = request.pipeline_job_id
+        self.create_count += 1
+        name = f"{parent}/pipelineJobs/{pipeline_job_id}"
+        if name in self.jobs:
+            raise exceptions.AlreadyExists(f"Job {name} already exists.")
+        if self.errors:
+            raise self.errors.pop(0)
+        job = gca_pipeline_job.PipelineJob(pipeline_job)
+        job.name = name
+        job.state = "PIPELINE_STATE_PENDING"
+        self.jobs[name] = job
+        if self.lost_responses:
+            self.lost_responses -= 1
+            raise exceptions.DeadlineExceeded("Deadline exceeded.")
+        return job
+
+    def get_pipeline_job(
+        self, name: str, **kwargs: Any
+    ) -> gca_pipeline_job.PipelineJob:
+        return self.jobs[name]
+
+
+class SubmissionRetryTest(RunnerTestCase):
+    """Tests rate limiting and retries of job submissions."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempdir = tempfile.TemporaryDirectory()
+        cls.sample_pipeline_path = os.path.join(cls.tempdir.name, "pipeline.json")
+        pipeline_compiler.compile(
+            "sample_pipeline", "pipeline", cls.sample_pipeline_path, use_cache=False
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tempdir.cleanup()
+
+    def setUp(self):
+        super().setUp()
+        self.mock_get_backoff = mock.patch.object(
+            rate_limit, "get_backoff", return_value=0.0
+        ).start()
+        self.run_config = pipeline_runner.PipelineRunConfig(
+            pipeline_name="sample-pipeline",
+            pipeline_path=self.sample_pipeline_path,
+            gcs_root_path="gs://some-staging-bucket",
+            location="us-central1",
+            sync=False,
+            max_submission_retries=2,
+        )
+        self.params = {"message": "hi", "gcs_filepath": "gs://bucket/out.txt"}
+
+    def _runner(
+        self, client: QuotaErrorPipelineServiceClient
+    ) -> pipeline_runner.PipelineRunner:
+        self.mock_client.return_value = client
+        return pipeline_runner.PipelineRunner(self.run_config)
+
+    def test_retries_quota_errors(self):
+        """It retries with backoff after quota errors."""
+        client = QuotaErrorPipelineServiceClient(
+            [exceptions.ResourceExhausted("Quota"), exceptions.TooManyRequests("429")]
+        )
+        runner = self._runner(client)
+        job_id = runner.run(self.params)
+        self.assertEqual(3, client.create_count)
+        self.assertEqual([job_id], [name.split("/")[-1] for name in client.jobs])
+        self.assertEqual([mock.call(1), mock.call(2)], self.mock_get_backoff.mock_calls)
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(submitted=1, retried=2), runner.stats
+        )
+
+    def test_gives_up_after_max_retries(self):
+        """It fails once the maximum number of retries is reached."""
+        client = QuotaErrorPipelineServiceClient(
+            [exceptions.ResourceExhausted("Quota")] * 3
+        )
+        runner = self._runner(client)
+        with self.assertRaises(exceptions.ResourceExhausted):
+            runner.run(self.params)
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(retried=2, failed=1), runner.stats
+        )
+
+    def test_does_not_retry_other_errors(self):
+        """It fails immediately on errors that are not retryable."""
+        client = QuotaErrorPipelineServiceClient([exceptions.PermissionDenied("No")])
+        runner = self._runner(client)
+        with self.assertRaises(exceptions.PermissionDenied):
+            runner.run(self.params)
+        self.assertEqual(1, client.create_count)
+        self.assertEqual(pipeline_runner.SubmissionStats(failed=1), runner.stats)
+
+    def test_idempotent_retries(self):
+        """It does not submit a job twice if a failed attempt created it."""
+        client = QuotaErrorPipelineServiceClient([], lost_responses=1)
+        runner = self._runner(client)
+        runner.run(self.params)
+        self.assertEqual(2, client.create_count)
+        self.assertEqual(1, len(client.jobs))
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(submitted=1, retried=1), runner.stats
+        )
+
+    def test_existing_job_id(self):
+        """It fails if the job ID of a first attempt is taken."""
+        client = QuotaErrorPipelineServiceClient([])
+        runner = self._runner(client)
+        with mock.patch.object(utils, "get_job_id", return_value="taken"):
+            runner.run(self.params)
+            with self.assertRaises(exceptions.AlreadyExists):
+                runner.run(self.params)
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(submitted=1, failed=1), runner.stats
+        )
+
+    def test_run_many_with_quota_errors(self):
+        """It submits all jobs of a batch despite intermittent quota errors."""
+        self.run_config.max_submission_retries = 5
+        client = QuotaErrorPipelineServiceClient(
+            [exceptions.ResourceExhausted("Quota")] * 5
+        )
+        runner = self._runner(client)
+        results = runner.run_many([self.params] * 10, max_in_flight=1)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(10, len(client.jobs))
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(submitted=10, retried=5), runner.stats
+        )
+
+    def test_run_batch(self):
+        """It submits jobs bound to the template parsed once."""
+        self.run_config.max_submission_retries = 5
+        client = QuotaErrorPipelineServiceClient(
+            [exceptions.ResourceExhausted("Quota")] * 2
+        )
+        runner = self._runner(client)
+        param_sets = [
+            {"message": f"hi {i}", "gcs_filepath": "gs://bucket/out.txt"}
+            for i in range(5)
+        ]
+        results = runner.run_batch(param_sets, max_in_flight=2)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(submitted=5, retried=2), runner.stats
+        )
+        for result, params in zip(results, param_sets, strict=True):
+            job = client.jobs[
+                "projects/some-project/locations/us-central1/pipelineJobs/"
+                + result.job_id
+            ]
+            self.assertEqual("sample-pipeline", job.display_name)
+            self.assertEqual(
+                "gs://some-staging-bucket",
+                job.runtime_config.gcs_output_directory,
+            )
+            self.assertEqual(
+                params["message"], job.runtime_config.parameters["message"].string_value
+            )
+
+    def test_run_batch_invalid_params(self):
+        """It submits no job if any parameter set does not match the template."""
+        client = QuotaErrorPipelineServiceClient([])
+        runner = self._runner(client)
+        with self.assertRaisesRegex(ValueError, "typo"):
+            runner.run_batch([self.params, {**self.params, "typo": 1}])
+        with self.assertRaisesRegex(ValueError, "gcs_filepath"):
+            runner.run_batch([{"message": "hi"}])
+        self.assertEqual(0, client.create_count)
+
+    def test_run_batch_dedupe(self):
+        """It submits identical parameter sets in a batch once."""
+        self.run_config.dedupe_window = 3600
+        client = QuotaErrorPipelineServiceClient([])
+        runner = self._runner(client)
+        results = runner.run_batch([self.params, self.params])
+        self.assertEqual(1, len(client.jobs))
+        self.assertEqual([False, True], [r.deduplicated for r in results])
+        results = runner.run_batch([self.params])
+        self.assertTrue(results[0].deduplicated)
+        self.assertEqual(1, client.create_count)
+
+    @mock.patch.object(pipeline_runner.time, "sleep", autospec=True)
+    def test_rate_limit(self, mock_sleep):
+        """It delays submissions beyond the configured burst."""
+        self.run_config.max_submissions_per_second = 2.0
+        self.run_config.submission_burst = 3
+        runner = self._runner(QuotaErrorPipelineServiceClient([]))
+        with mock.patch.object(
+            utils, "get_job_id", side_effect=[f"job-{i}" for i in range(5)]
+        ):
+            for _ in range(5):
+                runner.run(self.params)
+        self.assertEqual(2, mock_sleep.call_count)
+        # Waits for one and two tokens, less the time spent creating jobs.
+        first_delay, second_delay = (c.args[0] for c in mock_sleep.call_args_list)
+        self.assertLessEqual(first_delay, 0.5)
+        self.assertLessEqual(second_delay, 1.0)
+        self.assertGreater(second_delay, first_delay)
+        self.assertEqual(
+            pipeline_runner.SubmissionStats(submitted=5, throttled=2), runner.stats
         )
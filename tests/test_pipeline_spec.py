@@ -0,0 +1,118 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `pipeline_spec` module."""
+import unittest
+
+from pipelines import pipeline_spec
+
+
+class GetPipelineSpecTest(unittest.TestCase):
+    """Tests `get_pipeline_spec`."""
+
+    def test_pipeline_job(self):
+        """It returns the spec of a pipeline job."""
+        spec = {"root": {}}
+        template = {"pipelineSpec": spec, "runtimeConfig": {}}
+        self.assertIs(spec, pipeline_spec.get_pipeline_spec(template))
+
+    def test_bare_spec(self):
+        """It returns a bare pipeline spec as is."""
+        spec = {"root": {}}
+        self.assertIs(spec, pipeline_spec.get_pipeline_spec(spec))
+
+
+class GetTaskDependenciesTest(unittest.TestCase):
+    """Tests `get_task_dependencies`."""
+
+    def test_dependencies(self):
+        """It includes explicit dependencies and producers of consumed outputs."""
+        dag = {
+            "tasks": {
+                "a": {},
+                "b": {
+                    "inputs": {
+                        "parameters": {
+                            "x": {
+                                "taskOutputParameter": {
+                                    "producerTask": "a",
+                                    "outputParameterKey": "Output",
+                                }
+                            },
+                            "y": {"componentInputParameter": "y"},
+                        }
+                    }
+                },
+                "c": {
+                    "dependentTasks": ["a"],
+                    "inputs": {
+                        "artifacts": {
+                            "data": {
+                                "taskOutputArtifact": {
+                                    "producerTask": "b",
+                                    "outputArtifactKey": "out",
+                                }
+                            }
+                        }
+                    },
+                },
+            }
+        }
+        self.assertEqual(
+            {"a": set(), "b": {"a"}, "c": {"a", "b"}},
+            pipeline_spec.get_task_dependencies(dag),
+        )
+        self.assertEqual(
+            {"a": set(), "b": {"a"}, "c": {"b"}},
+            pipeline_spec.get_task_dependencies(dag, explicit=False),
+        )
+
+
+class TopologicalSortTest(unittest.TestCase):
+    """Tests `topological_sort`."""
+
+    def test_order(self):
+        """It orders tasks after their dependencies, breaking ties by name."""
+        dependencies = {"d": {"b", "c"}, "c": {"a"}, "b": {"a"}, "a": set()}
+        self.assertEqual(
+            ["a", "b", "c", "d"], pipeline_spec.topological_sort(dependencies)
+        )
+
+    def test_cycle(self):
+        """It raises an error on cyclic dependencies."""
+        with self.assertRaises(ValueError):
+            pipeline_spec.topological_sort({"a": {"b"}, "b": {"a"}})
+
+    def test_unknown_task(self):
+        """It raises an error on dependencies on unknown tasks."""
+        with self.assertRaises(ValueError):
+            pipeline_spec.topological_sort({"a": {"b"}})
+
+
+class GetLevelsTest(unittest.TestCase):
+    """Tests `get_levels`."""
+
+    def test_levels(self):
+        """It groups tasks by the length of their longest upstream chain."""
+        dependencies = {"d": {"a", "c"}, "c": {"b"}, "b": {"a"}, "a": set(), "e": set()}
+        self.assertEqual(
+            [["a", "e"], ["b"], ["c"], ["d"]], pipeline_spec.get_levels(dependencies)
+        )
+
+    def test_cycle(self):
+        """It names the tasks on or downstream of a cycle."""
+        with self.assertRaisesRegex(ValueError, r"\['b', 'c', 'd'\]"):
+            pipeline_spec.get_levels(
+                {"a": set(), "b": {"a", "c"}, "c": {"b"}, "d": {"c"}}
+            )
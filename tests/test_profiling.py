@@ -0,0 +1,108 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `profiling` module."""
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from pipelines import profiling
+
+
+class ProfilerTest(unittest.TestCase):
+    """Tests `Profiler`."""
+
+    def setUp(self):
+        self.profiler = profiling.Profiler()
+
+    def test_nested_spans(self):
+        """It records spans with their nesting depth."""
+        with self.profiler.span("outer"):
+            with self.profiler.span("inner"):
+                pass
+        spans = {span.name: span for span in self.profiler.spans}
+        self.assertEqual(0, spans["outer"].depth)
+        self.assertEqual(1, spans["inner"].depth)
+        self.assertGreaterEqual(spans["outer"].duration, spans["inner"].duration)
+
+    def test_span_records_on_error(self):
+        """It records spans that raise."""
+        with self.assertRaises(ValueError):
+            with self.profiler.span("failing"):
+                raise ValueError()
+        self.assertEqual(["failing"], [span.name for span in self.profiler.spans])
+
+    def test_spans_from_threads(self):
+        """It records spans from other threads at their own depth."""
+        with self.profiler.span("main"):
+            thread = threading.Thread(target=self._record, args=("worker",))
+            thread.start()
+            thread.join()
+        spans = {span.name: span for span in self.profiler.spans}
+        self.assertEqual(0, spans["worker"].depth)
+        self.assertNotEqual(spans["main"].thread_id, spans["worker"].thread_id)
+
+    def _record(self, name: str):
+        with self.profiler.span(name):
+            pass
+
+    def test_format_breakdown(self):
+        """It aggregates spans with the same name."""
+        for _ in range(3):
+            self._record("repeated")
+        lines = self.profiler.format_breakdown().splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertEqual(["repeated", "3"], lines[1].split()[:2])
+
+    def test_write_chrome_trace(self):
+        """It writes complete events in microseconds."""
+        self._record("phase")
+        with tempfile.TemporaryDirectory() as tempdir:
+            trace_path = os.path.join(tempdir, "trace.json")
+            self.profiler.write_chrome_trace(trace_path)
+            with open(trace_path) as fp:
+                trace = json.load(fp)
+        (event,) = trace["traceEvents"]
+        self.assertEqual("phase", event["name"])
+        self.assertEqual("X", event["ph"])
+        span = self.profiler.spans[0]
+        self.assertAlmostEqual(span.duration * 1e6, event["dur"])
+
+    def test_write_pstats_without_cprofile(self):
+        """It cannot write cProfile statistics unless cProfile was enabled."""
+        with self.assertRaises(RuntimeError):
+            self.profiler.write_pstats("profile.prof")
+
+
+class SpanTest(unittest.TestCase):
+    """Tests `span`."""
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled(self):
+        """It records nothing unless profiling is enabled."""
+        with profiling.span("phase"):
+            pass
+        profiler = profiling.enable()
+        self.assertEqual([], profiler.spans)
+
+    def test_enabled(self):
+        """It records spans in the enabled profiler."""
+        profiler = profiling.enable()
+        with profiling.span("phase"):
+            pass
+        self.assertEqual(["phase"], [span.name for span in profiler.spans])
@@ -0,0 +1,92 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests `rate_limit.py`."""
+
+import random
+import threading
+import unittest
+
+from pipelines import rate_limit
+
+
+class FakeClock:
+    """Clock that only advances when told to."""
+
+    def __init__(self) -> None:
+        """Initializes the clock at time zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Returns the current time."""
+        return self.now
+
+
+class TokenBucketTest(unittest.TestCase):
+    """Tests `TokenBucket`."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = rate_limit.TokenBucket(rate=2.0, capacity=3, clock=self.clock)
+
+    def test_burst(self):
+        """It allows up to `capacity` requests without waiting."""
+        delays = [self.bucket.reserve() for _ in range(5)]
+        self.assertEqual([0.0, 0.0, 0.0, 0.5, 1.0], delays)
+
+    def test_refill(self):
+        """It adds tokens at `rate` per second up to `capacity`."""
+        for _ in range(3):
+            self.bucket.reserve()
+        self.clock.now = 1.0
+        self.assertEqual([0.0, 0.0, 0.5], [self.bucket.reserve() for _ in range(3)])
+        self.clock.now = 100.0
+        delays = [self.bucket.reserve() for _ in range(4)]
+        self.assertEqual([0.0, 0.0, 0.0, 0.5], delays)
+
+    def test_default_capacity(self):
+        """It defaults to a capacity of one second's worth of tokens."""
+        self.assertEqual(10, rate_limit.TokenBucket(rate=10).capacity)
+        self.assertEqual(1, rate_limit.TokenBucket(rate=0.1).capacity)
+
+    def test_invalid_rate(self):
+        """It rejects rates that are not positive."""
+        with self.assertRaises(ValueError):
+            rate_limit.TokenBucket(rate=0)
+
+    def test_threads(self):
+        """It hands out each token once across threads."""
+        bucket = rate_limit.TokenBucket(rate=1.0, capacity=1, clock=self.clock)
+        delays = []
+        threads = [
+            threading.Thread(target=lambda: delays.append(bucket.reserve()))
+            for _ in range(100)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([float(i) for i in range(100)], sorted(delays))
+
+
+class GetBackoffTest(unittest.TestCase):
+    """Tests `get_backoff` function."""
+
+    def test_exponential_bound(self):
+        """It draws delays below a bound that doubles with each attempt."""
+        rng = random.Random(0)
+        for attempt, bound in [(1, 1.0), (2, 2.0), (3, 4.0), (10, 60.0)]:
+            delays = [rate_limit.get_backoff(attempt, rng=rng) for _ in range(100)]
+            self.assertTrue(all(0 <= delay <= bound for delay in delays))
+            self.assertGreater(max(delays), bound / 2)
@@ -0,0 +1,230 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `run_report` module."""
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+import unittest
+from unittest import mock
+
+from google.cloud import aiplatform as vertex
+
+from pipelines import run_report
+
+
+def _timestamp(seconds: Optional[float]) -> Optional[str]:
+    """Returns an RFC 3339 timestamp some seconds after noon on 2022-06-30."""
+    if seconds is None:
+        return None
+    return f"2022-06-30T12:{int(seconds) // 60:02d}:{seconds % 60:06.3f}Z"
+
+
+def _task(
+    task_id: str, name: str, create: float, start: float, end: float, **kwargs: str
+) -> Dict[str, Any]:
+    """Returns the task details of a task that ran at the given seconds."""
+    return {
+        "taskId": task_id,
+        "parentTaskId": "1",
+        "taskName": name,
+        "createTime": _timestamp(create),
+        "startTime": _timestamp(start),
+        "endTime": _timestamp(end),
+        "state": "SUCCEEDED",
+        **kwargs,
+    }
+
+
+# Task `a` runs first, then `b` and `c` in parallel, then `d`.
+JOB_DETAILS: Dict[str, Any] = {
+    "name": "projects/123/locations/us-central1/pipelineJobs/sample-job",
+    "state": "PIPELINE_STATE_SUCCEEDED",
+    "startTime": _timestamp(0),
+    "pipelineSpec": {
+        "root": {
+            "dag": {
+                "tasks": {
+                    "a": {},
+                    "b": {"dependentTasks": ["a"]},
+                    "c": {"dependentTasks": ["a"]},
+                    "d": {"dependentTasks": ["b", "c"]},
+                }
+            }
+        }
+    },
+    "jobDetail": {
+        "taskDetails": [
+            {
+                "taskId": "1",
+                "taskName": "sample-pipeline",
+                "createTime": _timestamp(0),
+                "startTime": _timestamp(0),
+                "endTime": _timestamp(200),
+                "state": "SUCCEEDED",
+            },
+            _task("2", "a", 0, 10, 60),
+            _task("3", "b", 60, 70, 170),
+            _task("4", "c", 60, 65, 125),
+            _task("5", "d", 170, 180, 200),
+        ]
+    },
+}
+
+
+class CreateReportTest(unittest.TestCase):
+    """Tests `create_report` function."""
+
+    def test_report(self):
+        """It reports task timings, the critical path and parallelism."""
+        report = run_report.create_report(JOB_DETAILS)
+        self.assertEqual("sample-job", report.job_id)
+        self.assertEqual("SUCCEEDED", report.state)
+        self.assertEqual(200.0, report.wall_seconds)
+        self.assertEqual(["a", "b", "c", "d"], [task.name for task in report.tasks])
+        task_b = report.tasks[1]
+        self.assertEqual(("a",), task_b.upstream)
+        self.assertEqual(10.0, task_b.queued_seconds)
+        self.assertEqual(100.0, task_b.execution_seconds)
+        self.assertEqual(["a", "b", "d"], report.critical_path)
+        self.assertEqual(200.0, report.critical_path_seconds)
+        self.assertAlmostEqual(230 / 200, report.average_parallelism)
+        self.assertEqual(2, report.max_parallelism)
+
+    def test_spec_override(self):
+        """It reads the task graph from a given compiled pipeline."""
+        spec = {
+            "pipelineSpec": {
+                "root": {"dag": {"tasks": {"c": {}, "d": {"dependentTasks": ["c"]}}}}
+            }
+        }
+        report = run_report.create_report(JOB_DETAILS, spec)
+        self.assertEqual(["c", "d"], report.critical_path)
+
+    def test_skipped_tasks(self):
+        """It reports tasks that never ran without timings."""
+        job_details = json.loads(json.dumps(JOB_DETAILS))
+        task_d = job_details["jobDetail"]["taskDetails"][-1]
+        task_d.update(state="SKIPPED", startTime=None, endTime=None)
+        report = run_report.create_report(job_details)
+        self.assertIsNone(report.tasks[-1].execution_seconds)
+        self.assertEqual(["a", "b"], report.critical_path)
+        self.assertEqual(170.0, report.wall_seconds)
+
+    def test_timestamp_formats(self):
+        """It parses timestamps with any precision and offset."""
+        job_details = json.loads(json.dumps(JOB_DETAILS))
+        task_a = job_details["jobDetail"]["taskDetails"][1]
+        task_a["startTime"] = "2022-06-30T12:00:10.123456789Z"
+        task_a["endTime"] = "2022-06-30T14:01:00+02:00"
+        report = run_report.create_report(job_details)
+        self.assertAlmostEqual(10.123457, report.tasks[0].start_time, places=6)
+        self.assertEqual(60.0, report.tasks[0].end_time)
+
+    def test_repeated_task_names(self):
+        """It reports every loop iteration and nested task with a shared name."""
+        job_details = json.loads(json.dumps(JOB_DETAILS))
+        job_details["pipelineSpec"]["root"]["dag"]["tasks"] = {
+            "a": {},
+            "for-loop-1": {"dependentTasks": ["a"]},
+            "d": {"dependentTasks": ["for-loop-1"]},
+        }
+        job_details["jobDetail"]["taskDetails"] = [
+            job_details["jobDetail"]["taskDetails"][0],
+            _task("2", "a", 0, 10, 60),
+            _task("3", "for-loop-1", 60, 60, 170),
+            *(
+                _task(str(i), "train", 60, 70, 160, parentTaskId="3")
+                for i in range(4, 9)
+            ),
+            _task("9", "a", 160, 160, 165, parentTaskId="3"),
+            _task("10", "d", 170, 180, 200),
+        ]
+        report = run_report.create_report(job_details)
+        names = [task.name for task in report.tasks]
+        self.assertEqual(5, names.count("train"))
+        self.assertEqual(2, names.count("a"))
+        nested_a = next(task for task in report.tasks if task.task_id == "9")
+        self.assertFalse(nested_a.top_level)
+        self.assertEqual((), nested_a.upstream)
+        self.assertEqual(6, report.max_parallelism)
+        self.assertEqual(["a", "for-loop-1", "d"], report.critical_path)
+        output = report.format_breakdown()
+        self.assertIn("Critical path (200.0s, 20.0s queued)", output)
+        self.assertRegex(output, r"\n  a +SUCCEEDED +160.0")
+
+    def test_no_task_details(self):
+        """It rejects jobs without task details."""
+        with self.assertRaises(ValueError):
+            run_report.create_report({"name": "job"})
+
+
+class RunReportTest(unittest.TestCase):
+    """Tests `RunReport` class."""
+
+    def setUp(self):
+        self.report = run_report.create_report(JOB_DETAILS)
+
+    def test_format_breakdown(self):
+        """It formats one line per task and a summary."""
+        output = self.report.format_breakdown()
+        self.assertIn("Job sample-job SUCCEEDED in 200.0s.", output)
+        self.assertRegex(output, r"\* b +SUCCEEDED +70.0 +10.0 +100.0")
+        self.assertRegex(output, r"\n  c +SUCCEEDED")
+        self.assertIn("Critical path (200.0s, 30.0s queued): a -> b -> d", output)
+        self.assertIn("Parallelism: 1.15 average, 2 max", output)
+
+    def test_to_dict(self):
+        """It includes derived timings."""
+        data = self.report.to_dict()
+        json.dumps(data)
+        self.assertEqual(200.0, data["critical_path_seconds"])
+        self.assertEqual(50.0, data["tasks"][0]["execution_seconds"])
+
+    def test_write_chrome_trace(self):
+        """It writes queued and executing phases without overlaps per row."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "trace.json")
+            self.report.write_chrome_trace(path)
+            with open(path) as fp:
+                events = json.load(fp)["traceEvents"]
+        self.assertEqual(8, len(events))
+        self.assertEqual(
+            {"name": "b", "ph": "X", "ts": 70e6, "dur": 100e6, "pid": 0, "tid": 0},
+            {key: events[3][key] for key in ("name", "ph", "ts", "dur", "pid", "tid")},
+        )
+        rows = {event["name"]: event["tid"] for event in events}
+        self.assertNotEqual(rows["b"], rows["c"])
+
+
+class JobDetailsTest(unittest.TestCase):
+    """Tests `get_job_details` and `load_job_details` functions."""
+
+    @mock.patch.object(vertex.PipelineJob, "get", autospec=True)
+    def test_get_job_details(self, mock_get):
+        """It fetches the job from Vertex AI."""
+        mock_get.return_value.to_dict.return_value = JOB_DETAILS
+        output = run_report.get_job_details("sample-job", "us-central1", "project")
+        self.assertIs(JOB_DETAILS, output)
+        mock_get.assert_called_once_with(
+            "sample-job", project="project", location="us-central1"
+        )
+
+    def test_load_job_details(self):
+        """It loads saved job details."""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".json") as tempf:
+            json.dump(JOB_DETAILS, tempf)
+            tempf.flush()
+            self.assertEqual(JOB_DETAILS, run_report.load_job_details(tempf.name))
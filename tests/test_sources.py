@@ -0,0 +1,62 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests `sources.py`."""
+
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from pipelines import sources
+
+
+class GetLocalDependenciesTest(unittest.TestCase):
+    """Tests `get_local_dependencies`."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.package_dir = pathlib.Path(self.tempdir.name)
+        mock.patch.object(sources, "PACKAGE_DIR", self.package_dir).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.tempdir.cleanup()
+
+    def _write_module(self, relative_path: str, source: str) -> None:
+        module_path = self.package_dir / relative_path
+        module_path.parent.mkdir(parents=True, exist_ok=True)
+        module_path.write_text(source)
+
+    def test_transitive_imports(self):
+        """It follows absolute and relative imports within the package."""
+        self._write_module("a.py", "import os\nfrom pipelines import b\n")
+        self._write_module("b.py", "from .sub import c\n")
+        self._write_module("sub/__init__.py", "")
+        self._write_module("sub/c.py", "from . import d\nimport pipelines.a\n")
+        self._write_module("sub/d.py", "")
+        self._write_module("unused.py", "")
+        output = sources.get_local_dependencies("a")
+        self.assertEqual(["a", "b", "sub", "sub.c", "sub.d"], output)
+
+    def test_missing_module(self):
+        """It raises an error for modules outside the package."""
+        with self.assertRaises(ModuleNotFoundError):
+            sources.get_local_dependencies("missing")
+
+    def test_sample_pipeline(self):
+        """It finds the sample pipeline module source."""
+        mock.patch.stopall()
+        output = sources.get_module_path("sample_pipeline")
+        self.assertEqual("sample_pipeline.py", output.name)  # type: ignore[union-attr]
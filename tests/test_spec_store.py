@@ -0,0 +1,92 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Test cases for `spec_store` module."""
+import hashlib
+import json
+import unittest
+from unittest import mock
+
+import cloudpathlib as cpl
+from cloudpathlib import local as cpl_local
+
+from pipelines import spec_store
+
+_ROOT = "gs://bucket/root"
+
+
+class SpecStoreTest(unittest.TestCase):
+    """Tests storing and resolving specifications."""
+
+    def setUp(self):
+        registry = {"gs": cpl_local.local_gs_implementation}
+        patcher = mock.patch.dict(cpl.cloudpath.implementation_registry, registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(cpl_local.LocalGSClient.reset_default_storage_dir)
+
+    def test_put(self):
+        """It stores the canonical specification under its digest."""
+        digest = spec_store.put('{"b": 1, "a": {"c": 2}}', _ROOT)
+        data = spec_store.canonicalize('{"a":{"c":2},"b":1}')
+        self.assertEqual(hashlib.sha256(data).hexdigest(), digest)
+        spec_uri = spec_store.get_spec_uri(_ROOT, digest)
+        self.assertEqual(f"{_ROOT}/specs/{digest}.json", spec_uri)
+        self.assertEqual(data, cpl.CloudPath(spec_uri).read_bytes())
+        self.assertTrue(spec_store.is_content_addressed(spec_uri))
+
+    def test_put_skips_stored_spec(self):
+        """It does not upload a specification that is already stored."""
+        spec_store.put('{"a": 1}', _ROOT)
+        with mock.patch.object(
+            cpl_local.LocalGSClient, "_upload_file", autospec=True
+        ) as mock_upload:
+            spec_store.put('{ "a" : 1 }', _ROOT)
+        mock_upload.assert_not_called()
+
+    def test_alias(self):
+        """It points an alias to the latest stored specification."""
+        first = spec_store.put('{"a": 1}', _ROOT, alias="latest")
+        self.assertEqual(first, spec_store.get_alias(_ROOT, "latest"))
+        second = spec_store.put('{"a": 2}', _ROOT, alias="latest")
+        self.assertEqual(
+            spec_store.get_spec_uri(_ROOT, second),
+            spec_store.resolve("alias:latest", _ROOT),
+        )
+        self.assertIsNone(spec_store.get_alias(_ROOT, "missing"))
+
+    def test_resolve(self):
+        """It resolves digests and leaves other paths unchanged."""
+        digest = "0" * 64
+        self.assertEqual(
+            f"{_ROOT}/specs/{digest}.json",
+            spec_store.resolve(f"sha256:{digest}", _ROOT + "/"),
+        )
+        self.assertEqual("p.json", spec_store.resolve("p.json", _ROOT))
+        self.assertFalse(spec_store.is_reference("p.json"))
+        self.assertFalse(spec_store.is_content_addressed("gs://bucket/p.json"))
+
+    def test_resolve_errors(self):
+        """It fails on malformed references and missing aliases."""
+        for pipeline_path in ("sha256:abc", "alias:a/b", "alias:missing"):
+            with self.subTest(pipeline_path), self.assertRaises(ValueError):
+                spec_store.resolve(pipeline_path, _ROOT)
+
+    def test_canonicalize(self):
+        """It formats equal specifications identically."""
+        self.assertEqual(
+            spec_store.canonicalize('{"b": [1, 2], "a": null}'),
+            spec_store.canonicalize(json.dumps({"a": None, "b": [1, 2]}, indent=4)),
+        )
@@ -0,0 +1,111 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Test cases for `step_cache` module."""
+import io
+import os
+import tarfile
+import tempfile
+import unittest
+
+from pipelines import step_cache
+
+
+class GetPathDigestTest(unittest.TestCase):
+    """Tests `get_path_digest`."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def _write(self, name: str, data: str) -> str:
+        path = os.path.join(self.tempdir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fp:
+            fp.write(data)
+        return path
+
+    def test_file(self):
+        """It depends on the contents of a file."""
+        path = self._write("a", "1")
+        digest = step_cache.get_path_digest(path)
+        self._write("a", "2")
+        self.assertNotEqual(digest, step_cache.get_path_digest(path))
+
+    def test_directory(self):
+        """It depends on the names and contents of files in a directory."""
+        self._write("dir/a", "1")
+        digest = step_cache.get_path_digest(os.path.join(self.tempdir.name, "dir"))
+        os.rename(
+            os.path.join(self.tempdir.name, "dir", "a"),
+            os.path.join(self.tempdir.name, "dir", "b"),
+        )
+        self.assertNotEqual(
+            digest, step_cache.get_path_digest(os.path.join(self.tempdir.name, "dir"))
+        )
+
+
+class GetCacheKeyTest(unittest.TestCase):
+    """Tests `get_cache_key`."""
+
+    def test_inputs(self):
+        """It changes with any input and not with the order of keys."""
+        key = step_cache.get_cache_key(
+            {"a": 1}, {"image": "python"}, {"x": {"intValue": 1}}, {"d": "0"}
+        )
+        self.assertEqual(
+            key,
+            step_cache.get_cache_key(
+                {"a": 1}, {"image": "python"}, {"x": {"intValue": 1}}, {"d": "0"}
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            step_cache.get_cache_key(
+                {"a": 1}, {"image": "python"}, {"x": {"intValue": 2}}, {"d": "0"}
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            step_cache.get_cache_key(
+                {"a": 1}, {"image": "python"}, {"x": {"intValue": 1}}, {"d": "1"}
+            ),
+        )
+
+
+class PackTest(unittest.TestCase):
+    """Tests `pack` and `unpack`."""
+
+    def test_round_trip(self):
+        """It restores the files of a task directory."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            source = os.path.join(tempdir, "source")
+            target = os.path.join(tempdir, "target")
+            os.makedirs(os.path.join(source, "parameters"))
+            with open(os.path.join(source, "parameters", "Output"), "w") as fp:
+                fp.write("value")
+            step_cache.unpack(step_cache.pack(source), target)
+            with open(os.path.join(target, "parameters", "Output")) as fp:
+                self.assertEqual("value", fp.read())
+
+    def test_unpack_outside(self):
+        """It rejects archives with entries outside of the task directory."""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as archive:
+            archive.addfile(tarfile.TarInfo("../escaped"), io.BytesIO(b""))
+        with tempfile.TemporaryDirectory() as target:
+            with self.assertRaises(ValueError):
+                step_cache.unpack(buffer.getvalue(), target)
@@ -0,0 +1,90 @@
+# Copyright 2022 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests `template_cache.py`."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cloudpathlib as cpl
+from cloudpathlib import local as cpl_local
+
+from pipelines import template_cache
+
+
+class TemplateCacheTest(unittest.TestCase):
+    """Tests `TemplateCache`."""
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        registry = {"gs": cpl_local.local_gs_implementation}
+        mock.patch.dict(cpl.cloudpath.implementation_registry, registry).start()
+        self.cache = template_cache.TemplateCache(self.tempdir.name)
+        self.uri = "gs://bucket/pipeline.json"
+
+    def tearDown(self):
+        mock.patch.stopall()
+        self.tempdir.cleanup()
+
+    def _upload(self, template: dict) -> None:
+        cpl.CloudPath(self.uri).write_text(json.dumps(template))
+
+    def test_reuses_unchanged_template(self):
+        """It downloads and parses an unchanged template only once."""
+        self._upload({"pipelineSpec": {"name": "v1"}})
+        first = self.cache.load(self.uri)
+        second = self.cache.load(self.uri)
+        self.assertIs(first, second)
+        local_path = self.cache.get_local_path(self.uri)
+        with open(local_path) as fp:
+            self.assertEqual(first, json.load(fp))
+        # Only the first lookup had to download the template.
+        self.assertEqual((2, 1), (self.cache.stats.hits, self.cache.stats.misses))
+
+    def test_revalidates_changed_template(self):
+        """It downloads the template again when its etag changes."""
+        self._upload({"pipelineSpec": {"name": "v1"}})
+        self.cache.load(self.uri)
+        self._upload({"pipelineSpec": {"name": "v2"}})
+        output = self.cache.load(self.uri)
+        self.assertEqual({"pipelineSpec": {"name": "v2"}}, output)
+        self.assertEqual(2, self.cache.stats.misses)
+
+    def test_immutable_template(self):
+        """It does not revalidate a template that never changes."""
+        self._upload({"pipelineSpec": {"name": "v1"}})
+        first = self.cache.get_local_path(self.uri, immutable=True)
+        with mock.patch.object(
+            cpl_local.LocalGSPath, "etag", new_callable=mock.PropertyMock
+        ) as mock_etag:
+            second = self.cache.get_local_path(self.uri, immutable=True)
+        mock_etag.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual((1, 1), (self.cache.stats.hits, self.cache.stats.misses))
+
+    def test_missing_template(self):
+        """It raises an error for a missing template."""
+        with self.assertRaises(FileNotFoundError):
+            self.cache.get_local_path("gs://bucket/missing.json")
+
+    def test_local_template(self):
+        """It does not copy local templates."""
+        local_path = os.path.join(self.tempdir.name, "local.json")
+        with open(local_path, "w") as fp:
+            json.dump({"pipelineSpec": {}}, fp)
+        self.assertEqual(local_path, self.cache.get_local_path(local_path))
+        self.assertEqual({"pipelineSpec": {}}, self.cache.load(local_path))
@@ -14,7 +14,12 @@
 
 """Tests `utils.py`."""
 
+from concurrent import futures
+import itertools
+import multiprocessing
 import os
+import time
+from typing import List
 import unittest
 from unittest import mock
 
@@ -40,11 +45,11 @@ class GetJobIdTest(unittest.TestCase):
     def setUp(self):  # noqa: D102
         self.prefix = "some-prefix"
         self.mock_env = mock.patch.dict(os.environ, {"USER": ""}).start()
-        self.timestamp = "20220101-040200"
-        self.mock_get_timestamp = mock.patch.object(
-            utils, "get_timestamp", return_value=self.timestamp
+        self.ulid = "01gkz3x2hmt6t1vf0bk8j1e4ab"
+        self.mock_get_ulid = mock.patch.object(
+            utils, "get_ulid", return_value=self.ulid
         ).start()
-        self.job_id_base = f"{self.prefix}-{self.timestamp}"
+        self.job_id_base = f"{self.prefix}-{self.ulid}"
         self.username = "some-user"
 
     def tearDown(self):  # noqa: D102
@@ -69,3 +74,77 @@ class GetJobIdTest(unittest.TestCase):
         expected = f"{self.job_id_base}-{self.username}"
         output = utils.get_job_id(self.prefix, username=self.username)
         self.assertEqual(expected, output)
+
+    def test_job_id_sanitized(self):
+        """It replaces characters that are not allowed in Vertex job IDs."""
+        output = utils.get_job_id("Sample pipeline_v2", username="First.Last")
+        self.assertEqual(f"sample-pipeline-v2-{self.ulid}-first-last", output)
+
+    def test_job_id_starts_with_letter(self):
+        """It prepends a letter to prefixes that do not start with one."""
+        self.assertEqual(f"job-2022-{self.ulid}", utils.get_job_id("2022"))
+        self.assertEqual(f"job-{self.ulid}", utils.get_job_id("_"))
+
+    def test_job_id_max_length(self):
+        """It truncates long prefixes to keep IDs within 128 characters."""
+        output = utils.get_job_id("a" * 200, username="u" * 50)
+        self.assertEqual(128, len(output))
+        self.assertTrue(output.endswith(f"-{self.ulid}-{'u' * 32}"))
+        self.assertRegex(output, r"^[a-z][-a-z0-9]{0,127}$")
+
+
+def _generate_ulids(count: int) -> List[str]:
+    """Returns new ULIDs, e.g. in a worker process."""
+    return [utils.get_ulid() for _ in range(count)]
+
+
+class GetUlidTest(unittest.TestCase):
+    """Tests `get_ulid`."""
+
+    def test_format(self):
+        """It returns 26 lowercase base32 digits."""
+        self.assertRegex(utils.get_ulid(), r"^[0-9a-hjkmnp-tv-z]{26}$")
+
+    def test_time_sortable(self):
+        """It returns IDs that sort in the order they were generated."""
+        ulids = []
+        for _ in range(3):
+            ulids += _generate_ulids(1000)
+            time.sleep(0.002)
+        self.assertEqual(sorted(ulids), ulids)
+
+    @mock.patch.object(utils.time, "time_ns", return_value=1_000_000_000)
+    def test_clock_standing_still(self, _):
+        """It returns increasing IDs if the clock does not advance."""
+        ulids = _generate_ulids(1000)
+        self.assertEqual(sorted(set(ulids)), ulids)
+
+    def test_concurrent_threads(self):
+        """It returns a million distinct IDs to concurrent threads."""
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            batches = list(executor.map(_generate_ulids, [125_000] * 8))
+        ulids = set(itertools.chain.from_iterable(batches))
+        self.assertEqual(1_000_000, len(ulids))
+        for batch in batches:
+            self.assertEqual(sorted(batch), batch)
+
+    @mock.patch.object(utils.time, "time_ns", return_value=1_000_000_000)
+    def test_forked_processes(self, _):
+        """It does not continue the parent's sequence in forked processes."""
+        utils.get_ulid()
+        context = multiprocessing.get_context("fork")
+        with futures.ProcessPoolExecutor(max_workers=4, mp_context=context) as executor:
+            batches = list(executor.map(_generate_ulids, [10_000] * 4))
+        ulids = set(itertools.chain.from_iterable(batches))
+        self.assertEqual(40_000, len(ulids))
+
+
+class PercentileTest(unittest.TestCase):
+    """Tests `percentile`."""
+
+    def test_percentile(self):
+        """It interpolates between the closest ranks."""
+        values = [4.0, 1.0, 3.0, 2.0]
+        self.assertEqual(1.0, utils.percentile(values, 0))
+        self.assertEqual(2.5, utils.percentile(values, 50))
+        self.assertEqual(4.0, utils.percentile(values, 100))